@@ -0,0 +1,103 @@
+import argparse
+import json
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from bench_classifier import load_crops
+
+# ==== EMOTION BACKEND BENCHMARK ====
+# Latency, throughput and memory per classifier.py backend. Each backend runs
+# in a fresh process (TensorFlow alone adds hundreds of MB), which reports:
+#   load     - import + model build + warm-up
+#   rss      - resident memory after load, and the peak over the run
+#   latency  - one face per call (the ROI fast path with one person), p50/p95/p99
+#   batch    - faces/s at --batch faces per call (a crowded frame)
+#
+#   python bench_backends.py --faces path/to/face_crops
+#   python bench_backends.py --backends deepface onnx:models/emotion.onnx onnx:models/emotion_int8.onnx --threads 1 2 4
+
+def _rss_mb():
+    import psutil
+    return psutil.Process().memory_info().rss / 1e6
+
+def _peak_rss_mb():
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3  # KB on Linux
+
+def _run_backend(spec, threads, faces_dir, batch, rounds, out_q):
+    try:
+        crops = load_crops(faces_dir, max(batch, 1))
+        base = _rss_mb()
+        t0 = time.perf_counter()
+        from classifier import backend_from_spec
+        clf = backend_from_spec(spec, threads)
+        clf.warmup()
+        load_ms = (time.perf_counter() - t0) * 1000
+        rss = _rss_mb()
+
+        faces = clf.prepare(crops)
+        single = faces[:1]
+        times = np.empty(rounds)
+        for i in range(rounds):
+            t = time.perf_counter()
+            clf.predict(single)
+            times[i] = time.perf_counter() - t
+
+        batch_faces = faces[:batch]
+        t = time.perf_counter()
+        for _ in range(rounds):
+            clf.predict(batch_faces)
+        batch_s = time.perf_counter() - t
+
+        p50, p95, p99 = np.percentile(times * 1000.0, (50, 95, 99))
+        out_q.put({
+            "backend": spec, "threads": threads, "load_ms": load_ms,
+            "rss_base_mb": base, "rss_mb": rss, "rss_peak_mb": _peak_rss_mb(),
+            "p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+            "single_fps": rounds / times.sum(),
+            "batch": len(batch_faces), "batch_faces_s": len(batch_faces) * rounds / batch_s,
+        })
+    except Exception as e:
+        out_q.put({"backend": spec, "threads": threads, "error": repr(e)})
+
+def run(specs, threads, faces_dir, batch, rounds):
+    ctx = mp.get_context("spawn")
+    results = []
+    for spec in specs:
+        # Thread count only matters for ONNX Runtime; TF picks its own pools
+        for n in (threads if spec.startswith("onnx") else threads[:1]):
+            q = ctx.Queue()
+            proc = ctx.Process(target=_run_backend, args=(spec, n, faces_dir, batch, rounds, q))
+            proc.start()
+            results.append(q.get())
+            proc.join()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark emotion backends (latency, throughput, RSS)")
+    parser.add_argument("--faces", help="directory of face crops (synthetic crops if omitted)")
+    parser.add_argument("--backends", nargs="+", default=["deepface", "onnx"], help="deepface, onnx or onnx:PATH")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1], help="ONNX Runtime intra-op threads to try")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = run(args.backends, args.threads, args.faces, args.batch, args.rounds)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'backend':<34}{'thr':>4}{'load':>9}{'rss':>8}{'peak':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'1-face/s':>10}{'batch/s':>9}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<34}{r['threads']:>4}  unavailable: {r['error']}")
+            continue
+        print(f"{r['backend']:<34}{r['threads']:>4}{r['load_ms']:7.0f}ms{r['rss_mb']:6.0f}MB{r['rss_peak_mb']:6.0f}MB"
+              f"{r['p50_ms']:7.2f}ms{r['p95_ms']:7.2f}ms{r['p99_ms']:7.2f}ms{r['single_fps']:10.1f}{r['batch_faces_s']:9.1f}")
+    print(f"batch = {args.batch} faces per call, {args.rounds} rounds; rss after load, peak over the whole run")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from classifier import EMOTION_LABELS, EmotionClassifier
+
+# ==== EMOTION CLASSIFIER BENCHMARK ====
+# Per-face DeepFace.analyze() loop vs. one batched EmotionClassifier pass over
+# the same face crops.
+#
+#   python bench_classifier.py --faces path/to/face_crops --batch 8
+
+def load_crops(path, count):
+    if path:
+        files = sorted(glob.glob(os.path.join(path, "*.jpg")) + glob.glob(os.path.join(path, "*.png")))
+        crops = [cv2.imread(f) for f in files[:count]]
+        return [c for c in crops if c is not None]
+    # Synthetic crops: enough to measure cost, not accuracy
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (160, 140, 3), dtype=np.uint8) for _ in range(count)]
+
+def bench_deepface(crops, rounds):
+    from deepface import DeepFace
+    out = []
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        out = []
+        for crop in crops:
+            res = DeepFace.analyze(crop, actions=['emotion'], enforce_detection=False,
+                                   silent=True, detector_backend='skip')
+            out.append([res[0]['emotion'][k] for k in EMOTION_LABELS])
+    return time.perf_counter() - t0, np.array(out) / 100.0
+
+def bench_batched(classifier, crops, rounds):
+    probs = None
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        probs = classifier.predict(classifier.prepare(crops))
+    return time.perf_counter() - t0, probs
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-face vs batched emotion inference")
+    parser.add_argument("--faces", help="directory of face crops (synthetic crops if omitted)")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    crops = load_crops(args.faces, args.batch)
+    classifier = EmotionClassifier()
+    classifier.warmup()
+
+    t_df, p_df = bench_deepface(crops, args.rounds)
+    t_cls, p_cls = bench_batched(classifier, crops, args.rounds)
+    n = len(crops) * args.rounds
+
+    print(f"faces per batch: {len(crops)}")
+    print(f"DeepFace.analyze loop: {n / t_df:8.1f} faces/s ({t_df / args.rounds * 1000:.1f} ms/batch)")
+    print(f"EmotionClassifier:     {n / t_cls:8.1f} faces/s ({t_cls / args.rounds * 1000:.1f} ms/batch)")
+    print(f"max |p_deepface - p_batched|: {np.abs(p_df - p_cls).max():.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from detectors import DETECTORS, make_detector
+from frame_source import open_source
+from tracks import iou
+
+# ==== FACE DETECTOR BENCHMARK ====
+# Runs every detector backend over the same recorded frames (loaded once,
+# so capture/decoding is not timed) and reports throughput, per-frame
+# latency and recall / precision against a labelled reference.
+#
+#   python bench_detectors.py --source clip.mp4 --reference clip_faces.jsonl
+#   python bench_detectors.py --source clip.mp4 --detectors yunet --write-reference clip_faces.jsonl
+#   python bench_detectors.py --source synthetic:300      # generator's own ground truth
+#
+# Reference file: one JSON object per frame, boxes in source-frame pixels
+#   {"frame": 0, "boxes": [[x, y, w, h], ...]}
+# --write-reference labels the clip with the first detector, as a starting
+# point for hand correction.
+
+def load_frames(spec, max_frames):
+    source = open_source(spec)
+    frames, truth = [], []
+    while len(frames) < max_frames:
+        ret, frame = source.read()
+        if not ret:
+            if source.eof: break
+            continue
+        frames.append(frame)
+        box = getattr(source, "face_box", None)
+        truth.append([box] if box else [])
+    source.release()
+    return frames, truth if any(truth) else None
+
+def load_reference(path):
+    ref = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                ref[entry["frame"]] = [tuple(b) for b in entry["boxes"]]
+    return ref
+
+def match(found, expected, threshold):
+    # Greedy one-to-one IoU matching, returns the number of true positives
+    pairs = sorted(((iou(f, e), fi, ei) for fi, f in enumerate(found) for ei, e in enumerate(expected)), reverse=True)
+    used_f, used_e = set(), set()
+    for score, fi, ei in pairs:
+        if score < threshold: break
+        if fi in used_f or ei in used_e: continue
+        used_f.add(fi)
+        used_e.add(ei)
+    return len(used_e)
+
+def run_detector(name, frames, scale, width, warmup):
+    detector = make_detector(name, fallback=None, width=width)
+    results, times = [], []
+    for i, frame in enumerate(frames):
+        t0 = time.perf_counter()
+        # Same input as the pipeline: the frame shrunk by `scale`
+        small = cv2.resize(frame, (0, 0), fx=scale, fy=scale) if scale != 1.0 else frame
+        boxes = detector.detect(small)
+        dt = time.perf_counter() - t0
+        if i >= warmup: times.append(dt)
+        results.append([tuple(int(v / scale) for v in b) for b in boxes])
+    detector.close()
+    return results, np.array(times)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face detector backends on a recorded clip")
+    parser.add_argument("--source", default="synthetic:300", help="video file, frame directory or synthetic[:N]")
+    parser.add_argument("--reference", help="JSONL of labelled face boxes per frame")
+    parser.add_argument("--write-reference", help="label the clip with the first detector and save as JSONL")
+    parser.add_argument("--detectors", nargs="+", default=list(DETECTORS), choices=list(DETECTORS))
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--scale", type=float, default=0.7, help="pipeline resize before detection")
+    parser.add_argument("--width", type=int, default=None, help="override every backend's input width")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU needed for a detection to count")
+    parser.add_argument("--warmup", type=int, default=5, help="frames excluded from latency stats")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    frames, truth = load_frames(args.source, args.max_frames)
+    if args.reference:
+        ref = load_reference(args.reference)
+        truth = [ref.get(i, []) for i in range(len(frames))]
+    h, w = frames[0].shape[:2]
+    print(f"{len(frames)} frames {w}x{h} from {args.source} | reference: "
+          f"{args.reference or ('generator' if truth else 'none')} | IoU >= {args.iou}")
+
+    report = {}
+    for name in args.detectors:
+        try:
+            results, times = run_detector(name, frames, args.scale, args.width, args.warmup)
+        except Exception as e:
+            print(f"{name:<10} unavailable: {e!r}")
+            continue
+
+        if args.write_reference:
+            with open(args.write_reference, "w") as f:
+                for i, boxes in enumerate(results):
+                    f.write(json.dumps({"frame": i, "boxes": [list(b) for b in boxes]}) + "\n")
+            print(f"wrote {args.write_reference} from {name}")
+            args.write_reference = None
+
+        found = sum(len(r) for r in results)
+        p50, p95, p99 = np.percentile(times * 1000.0, (50, 95, 99)) if len(times) else (0.0, 0.0, 0.0)
+        row = {"fps": len(times) / times.sum() if times.sum() else 0.0, "faces": found,
+               "faces_per_s": found / max(1e-9, sum(times)) if len(times) else 0.0,
+               "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "recall": None, "precision": None}
+        if truth:
+            tp = sum(match(r, t, args.iou) for r, t in zip(results, truth))
+            expected = sum(len(t) for t in truth)
+            row["recall"] = tp / expected if expected else None
+            row["precision"] = tp / found if found else None
+        report[name] = row
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'detector':<10}{'fps':>8}{'faces/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'recall':>8}{'prec':>7}")
+    for name, r in report.items():
+        rec = f"{r['recall']:.0%}" if r["recall"] is not None else "-"
+        prec = f"{r['precision']:.0%}" if r["precision"] is not None else "-"
+        print(f"{name:<10}{r['fps']:8.1f}{r['faces_per_s']:9.1f}{r['p50_ms']:8.2f}ms{r['p95_ms']:7.2f}ms"
+              f"{r['p99_ms']:7.2f}ms{rec:>8}{prec:>7}")
+
+if __name__ == "__main__":
+    main()
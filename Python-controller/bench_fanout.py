@@ -0,0 +1,101 @@
+import argparse
+import time
+
+import numpy as np
+import requests
+
+from lamp_emulator import LampEmulator
+from lamp_fleet import LampFleet
+
+# ==== MULTI-LAMP FAN-OUT BENCHMARK ====
+# N local lamp emulators (single-threaded, like the firmware), some of them
+# "dead" (they accept connections but never answer in time). Compares the
+# old sequential blocking calls with LampFleet's parallel dispatch:
+#   - how many decisions per second the controller can push out
+#   - decision -> applied latency on the healthy lamps
+#   - skew: how far apart the healthy lamps apply the same decision
+#
+#   python bench_fanout.py --lamps 24 --dead 2 --latency 0.02
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    p50, p95, p99 = np.percentile(np.array(values) * 1000.0, (50, 95, 99))
+    return f"p50 {p50:7.1f}ms  p95 {p95:7.1f}ms  p99 {p99:7.1f}ms"
+
+def run_sequential(lamps, decisions, timeout):
+    # Old controller path: one blocking call per command per lamp
+    decided = {}
+    start = time.perf_counter()
+    for seq, (mode, bri) in enumerate(decisions):
+        decided[seq] = time.perf_counter()
+        for emu in lamps:
+            try:
+                requests.get(f"{emu.url}/api/mode", params={"name": f"{mode}#{seq}"}, timeout=timeout)
+                requests.post(f"{emu.url}/api/settings", json={"brightness": bri, "seq": seq}, timeout=timeout)
+            except requests.RequestException:
+                pass
+    return decided, time.perf_counter() - start
+
+def run_fleet(lamps, decisions, timeout, rate, workers):
+    fleet = LampFleet([{"name": f"lamp{i}", "url": emu.url} for i, emu in enumerate(lamps)],
+                      timeout=timeout, max_workers=workers)
+    decided = {}
+    start = next_t = time.perf_counter()
+    for seq, (mode, bri) in enumerate(decisions):
+        decided[seq] = time.perf_counter()
+        fleet.send_settings({"mode": f"{mode}#{seq}", "brightness": bri, "seq": seq})
+        next_t += 1.0 / rate
+        time.sleep(max(0.0, next_t - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    time.sleep(timeout * 2 + 0.2)  # let in-flight requests land
+    fleet.stop()
+    return decided, elapsed, fleet
+
+def report(name, lamps, healthy, decided, elapsed):
+    applied = {}  # seq -> [applied time per healthy lamp]
+    for emu in lamps[:healthy]:
+        for c in emu.commands("mode"):
+            applied.setdefault(int(c.value.split("#")[1]), []).append(c.applied)
+    latency = [t - decided[seq] for seq, times in applied.items() for t in times]
+    skew = [max(times) - min(times) for times in applied.values() if len(times) == healthy]
+    complete = sum(1 for times in applied.values() if len(times) == healthy)
+    print(f"{name:<11}{len(decided) / elapsed:8.1f} decisions/s | reached every healthy lamp: {complete}/{len(decided)}")
+    print(f"{'':<11}latency {percentiles(latency)}")
+    print(f"{'':<11}skew    {percentiles(skew)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequential vs parallel multi-lamp dispatch")
+    parser.add_argument("--lamps", type=int, default=24)
+    parser.add_argument("--dead", type=int, default=2, help="lamps that never answer in time")
+    parser.add_argument("--latency", type=float, default=0.02, help="healthy lamp processing time")
+    parser.add_argument("--decisions", type=int, default=40)
+    parser.add_argument("--rate", type=float, default=10.0, help="decisions/s offered to the fleet")
+    parser.add_argument("--workers", type=int, default=16, help="LampFleet worker bound")
+    parser.add_argument("--timeout", type=float, default=0.2)
+    args = parser.parse_args()
+
+    healthy = args.lamps - args.dead
+    decisions = [(("aurora", "fire", "rain", "nebula")[i % 4], 40 + i % 200) for i in range(args.decisions)]
+    print(f"{args.lamps} lamps ({args.dead} dead), {args.latency * 1000:.0f}ms per request, "
+          f"timeout {args.timeout * 1000:.0f}ms, {args.decisions} decisions")
+
+    for name in ("sequential", "fleet"):
+        lamps = [LampEmulator(latency=args.latency if i < healthy else 5.0, seed=i) for i in range(args.lamps)]
+        for emu in lamps: emu.start()
+        if name == "sequential":
+            decided, elapsed = run_sequential(lamps, decisions, args.timeout)
+        else:
+            decided, elapsed, fleet = run_fleet(lamps, decisions, args.timeout, args.rate, args.workers)
+        report(name, lamps, healthy, decided, elapsed)
+        if name == "fleet":
+            states = [h["state"] for h in fleet.health()]
+            print(f"{'':<11}health: {states.count('ok')} ok, {states.count('degraded')} degraded, "
+                  f"{states.count('down')} down | merged {fleet.merged} | workers {fleet.pool._max_workers}")
+        for emu in lamps:
+            emu.server.socket.close()  # dead lamps are still sleeping; don't wait for them
+        for emu in lamps[:healthy]:
+            emu.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+import requests
+
+from lamp_client import make_session
+
+# ==== LAMP LINK BENCHMARK ====
+# Compares the old per-key, new-connection-per-call settings traffic with the
+# pooled keep-alive session + merged payload used by LampSender.
+# Runs against a local stub of the firmware's /api/settings endpoint.
+#
+#   python bench_lamp.py --ticks 500
+
+class StubLampHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # allow keep-alive
+    disable_nagle_algorithm = True
+    requests_seen = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        json.loads(body or b"{}")
+        StubLampHandler.requests_seen += 1
+        reply = b'{"success":true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLampHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def tick_before(url, brightness, speed):
+    # Old MainWindow.send_setting: one requests.post per key, fresh TCP each
+    requests.post(url, json={"brightness": brightness}, timeout=0.2)
+    requests.post(url, json={"speed": speed}, timeout=0.2)
+
+def make_tick_after(session):
+    def tick_after(url, brightness, speed):
+        session.post(url, json={"brightness": brightness, "speed": speed}, timeout=0.2)
+    return tick_after
+
+def run(name, tick, url, ticks):
+    StubLampHandler.requests_seen = 0
+    latencies = np.empty(ticks)
+    start = time.perf_counter()
+    for i in range(ticks):
+        t0 = time.perf_counter()
+        tick(url, 40 + i % 200, i % 100)
+        latencies[i] = time.perf_counter() - t0
+    elapsed = time.perf_counter() - start
+    n_req = StubLampHandler.requests_seen
+    p50, p99 = np.percentile(latencies * 1000, [50, 99])
+    print(f"{name:<8} ticks/s: {ticks / elapsed:8.1f} | req/s: {n_req / elapsed:8.1f} | "
+          f"requests: {n_req:5d} | tick p50: {p50:6.2f}ms p99: {p99:6.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lamp settings traffic against a local stub")
+    parser.add_argument("--ticks", type=int, default=500)
+    args = parser.parse_args()
+
+    server = start_stub()
+    url = f"http://127.0.0.1:{server.server_port}/api/settings"
+
+    run("before", tick_before, url, args.ticks)
+    session = make_session()
+    run("after", make_tick_after(session), url, args.ticks)
+    session.close()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
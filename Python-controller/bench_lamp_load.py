@@ -0,0 +1,96 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from config import EMOTION_FX_POOL
+from lamp_client import LampSender, RateLimiter, MODE_RATE_LIMIT
+from lamp_emulator import LampEmulator
+
+# ==== LAMP LOAD TEST ====
+# Drives the controller's real command path (RateLimiter -> LampSender) at
+# the worker's decision rate against a LampEmulator with the given latency,
+# jitter and loss, then reports end-to-end command latency (decision ->
+# applied on the "lamp") and where commands were lost along the way.
+#
+#   python bench_lamp_load.py --rate 30 --latency 0.05 --jitter 0.03
+#   python bench_lamp_load.py --latency 0.25 --loss 0.1    # overloaded lamp
+#
+# Each mode name carries a "#seq" tag and each settings body a "seq" key
+# (the firmware ignores unknown keys) so applied commands can be matched to
+# the decision that produced them.
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    p50, p95, p99 = np.percentile(np.array(values) * 1000.0, (50, 95, 99))
+    return f"p50 {p50:7.1f}ms  p95 {p95:7.1f}ms  p99 {p99:7.1f}ms  n={len(values)}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the lamp command path against the emulator")
+    parser.add_argument("--rate", type=float, default=30.0, help="decisions per second (worker FPS)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--mode-share", type=float, default=1.0, help="share of decisions that change the mode")
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--limit", type=float, default=MODE_RATE_LIMIT, help="mode rate limit in seconds")
+    parser.add_argument("--timeout", type=float, default=0.2, help="LampSender HTTP timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    modes = [fx for pool in EMOTION_FX_POOL.values() for fx in pool]
+
+    emu = LampEmulator(latency=args.latency, jitter=args.jitter, loss=args.loss, seed=args.seed)
+    emu.start()
+    lamp = LampSender(emu.url, timeout=args.timeout)
+    lamp.start()
+    limiter = RateLimiter(args.limit)
+
+    decided = {}   # seq -> perf_counter at decision time
+    mode_wanted = 0
+    period = 1.0 / args.rate
+    start = next_t = time.perf_counter()
+    seq = 0
+    while time.perf_counter() - start < args.seconds:
+        now = time.perf_counter()
+        decided[seq] = now
+        if rng.random() < args.mode_share:
+            mode_wanted += 1
+            if limiter.allow(now):
+                lamp.send_mode(f"{rng.choice(modes)}#{seq}")
+        lamp.send_settings({"brightness": rng.randint(40, 200), "seq": seq})
+        seq += 1
+        next_t += period
+        time.sleep(max(0.0, next_t - time.perf_counter()))
+
+    # Let the sender drain what is still queued
+    drain_end = time.perf_counter() + 2.0
+    while lamp._pending and time.perf_counter() < drain_end:
+        time.sleep(0.01)
+    time.sleep(args.latency + args.jitter + 0.1)
+    elapsed = time.perf_counter() - start
+    lamp.stop()
+    emu.stop()
+
+    mode_lat = [c.applied - decided[int(c.value.split("#")[1])] for c in emu.commands("mode")]
+    set_lat = [c.applied - decided[c.value["seq"]] for c in emu.commands("settings")]
+    counts = emu.counts
+    applied_modes = counts.get("mode", 0)
+
+    print(f"emulator: latency {args.latency * 1000:.0f}ms +/- {args.jitter * 1000:.0f}ms, loss {args.loss:.0%}, "
+          f"single-threaded | {args.rate:.0f} decisions/s for {args.seconds:.0f}s")
+    print(f"decisions: {seq} | mode changes wanted: {mode_wanted}")
+    print(f"rate limiter ({args.limit:.2f}s): passed {limiter.passed}, dropped {limiter.limited} "
+          f"({limiter.limited / max(1, mode_wanted):.0%})")
+    print(f"sender: sent {lamp.sent} | merged {lamp.merged} | evicted {lamp.dropped} | errors {lamp.errors}")
+    print(f"lamp applied: mode {applied_modes}/{limiter.passed} | settings {counts.get('settings', 0)}/{seq} | "
+          f"lost {counts.get('lost', 0)} | client gave up {counts.get('abandoned', 0)} | "
+          f"{len(emu.log) / elapsed:.1f} cmd/s")
+    print(f"mode latency      {percentiles(mode_lat)}")
+    print(f"settings latency  {percentiles(set_lat)}")
+
+if __name__ == "__main__":
+    main()
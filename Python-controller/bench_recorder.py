@@ -0,0 +1,61 @@
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from pipeline import FrameResult
+from recorder import SessionRecorder, read_session
+
+# ==== SESSION RECORDER BENCHMARK ====
+# Cost of SessionRecorder.append() per frame (including segment rotation) and
+# how fast a recorded session maps back into a NumPy array.
+#
+#   python bench_recorder.py --records 1000000 --segment 262144
+
+def make_results(n=64):
+    rng = np.random.default_rng(0)
+    out = []
+    for _ in range(n):
+        p = rng.dirichlet(np.ones(7)) * 100
+        emotions = dict(zip(("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"), p.tolist()))
+        sys_stats = {"cpu": 12.5, "fps": 30, "inference": 21.0, "interval": 400.0, "comfort": False,
+                     "energy": float(rng.uniform(-100, 100)), "faces": 1, "gesture_active": False,
+                     "gesture_bri": 100, "gesture_spd": 20, "gesture_fx": 0}
+        out.append(FrameResult(emotions, "happy", sys_stats))
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the session recorder")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--segment", type=int, default=262144, help="records per segment file")
+    parser.add_argument("--dir", help="where to write (a temp directory if omitted, removed afterwards)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="mmrec-")
+    results = make_results()
+    rec = SessionRecorder(directory, segment_records=args.segment, keep=0)
+    times = np.empty(args.records)
+    t_all = time.perf_counter()
+    for i in range(args.records):
+        t = time.perf_counter()
+        rec.append(results[i & 63], "aurora")
+        times[i] = time.perf_counter() - t
+    total = time.perf_counter() - t_all
+    rec.close()
+
+    t = time.perf_counter()
+    records, meta = read_session(directory, rec.session)
+    energy = float(records["energy"].mean())  # touches every record
+    t_read = time.perf_counter() - t
+
+    us = times * 1e6
+    print(f"append: {args.records} records, {rec.rotations} rotations, {total / args.records * 1e6:.2f} us/record "
+          f"(p50 {np.percentile(us, 50):.2f} / p99 {np.percentile(us, 99):.2f} / max {us.max():.0f} us)")
+    print(f"read:   {len(records)} records in {t_read * 1000:.1f} ms ({len(records) / t_read / 1e6:.1f} M records/s, "
+          f"mean energy {energy:.1f})")
+    if not args.dir: shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
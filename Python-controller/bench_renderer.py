@@ -0,0 +1,40 @@
+import argparse
+import time
+
+from renderer import PatternRenderer, MODES, FIELDS
+
+# ==== RENDERER BENCHMARK ====
+# Frames/sec per pattern at several matrix sizes. Field patterns render a
+# whole batch in one broadcast; stateful ones step frame by frame.
+#
+#   python bench_renderer.py --frames 240 --batch 60
+#   python bench_renderer.py --sizes 8 64 --patterns aurora fire
+
+def bench(mode, size, frames, batch):
+    r = PatternRenderer(size, size, seed=0)
+    r.set_pattern(mode, transition=False)
+    r.render(batch)  # warm-up
+    t = time.perf_counter()
+    done = 0
+    while done < frames:
+        done += len(r.render(min(batch, frames - done)))
+    return frames / (time.perf_counter() - t)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy pattern renderer")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--patterns", nargs="+", default=list(MODES))
+    parser.add_argument("--frames", type=int, default=240, help="frames rendered per pattern and size")
+    parser.add_argument("--batch", type=int, default=60, help="frames per render() call")
+    args = parser.parse_args()
+
+    header = f"{'PATTERN':<14}{'KIND':<7}" + "".join(f"{f'{s}x{s}':>12}" for s in args.sizes)
+    print(header + "   (frames/s)")
+    print("-" * len(header))
+    for mode in args.patterns:
+        kind = "field" if MODES[mode][0] in FIELDS else "step"
+        row = "".join(f"{bench(mode, s, args.frames, args.batch):>12.0f}" for s in args.sizes)
+        print(f"{mode:<14}{kind:<7}{row}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+
+from config import STREAM_FPS
+from control import LampController
+from service import PreviewService, ServiceWorker
+
+# ==== SERVICE FAN-OUT BENCHMARK ====
+# Runs service.py in-process (dry run, no lamp) and attaches growing numbers
+# of MJPEG viewers, plus --stalled viewers that connect and never read. Per
+# round it reports capture FPS, JPEG encodes/s and encode time, the frame
+# rate each viewer received and the frames skipped for full sockets. Encodes/s
+# should stay at the stream rate whatever the viewer count, and the capture
+# FPS should not move.
+#
+#   python bench_service.py --viewers 1 10 50 --stalled 2
+#   python bench_service.py --source clip.mp4 --viewers 1 25 100 --seconds 10
+
+def _viewer(port, seconds, counts, i, stalled):
+    s = socket.create_connection(("127.0.0.1", port))
+    s.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16384)
+    s.sendall(b"GET /stream.mjpg HTTP/1.1\r\nHost: bench\r\n\r\n")
+    end = time.perf_counter() + seconds
+    if stalled:
+        time.sleep(seconds)
+    else:
+        s.settimeout(1.0)
+        tail = b""
+        while time.perf_counter() < end:
+            try: data = s.recv(262144)
+            except socket.timeout: continue
+            if not data: break
+            counts[i] += (tail + data).count(b"--frame\r\n")
+            tail = data[-8:]
+    s.close()
+
+def round_stats(service, viewers, stalled, seconds):
+    worker = service.worker
+    counts = [0] * (viewers + stalled)
+    threads = [threading.Thread(target=_viewer, args=(service.port, seconds, counts, i, i >= viewers), daemon=True)
+               for i in range(viewers + stalled)]
+    captured, encoded, dropped = worker.frames.published, service.encoded, service.mjpeg.dropped
+    start = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - start
+    jpeg = worker.pipeline.profiler.snapshot().get("jpeg", {})
+    live = counts[:viewers]
+    return {
+        "viewers": viewers, "stalled": stalled,
+        "capture_fps": (worker.frames.published - captured) / elapsed,
+        "encoded_s": (service.encoded - encoded) / elapsed,
+        "jpeg_p50_ms": jpeg.get("p50", 0.0),
+        "viewer_fps_min": min(live) / elapsed if live else 0.0,
+        "viewer_fps_mean": sum(live) / len(live) / elapsed if live else 0.0,
+        "dropped": service.mjpeg.dropped - dropped,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the service preview fan-out")
+    parser.add_argument("--source", default="synthetic", help="camera index, video file, frame directory or synthetic[:N]")
+    parser.add_argument("--viewers", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--stalled", type=int, default=2, help="viewers that never read, per round")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=STREAM_FPS)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    worker = ServiceWorker(args.source, LampController())
+    worker.start()
+    service = PreviewService(worker, "127.0.0.1", 0, args.fps)
+    threading.Thread(target=asyncio.run, args=(service.serve(),), daemon=True).start()
+    while service.server is None or worker.frames.published == 0: time.sleep(0.1)
+    time.sleep(2.0)  # models loaded, face results flowing
+
+    rows = [round_stats(service, n, args.stalled, args.seconds) for n in args.viewers]
+    worker.stop()
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'viewers':>8}{'stalled':>8}{'capture':>10}{'encodes':>9}{'jpeg p50':>10}{'viewer min':>12}{'mean':>7}{'dropped':>9}")
+    for r in rows:
+        print(f"{r['viewers']:>8}{r['stalled']:>8}{r['capture_fps']:8.1f}/s{r['encoded_s']:7.1f}/s{r['jpeg_p50_ms']:8.2f}ms"
+              f"{r['viewer_fps_min']:10.1f}/s{r['viewer_fps_mean']:7.1f}{r['dropped']:>9}")
+    print(f"stream at up to {args.fps:g} fps, {args.seconds:g}s per round")
+
+if __name__ == "__main__":
+    main()
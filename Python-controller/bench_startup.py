@@ -0,0 +1,88 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# ==== STARTUP BENCHMARK ====
+# Launches the full GUI controller (main.py --startup-report) several times
+# and reports how long each startup milestone takes from process launch:
+#   imports        main.py's module imports done
+#   window         window shown and painted
+#   backend        OpenCV / psutil / requests / pipeline imported, worker and
+#                  lamp sender started (these used to load before the window)
+#   first_frame    first camera frame on screen
+#   ai_ready       detector + emotion model loaded and warmed in the pool
+#   first_emotion  first emotion result reached the UI
+#
+#   python bench_startup.py --runs 5
+#   python bench_startup.py --source 0 --platform windows   # real camera / display
+#
+# "window gain" is backend - window: the startup work that now runs after the
+# window is up instead of before it, i.e. how much sooner the window appears.
+
+MARKS = ("imports", "window", "backend", "first_frame", "ai_ready", "first_emotion")
+
+def run_once(args):
+    env = dict(os.environ)
+    if args.platform: env["QT_QPA_PLATFORM"] = args.platform
+    cmd = [sys.executable, "main.py", "--source", args.source, "--startup-report"]
+    if args.detector: cmd += ["--detector", args.detector]
+    t0 = time.time()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        out, _ = proc.communicate(timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        out, _ = proc.communicate()
+    for line in out.splitlines():
+        if line.startswith("STARTUP "):
+            marks = json.loads(line[len("STARTUP "):])
+            return {k: v - t0 for k, v in marks.items()}
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure controller startup milestones")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--source", default="synthetic", help="frame source passed to main.py")
+    parser.add_argument("--detector", default=None)
+    parser.add_argument("--platform", default="offscreen", help="QT_QPA_PLATFORM ('' = system default)")
+    parser.add_argument("--timeout", type=float, default=180.0, help="seconds before a run counts as failed")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.runs):
+        marks = run_once(args)
+        if marks is None:
+            print(f"run {i + 1}: no emotion within {args.timeout:.0f}s")
+            continue
+        runs.append(marks)
+        print(f"run {i + 1}: " + "  ".join(f"{k} {marks[k]:.2f}s" for k in MARKS if k in marks))
+
+    report = {}
+    for k in MARKS:
+        values = [r[k] for r in runs if k in r]
+        if values:
+            report[k] = {"p50_s": float(np.median(values)), "min_s": min(values), "max_s": max(values), "n": len(values)}
+    gain = [r["backend"] - r["window"] for r in runs if "backend" in r and "window" in r]
+    if gain:
+        report["window_gain"] = {"p50_s": float(np.median(gain)), "min_s": min(gain), "max_s": max(gain), "n": len(gain)}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"\n{'milestone':<15}{'p50':>8}{'min':>8}{'max':>8}")
+    for k, r in report.items():
+        if k == "window_gain": continue
+        print(f"{k:<15}{r['p50_s']:7.2f}s{r['min_s']:7.2f}s{r['max_s']:7.2f}s")
+    if "window_gain" in report:
+        r = report["window_gain"]
+        print(f"\nwindow gain: p50 {r['p50_s'] * 1000:.0f}ms (min {r['min_s'] * 1000:.0f} / max {r['max_s'] * 1000:.0f}) "
+              f"of imports and setup now after the window")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import numpy as np
+
+from frame_stream import FrameStreamer, UdpFrameReceiver
+
+# ==== FRAME STREAM BENCHMARK ====
+# Streams generated frames to a local UDP stand-in for the lamp and reports
+# the frame rate that arrives, sender-side drops and sequence gaps.
+#
+#   python bench_stream.py --fps 60 --producer-fps 120 --seconds 5
+
+def test_frame(i, width, height):
+    # Moving diagonal rainbow, enough to see frames change on real hardware
+    y, x = np.mgrid[0:height, 0:width]
+    hue = ((x + y) * 16 + i * 4) % 256
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[..., 0] = hue
+    frame[..., 1] = 255 - hue
+    frame[..., 2] = (hue * 2) % 256
+    return frame
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the UDP frame stream against a local stand-in")
+    parser.add_argument("--fps", type=int, default=60, help="streamer target FPS")
+    parser.add_argument("--producer-fps", type=int, default=120, help="how fast frames are generated")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--size", type=int, default=8, help="matrix width/height")
+    parser.add_argument("--host", help="stream to a real lamp instead of the local stand-in")
+    args = parser.parse_args()
+
+    receiver = None
+    if args.host:
+        streamer = FrameStreamer(args.host, fps=args.fps)
+    else:
+        receiver = UdpFrameReceiver()
+        receiver.start()
+        streamer = FrameStreamer("127.0.0.1", receiver.port, fps=args.fps)
+    streamer.start()
+
+    produced = 0
+    end = time.perf_counter() + args.seconds
+    while time.perf_counter() < end:
+        streamer.push(test_frame(produced, args.size, args.size))
+        produced += 1
+        time.sleep(1.0 / args.producer_fps)
+
+    time.sleep(0.2)
+    streamer.stop()
+    print(f"produced: {produced} frames ({produced / args.seconds:.1f}/s), "
+          f"datagram: {args.size * args.size * 3 + 10} bytes")
+    print(f"sent: {streamer.sent} | dropped (superseded): {streamer.dropped} | blocked: {streamer.blocked}")
+    if receiver:
+        receiver.stop()
+        print(f"received: {receiver.received} at {receiver.fps:.1f} fps | lost: {receiver.lost} | "
+              f"late: {receiver.late} | invalid: {receiver.invalid}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import glob
+import json
+import math
+import multiprocessing as mp
+import os
+import queue
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from config import DETECTOR, EMOTION_BACKEND
+from classifier import BACKENDS, EMOTION_LABELS
+from detectors import DETECTORS
+from pipeline import LampDirector
+from tracks import Track
+
+# ==== OFFLINE BULK ANALYSIS ====
+# Pre-computes lamp shows from recorded sessions. Videos are cut into chunks
+# (CHUNK_S seconds) and the chunks are spread over a process pool; each
+# process decodes its chunk, samples it at `rate` Hz (skipped frames are only
+# grabbed, not decoded into images) and runs detection + the emotion model on
+# the samples. That is the expensive part and it shards freely.
+#
+# The energy engine and the lamp director are sequential (each step depends
+# on the last), so the parent stitches each file's chunks back in order and
+# replays them there; that costs microseconds per sample. One timeline per
+# file is written as a NumPy .npz (columns, see load_timeline).
+#
+# Each pool process runs single-threaded (OpenCV, ONNX Runtime, TensorFlow),
+# so throughput scales with processes, not with threads fighting per core.
+#
+#   python bulk_analyze.py sessions/*.mp4 --out timelines --rate 5
+#   python bulk_analyze.py long_party.mp4 --workers 8 --chunk 30
+#   python bulk_analyze.py clip.mp4 --scaling 1 2 4 8      # frames/s per pool size, nothing written
+
+CHUNK_S = 60.0        # seconds of video per pool job
+ANALYSIS_WIDTH = 480  # frames are brought to the live camera width first
+LOAD_TIMEOUT = 120.0  # seconds for every pool process to load its models
+
+# ==== POOL SIDE ====
+_detector = None
+_classifier = None
+
+def _init_worker(detector_name, backend_name, barrier, errors):
+    global _detector, _classifier
+    # One thread per process: the pool is the parallelism
+    for var in ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS"):
+        os.environ[var] = "1"
+    cv2.setNumThreads(1)
+    try:
+        from classifier import make_classifier
+        from detectors import make_detector
+        _detector = make_detector(detector_name)
+        kwargs = {"threads": 1} if backend_name == "onnx" else {}
+        _classifier = make_classifier(backend_name, **kwargs)  # built and warmed up
+    except Exception as e:
+        # Not raised: Pool would respawn the process and fail again, forever
+        errors.put(repr(e))
+        barrier.abort()  # the parent stops waiting and reports the error
+        return
+    try: barrier.wait()  # the parent starts timing once every process has its models
+    except threading.BrokenBarrierError: pass
+
+def analyze_chunk(job):
+    # job: (file_index, path, start, stop, step) in frame numbers, stop exclusive.
+    # Samples are the frames whose index is a multiple of step, so chunks join seamlessly.
+    file_index, path, start, stop, step = job
+    t0 = time.perf_counter()
+    cap = cv2.VideoCapture(path)
+    if start: cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    frames, probs, faces = [], [], []
+    decoded = 0
+    idx = start
+    while stop is None or idx < stop:
+        if idx % step:
+            if not cap.grab(): break
+        else:
+            ret, frame = cap.read()
+            if not ret: break
+            frames.append(idx)
+            p, n = _analyze_frame(frame)
+            probs.append(p)
+            faces.append(n)
+        decoded += 1
+        idx += 1
+    cap.release()
+
+    return {
+        "file": file_index, "start": start, "decoded": decoded,
+        "frame": np.array(frames, dtype=np.int64),
+        "probs": np.array(probs, dtype=np.float32).reshape(-1, len(EMOTION_LABELS)),
+        "faces": np.array(faces, dtype=np.uint8),
+        "elapsed_s": time.perf_counter() - t0,
+    }
+
+def _analyze_frame(frame):
+    # Probabilities of the largest face (NaN row: nobody in view) and the face count
+    h, w = frame.shape[:2]
+    if w > ANALYSIS_WIDTH:
+        frame = cv2.resize(frame, (ANALYSIS_WIDTH, int(h * ANALYSIS_WIDTH / w)), interpolation=cv2.INTER_AREA)
+    boxes = [b for b in _detector.detect(frame) if b[2] > 0 and b[3] > 0]
+    if not boxes:
+        return np.full(len(EMOTION_LABELS), np.nan, dtype=np.float32), 0
+    x, y, bw, bh = max(boxes, key=lambda b: b[2] * b[3])
+    probs = _classifier.predict(_classifier.prepare([frame[y:y + bh, x:x + bw]]))
+    return probs[0], len(boxes)
+
+# ==== PARENT SIDE ====
+def plan_jobs(paths, rate, chunk_s):
+    jobs, meta = [], []
+    for i, path in enumerate(paths):
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print(f"WARNING: cannot open {path}, skipped")
+            meta.append(None)
+            continue
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        step = max(1, round(fps / rate))
+        meta.append({"path": path, "fps": fps, "frames": total, "step": step})
+        if total <= 0:
+            jobs.append((i, path, 0, None, step))  # unknown length: one job reads to the end
+            continue
+        size = max(step, int(chunk_s * fps) // step * step)
+        jobs.extend((i, path, s, min(s + size, total), step) for s in range(0, total, size))
+    # Longest jobs first so the pool does not end on one straggler
+    jobs.sort(key=lambda j: -(j[3] - j[2]) if j[3] is not None else -math.inf)
+    return jobs, meta
+
+def replay(frame, probs, faces, fps, reactivity=0.3, decay_rate=5.0):
+    # Energy engine + comfort memory + lamp director over one file's samples,
+    # exactly as the live pipeline runs them for the person driving the lamp
+    person = Track(0, None)
+    director = LampDirector()
+    n = len(frame)
+    energy = np.zeros(n, dtype=np.float32)
+    comfort = np.zeros(n, dtype=bool)
+    label = np.empty(n, dtype="U8")
+    fx = np.empty(n, dtype="U16")
+    t = frame / fps
+    for i in range(n):
+        if faces[i]:
+            person.feed(dict(zip(EMOTION_LABELS, (probs[i] * 100.0).tolist())), reactivity, decay_rate)
+        label[i] = person.remember(t[i])
+        director.decide(label[i], {"energy": person.energy, "comfort": person.comfort}, now=t[i])
+        energy[i], comfort[i], fx[i] = person.energy, person.comfort, director.current_fx or "neutral"
+    return {"t": t, "energy": energy, "comfort": comfort, "label": label, "fx": fx}
+
+def write_timeline(path, info, chunks, rate, out_dir):
+    chunks = sorted(chunks, key=lambda c: c["start"])
+    frame = np.concatenate([c["frame"] for c in chunks])
+    probs = np.concatenate([c["probs"] for c in chunks])
+    faces = np.concatenate([c["faces"] for c in chunks])
+    columns = replay(frame, probs, faces, info["fps"])
+    out = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + ".npz")
+    np.savez_compressed(out, frame=frame, probs=probs, faces=faces, emotion_labels=np.array(EMOTION_LABELS),
+                        source=np.array(path), fps=np.array(info["fps"]), rate=np.array(rate), **columns)
+    return out
+
+def load_timeline(path):
+    # -> dict of columns, one row per sample:
+    #   t (s), frame, probs (N, 7; NaN rows when nobody was in view), faces,
+    #   energy, label, fx, comfort; plus emotion_labels, source, fps, rate
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+def run_pool(jobs, workers, detector, backend):
+    # -> (chunk results, seconds including model load, seconds of analysis only)
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers + 1)
+    errors = ctx.Queue()
+    start = time.perf_counter()
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(detector, backend, barrier, errors)) as pool:
+        try:
+            barrier.wait(timeout=LOAD_TIMEOUT)
+        except threading.BrokenBarrierError:
+            try: error = errors.get(timeout=1.0)
+            except queue.Empty: error = f"models not loaded within {LOAD_TIMEOUT:.0f}s"
+            raise RuntimeError(f"pool process could not load its models: {error}") from None
+        ready = time.perf_counter()
+        results = list(pool.imap_unordered(analyze_chunk, jobs, chunksize=1))
+        done = time.perf_counter()
+    return results, done - start, done - ready
+
+def analyze(paths, out_dir="timelines", workers=None, rate=5.0, chunk_s=CHUNK_S, detector=DETECTOR, backend=EMOTION_BACKEND, write=True):
+    workers = workers or os.cpu_count() or 1
+    jobs, meta = plan_jobs(paths, rate, chunk_s)
+    results, elapsed, wall = run_pool(jobs, workers, detector, backend)
+
+    per_file = {}
+    for r in results: per_file.setdefault(r["file"], []).append(r)
+    outputs = []
+    if write:
+        os.makedirs(out_dir, exist_ok=True)
+        for i, chunks in sorted(per_file.items()):
+            outputs.append(write_timeline(meta[i]["path"], meta[i], chunks, rate, out_dir))
+
+    decoded = sum(r["decoded"] for r in results)
+    samples = sum(len(r["frame"]) for r in results)
+    busy = sum(r["elapsed_s"] for r in results)
+    return {
+        "files": len(per_file), "jobs": len(jobs), "workers": workers, "rate": rate,
+        "detector": detector, "emotion_backend": backend,
+        "frames": decoded, "samples": samples, "elapsed_s": elapsed, "load_s": elapsed - wall,
+        "fps": decoded / wall if wall > 0 else 0.0,
+        "samples_s": samples / wall if wall > 0 else 0.0,
+        "pool_efficiency": busy / (wall * workers) if wall > 0 else 0.0,  # share of worker time spent on jobs
+        "outputs": outputs,
+    }
+
+def scaling(paths, counts, rate, chunk_s, detector, backend):
+    # Same jobs at several pool sizes; model load is excluded from the timing
+    jobs, _ = plan_jobs(paths, rate, chunk_s)
+    rows = []
+    for n in counts:
+        results, _, wall = run_pool(jobs, n, detector, backend)
+        rows.append({"workers": n, "fps": sum(r["decoded"] for r in results) / wall})
+    for row in rows: row["speedup"] = row["fps"] / rows[0]["fps"] * counts[0]
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse recorded videos into lamp-show timelines (.npz)")
+    parser.add_argument("videos", nargs="+", help="video files or glob patterns")
+    parser.add_argument("--out", default="timelines", help="output directory for the .npz timelines")
+    parser.add_argument("--workers", type=int, default=None, help="pool processes (default: all cores)")
+    parser.add_argument("--rate", type=float, default=5.0, help="analysed samples per second of video")
+    parser.add_argument("--chunk", type=float, default=CHUNK_S, help="seconds of video per pool job")
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default=DETECTOR)
+    parser.add_argument("--emotion-backend", choices=sorted(BACKENDS), default=EMOTION_BACKEND)
+    parser.add_argument("--scaling", nargs="+", type=int, help="only measure frames/s at these pool sizes")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    paths = sorted({p for pattern in args.videos for p in (glob.glob(pattern) or [pattern])})
+
+    try:
+        if args.scaling:
+            rows = scaling(paths, args.scaling, args.rate, args.chunk, args.detector, args.emotion_backend)
+        else:
+            report = analyze(paths, args.out, args.workers, args.rate, args.chunk, args.detector, args.emotion_backend)
+    except RuntimeError as e:
+        sys.exit(f"ERROR: {e}")
+
+    if args.scaling:
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return
+        for row in rows:
+            print(f"workers {row['workers']:>3}: {row['fps']:8.1f} frames/s  speedup x{row['speedup']:.2f}")
+        return
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['files']} files, {report['jobs']} jobs on {report['workers']} processes "
+          f"({report['detector']} + {report['emotion_backend']}, {report['rate']:g} samples/s of video)")
+    print(f"{report['frames']} frames ({report['samples']} analysed) in {report['elapsed_s']:.1f}s (models {report['load_s']:.1f}s) "
+          f"-> {report['fps']:.1f} frames/s, {report['samples_s']:.1f} samples/s, pool busy {report['pool_efficiency']:.0%}")
+    for out in report["outputs"]: print(f"  wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+
+import cv2
+import numpy as np
+
+from config import EMOTION_BACKEND, EMOTION_BACKENDS, EMOTION_ONNX, ONNX_THREADS
+
+# ==== EMOTION CLASSIFIER BACKENDS ====
+# One interface over the emotion CNN: prepare() turns face crops into a
+# (N, 48, 48) grayscale batch, predict() runs one forward pass and returns
+# (N, 7) probabilities in EMOTION_LABELS order. The model is built once per
+# process.
+#
+#   deepface - DeepFace's Keras model on TensorFlow (the reference)
+#   onnx     - the same model exported to ONNX (export_emotion_onnx.py,
+#              optionally int8), on ONNX Runtime; no TensorFlow import
+#
+# Pick one with EMOTION_BACKEND in config.py or --emotion-backend; check a
+# backend against DeepFace with parity_emotion.py, time them with
+# bench_backends.py.
+
+# Output order of DeepFace's emotion model
+EMOTION_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+FACE_SIZE = 48
+
+class EmotionBackend:
+    name = None
+
+    @staticmethod
+    def prepare(crops):
+        # BGR face crops of any size -> (N, 48, 48) uint8 grayscale batch
+        batch = np.empty((len(crops), FACE_SIZE, FACE_SIZE), dtype=np.uint8)
+        for i, crop in enumerate(crops):
+            gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+            batch[i] = cv2.resize(gray, (FACE_SIZE, FACE_SIZE), interpolation=cv2.INTER_AREA)
+        return batch
+
+    @staticmethod
+    def to_input(faces):
+        # (N, 48, 48) uint8 -> (N, 48, 48, 1) float32 in [0, 1], the Keras model's input
+        return faces.astype(np.float32)[..., np.newaxis] * (1.0 / 255.0)
+
+    def predict(self, faces):
+        # (N, 48, 48) uint8 -> (N, 7) probabilities, rows sum to 1
+        if len(faces) == 0:
+            return np.zeros((0, len(EMOTION_LABELS)), dtype=np.float32)
+        probs = self._forward(self.to_input(faces))
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def _forward(self, batch):
+        raise NotImplementedError
+
+    def warmup(self):
+        self.predict(np.zeros((1, FACE_SIZE, FACE_SIZE), dtype=np.uint8))
+
+class EmotionClassifier(EmotionBackend):
+    # Talks to DeepFace's emotion CNN directly instead of going through
+    # DeepFace.analyze() for every face.
+    name = "deepface"
+
+    def __init__(self):
+        from deepface.modules import modeling
+        self.model = modeling.build_model(task="facial_attribute", model_name="Emotion").model
+
+    def _forward(self, batch):
+        return np.asarray(self.model(batch, training=False))
+
+class OnnxEmotionClassifier(EmotionBackend):
+    name = "onnx"
+
+    def __init__(self, model_path=EMOTION_ONNX, threads=ONNX_THREADS):
+        import onnxruntime as ort  # optional dependency
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"emotion model not found: {model_path} (run export_emotion_onnx.py)")
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _forward(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+BACKENDS = {cls.name: cls for cls in (EmotionClassifier, OnnxEmotionClassifier)}
+assert set(BACKENDS) == set(EMOTION_BACKENDS)  # main.py's --emotion-backend choices, without importing this
+
+def backend_from_spec(spec, threads=ONNX_THREADS):
+    # "deepface", "onnx" or "onnx:path/to/model.onnx" (the scripts compare exports)
+    name, _, path = spec.partition(":")
+    if name == "onnx": return OnnxEmotionClassifier(path or EMOTION_ONNX, threads)
+    return BACKENDS[name]()
+
+def make_classifier(name=EMOTION_BACKEND, fallback="deepface", **kwargs):
+    # -> a warmed-up backend. Anything that stops `name` from building or running
+    # (no onnxruntime, no exported model, a graph ONNX Runtime rejects) falls back
+    # to the DeepFace model
+    try:
+        classifier = BACKENDS[name](**kwargs)
+        classifier.warmup()
+        return classifier
+    except Exception as e:
+        if not fallback or fallback == name: raise
+        print(f"WARNING: emotion backend '{name}' unavailable ({e!r}), using '{fallback}'")
+    classifier = BACKENDS[fallback]()
+    classifier.warmup()
+    return classifier
+
+def emotion_dicts(probs):
+    # Probability matrix -> DeepFace-style {label: percent} dicts
+    percent = (probs * 100.0).tolist()
+    return [dict(zip(EMOTION_LABELS, row)) for row in percent]
@@ -0,0 +1,95 @@
+import os
+
+# ==== CONFIG ====
+ESP32_IP = "192.168.4.1"   
+# Override to point the controller at another lamp or at lamp_emulator.py
+BASE_URL = os.environ.get("MOODMATRIX_LAMP_URL", f"http://{ESP32_IP}")
+
+# Several lamps: list them in a JSON file (see lamp_fleet.load_lamps), or here
+LAMPS_FILE = os.environ.get("MOODMATRIX_LAMPS", "lamps.json")
+LAMPS = [{"name": "lamp1", "url": BASE_URL}]
+
+# LED matrix geometry (MATRIX_WIDTH / MATRIX_HEIGHT / SERPENTINE_LAYOUT in the firmware)
+MATRIX_WIDTH = 8
+MATRIX_HEIGHT = 8
+SERPENTINE = False
+
+# Face detector (see detectors.py / bench_detectors.py): haar, ssd, yunet, mediapipe, deepface.
+# ssd / yunet load their model files from DETECTOR_MODELS. Each backend shrinks
+# the (already 0.7x) frame to its own width before detecting.
+DETECTOR = os.environ.get("MOODMATRIX_DETECTOR", "haar")
+DETECTOR_MODELS = os.environ.get("MOODMATRIX_MODELS", "models")
+DETECTOR_WIDTH = {"haar": 336, "ssd": 300, "yunet": 320, "mediapipe": 256, "deepface": 336}
+
+# Hand tracking passes per second (gesture control), independent of the camera rate
+GESTURE_RATE = 15
+
+# Emotion model backend (classifier.py): "deepface" (TensorFlow) or "onnx"
+# (ONNX Runtime on a model exported with export_emotion_onnx.py).
+# ONNX_THREADS = intra-op threads per inference process.
+EMOTION_BACKENDS = ("deepface", "onnx")
+EMOTION_BACKEND = os.environ.get("MOODMATRIX_EMOTION_BACKEND", "deepface")
+EMOTION_ONNX = os.environ.get("MOODMATRIX_EMOTION_ONNX", os.path.join(DETECTOR_MODELS, "emotion_int8.onnx"))
+ONNX_THREADS = 1
+
+# Face crop -> emotion cache (face_cache.py): entries, dHash bits of tolerance,
+# seconds before a cached result must be recomputed. FACE_CACHE_SIZE = 0 disables it.
+FACE_CACHE_SIZE = 64
+FACE_CACHE_TOLERANCE = 5
+FACE_CACHE_TTL = 3.0
+
+# Session recorder (recorder.py): every face frame result, kept on disk in
+# memory-mapped segments of RECORD_SEGMENT records (64 bytes each, about
+# 2.4 h at 30 fps); the newest RECORD_KEEP segments are kept (0 = all).
+RECORD_ENABLED = os.environ.get("MOODMATRIX_RECORD", "1") != "0"
+RECORD_DIR = os.environ.get("MOODMATRIX_RECORD_DIR", "sessions")
+RECORD_SEGMENT = 262144
+RECORD_KEEP = 48
+
+# Headless service (service.py): MJPEG preview + WebSocket telemetry over HTTP.
+# The preview is encoded once per frame at up to STREAM_FPS and shared by all
+# viewers; a viewer with more than CLIENT_BUFFER bytes still unsent (a few
+# frames) skips frames.
+SERVICE_HOST = os.environ.get("MOODMATRIX_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.environ.get("MOODMATRIX_SERVICE_PORT", "8080"))
+STREAM_FPS = 15
+JPEG_QUALITY = 70
+CLIENT_BUFFER = 128 * 1024
+
+# Mapped to ESP32 'emo*' functions (Used for AI Logic)
+EMOTION_MAP = {
+    "happy":    {"mode": "happy",    "color": "#FFD700", "label": "HAPPY ✨"},
+    "sad":      {"mode": "sad",      "color": "#0000FF", "label": "SAD 🌊"},
+    "angry":    {"mode": "angry",    "color": "#FF0000", "label": "ANGRY 🔥"},
+    "fear":     {"mode": "glitch",   "color": "#8000FF", "label": "FEAR 👻"}, 
+    "surprise": {"mode": "surprise", "color": "#FFFFFF", "label": "SURPRISE 😲"},
+    "disgust":  {"mode": "icon_alien","color": "#00FF00", "label": "DISGUST 👽"},
+    "neutral":  {"mode": "neutral",  "color": "#00CCFF", "label": "NEUTRAL 😐"}
+}
+
+# Dynamic FX Pools for AI Rotation
+EMOTION_FX_POOL = {
+    "happy":    ["bubbles", "flower", "stars", "aurora", "kaleidoscope"],
+    "sad":      ["liquid", "rain", "caustics", "snow"],
+    "angry":    ["magma", "fire", "shockwave", "lightning"],
+    "fear":     ["nebula", "glitch", "grid"],
+    "surprise": ["orbit", "shockwave", "pulse"],
+    "neutral":  ["nebula", "galaxy", "vortex", "liquid"],
+    "disgust":  ["icon_alien", "glitch"]
+}
+
+# Comfort mode: kicks in when "sad" fills more than this share of the memory.
+# The memory holds the last 600 face frames, or only the last N seconds if
+# COMFORT_WINDOW_S is set (e.g. 60).
+COMFORT_SAD_RATIO = 0.4
+COMFORT_WINDOW_S = None
+
+# Several people in view: which one the lamp follows (see tracks.AGGREGATORS)
+#   "dominant" - strongest feeling, "average" - whole room, "largest" - closest face
+AGGREGATION = "dominant"
+
+PERSONALITY_PROFILES = {
+    "Reactive": {"smooth": 3, "brightness": 120, "desc": "Fast response, high energy"},
+    "Chill":    {"smooth": 10, "brightness": 60,  "desc": "Slow transitions, relaxed"},
+    "Stable":   {"smooth": 6,  "brightness": 90,  "desc": "Balanced monitoring"}
+}
@@ -0,0 +1,55 @@
+import threading
+
+from lamp_client import RateLimiter
+from pipeline import LampDirector
+
+# ==== LAMP CONTROL ====
+# Everything between a FrameResult and the lamps, with no UI in it: the
+# LampDirector decision, the mode rate limit and the (non-blocking) sends.
+# The GUI worker and the headless runner call apply() on their own thread;
+# the GUI only reads the outcome (mode / mode_seq / speed) when it repaints.
+#
+# While frames are streamed over UDP (streaming=True) mode changes only go
+# to the host-side renderer, not over HTTP.
+
+class LampController:
+    def __init__(self, lamp=None, director=None, limiter=None):
+        self.lamp = lamp            # LampSender / LampFleet, or None (dry run)
+        self.director = director or LampDirector()
+        self.limiter = limiter or RateLimiter()
+        self.streaming = False
+        self._lock = threading.Lock()
+
+        # Outcome, read by the renderer / UI
+        self.mode = None
+        self.mode_seq = 0           # bumps on every mode that passed the limiter
+        self.speed = None
+
+        # Counters
+        self.settings_commands = 0
+
+    def apply(self, result):
+        decision = self.director.decide(result.dominant, result.sys_stats)
+        if decision.mode: self.set_mode(decision.mode)
+        if decision.settings: self.send_settings(decision.settings)
+        return decision
+
+    def set_mode(self, mode_name):
+        # Prevent spamming ESP32 (AI decisions and mode buttons share the limit)
+        with self._lock:
+            if not self.limiter.allow():
+                return False
+            self.mode = mode_name
+            self.mode_seq += 1
+        if self.lamp and not self.streaming:
+            self.lamp.send_mode(mode_name) # queued, latest mode wins
+        return True
+
+    def send_settings(self, settings):
+        with self._lock:
+            if "speed" in settings: self.speed = settings["speed"]
+            self.settings_commands += 1
+        if self.lamp: self.lamp.send_settings(settings) # one merged POST per tick
+
+    def reset(self):
+        self.director.reset()
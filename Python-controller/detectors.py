@@ -0,0 +1,148 @@
+import os
+
+import cv2
+import numpy as np
+
+from config import DETECTOR_MODELS, DETECTOR_WIDTH
+
+# ==== FACE DETECTOR BACKENDS ====
+# Every backend takes a BGR frame and returns face boxes [(x, y, w, h), ...]
+# in that frame's pixels. Each one shrinks the frame to its own input width
+# first (DETECTOR_WIDTH in config.py) and scales the boxes back, so a cheap
+# detector can look at a smaller image than an accurate one.
+#
+#   haar      - OpenCV Haar cascade (what DeepFace's 'opencv' backend uses)
+#   ssd       - OpenCV DNN, res10 300x300 SSD (Caffe files in DETECTOR_MODELS)
+#   yunet     - OpenCV FaceDetectorYN (ONNX file in DETECTOR_MODELS)
+#   mediapipe - MediaPipe Face Detection (optional import)
+#   deepface  - DeepFace.extract_faces(detector_backend='opencv'), the old path
+#
+# Pick one with DETECTOR in config.py or --detector; compare them with
+# bench_detectors.py.
+
+SSD_FILES = ("deploy.prototxt", "res10_300x300_ssd_iter_140000.caffemodel")
+YUNET_FILE = "face_detection_yunet_2023mar.onnx"
+
+def _model_path(name):
+    path = os.path.join(DETECTOR_MODELS, name)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"detector model not found: {path}")
+    return path
+
+class FaceDetector:
+    name = None
+
+    def __init__(self, width=None, conf=0.6):
+        self.width = width or DETECTOR_WIDTH.get(self.name, 320)
+        self.conf = conf
+
+    def detect(self, frame):
+        # Resize policy: shrink to self.width (never upscale), detect, map back
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.width / float(w))
+        small = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+        boxes = []
+        for x, y, bw, bh in self._detect(small):
+            x0, y0 = max(0, int(x / scale)), max(0, int(y / scale))
+            x1, y1 = min(w, int((x + bw) / scale)), min(h, int((y + bh) / scale))
+            if x1 > x0 and y1 > y0: boxes.append((x0, y0, x1 - x0, y1 - y0))
+        return boxes
+
+    def _detect(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class HaarDetector(FaceDetector):
+    name = "haar"
+
+    def __init__(self, width=None, conf=0.6, min_neighbors=10):
+        super().__init__(width, conf)
+        self.min_neighbors = min_neighbors
+        self.cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        if self.cascade.empty():
+            raise FileNotFoundError("haarcascade_frontalface_default.xml not found in cv2.data")
+
+    def _detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return [tuple(map(int, b)) for b in self.cascade.detectMultiScale(gray, 1.1, self.min_neighbors)]
+
+class SsdDetector(FaceDetector):
+    name = "ssd"
+
+    def __init__(self, width=None, conf=0.6):
+        super().__init__(width, conf)
+        self.net = cv2.dnn.readNetFromCaffe(*(_model_path(f) for f in SSD_FILES))
+
+    def _detect(self, frame):
+        h, w = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(frame, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        out = self.net.forward()[0, 0]  # rows: [_, _, conf, x0, y0, x1, y1] (relative)
+        out = out[out[:, 2] >= self.conf]
+        boxes = out[:, 3:7] * np.array([w, h, w, h])
+        return [(int(x0), int(y0), int(x1 - x0), int(y1 - y0)) for x0, y0, x1, y1 in boxes]
+
+class YuNetDetector(FaceDetector):
+    name = "yunet"
+
+    def __init__(self, width=None, conf=0.6):
+        super().__init__(width, conf)
+        self.net = cv2.FaceDetectorYN.create(_model_path(YUNET_FILE), "", (320, 320), conf)
+        self._size = None
+
+    def _detect(self, frame):
+        size = (frame.shape[1], frame.shape[0])
+        if size != self._size:
+            self.net.setInputSize(size)
+            self._size = size
+        _, faces = self.net.detect(frame)
+        if faces is None: return []
+        return [tuple(int(v) for v in f[:4]) for f in faces]
+
+class MediaPipeDetector(FaceDetector):
+    name = "mediapipe"
+
+    def __init__(self, width=None, conf=0.6):
+        super().__init__(width, conf)
+        import mediapipe as mp  # optional dependency
+        self.net = mp.solutions.face_detection.FaceDetection(model_selection=0, min_detection_confidence=conf)
+
+    def _detect(self, frame):
+        h, w = frame.shape[:2]
+        res = self.net.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        boxes = []
+        for d in res.detections or ():
+            b = d.location_data.relative_bounding_box
+            boxes.append((int(b.xmin * w), int(b.ymin * h), int(b.width * w), int(b.height * h)))
+        return boxes
+
+    def close(self):
+        self.net.close()
+
+class DeepFaceDetector(FaceDetector):
+    name = "deepface"
+
+    def __init__(self, width=None, conf=0.6):
+        super().__init__(width, conf)
+        from deepface import DeepFace
+        self.DeepFace = DeepFace
+
+    def _detect(self, frame):
+        objs = self.DeepFace.extract_faces(frame, detector_backend='opencv', enforce_detection=False, align=False)
+        # enforce_detection=False returns the whole frame when nothing is found
+        return [tuple(int(o['facial_area'][k]) for k in ("x", "y", "w", "h")) for o in objs
+                if o.get('confidence', 1) > 0]
+
+DETECTORS = {cls.name: cls for cls in (HaarDetector, SsdDetector, YuNetDetector, MediaPipeDetector, DeepFaceDetector)}
+assert set(DETECTORS) == set(DETECTOR_WIDTH)  # main.py's --detector choices, without importing this
+
+def make_detector(name, fallback="deepface", **kwargs):
+    # Missing model files / packages fall back to the old DeepFace path
+    try:
+        return DETECTORS[name](**kwargs)
+    except (KeyError, ImportError, OSError, AttributeError, cv2.error) as e:
+        if not fallback or fallback == name: raise
+        print(f"WARNING: detector '{name}' unavailable ({e!r}), using '{fallback}'")
+        return DETECTORS[fallback](**kwargs)
@@ -0,0 +1,70 @@
+import argparse
+import os
+
+from config import DETECTOR_MODELS
+from classifier import FACE_SIZE, EmotionClassifier
+from bench_classifier import load_crops
+
+# ==== EMOTION MODEL -> ONNX ====
+# Exports DeepFace's emotion CNN (the same weights the "deepface" backend
+# runs) to ONNX for classifier.OnnxEmotionClassifier, and optionally an int8
+# copy. Needs TensorFlow + tf2onnx + onnxruntime, only on the machine that
+# exports:
+#
+#   pip install tf2onnx
+#   python export_emotion_onnx.py                         # models/emotion.onnx
+#   python export_emotion_onnx.py --int8                  # + models/emotion_int8.onnx (dynamic)
+#   python export_emotion_onnx.py --int8 --calibrate path/to/face_crops   # static, calibrated
+#
+# Static quantisation (activation ranges measured on real face crops) keeps
+# the convolutions in int8 and is usually both faster and closer to the float
+# model than dynamic quantisation. Check the result with parity_emotion.py.
+
+def export_fp32(path, opset):
+    import tensorflow as tf
+    import tf2onnx
+
+    model = EmotionClassifier().model
+    spec = (tf.TensorSpec((None, FACE_SIZE, FACE_SIZE, 1), tf.float32, name="face"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=path)
+
+def quantize(src, dst, calibrate=None, count=200):
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    if not calibrate:
+        quantize_dynamic(src, dst, weight_type=QuantType.QInt8)
+        return
+
+    class CropReader(CalibrationDataReader):
+        def __init__(self, crops):
+            faces = EmotionClassifier.prepare(crops)
+            self._batches = iter([{"face": EmotionClassifier.to_input(faces[i:i + 1])} for i in range(len(faces))])
+
+        def get_next(self):
+            return next(self._batches, None)
+
+    crops = load_crops(calibrate, count)
+    if not crops: raise SystemExit(f"no face crops in {calibrate}")
+    quantize_static(src, dst, CropReader(crops), quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the emotion model to ONNX (optionally int8)")
+    parser.add_argument("--out", default=os.path.join(DETECTOR_MODELS, "emotion.onnx"))
+    parser.add_argument("--opset", type=int, default=13)
+    parser.add_argument("--int8", action="store_true", help="also write an int8 copy next to --out")
+    parser.add_argument("--calibrate", help="face crop directory for static int8 quantisation (dynamic if omitted)")
+    parser.add_argument("--count", type=int, default=200, help="calibration crops to use")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    export_fp32(args.out, args.opset)
+    print(f"wrote {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB)")
+
+    if args.int8:
+        dst = args.out.replace(".onnx", "_int8.onnx")
+        quantize(args.out, dst, args.calibrate, args.count)
+        print(f"wrote {dst} ({os.path.getsize(dst) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import collections
+
+import cv2
+import numpy as np
+
+from config import FACE_CACHE_SIZE, FACE_CACHE_TOLERANCE, FACE_CACHE_TTL
+
+# ==== FACE RESULT CACHE ====
+# Someone sitting still produces nearly identical face crops cycle after
+# cycle, and the emotion model returns the same probabilities for them.
+# Each tracked crop is reduced to a 64-bit difference hash (dHash: 9x8
+# grayscale, one bit per "is this pixel brighter than its left neighbour");
+# a crop whose hash is within `tolerance` bits of a cached one reuses that
+# entry's emotion dict instead of a forward pass.
+#
+# Bounded LRU, and entries expire `ttl` seconds after they were computed, so
+# a still face is still re-classified every few seconds.
+
+def dhash(crop):
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+class FaceCache:
+    def __init__(self, maxsize=FACE_CACHE_SIZE, tolerance=FACE_CACHE_TOLERANCE, ttl=FACE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()  # hash -> (created, emotions), oldest use first
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def get(self, h, now):
+        entries = self._entries
+        # Expired entries go first (LRU order is not age order; the cache is small, so scan)
+        for key in [k for k, (created, _) in entries.items() if now - created > self.ttl]:
+            del entries[key]
+
+        best, best_dist = None, self.tolerance + 1
+        for key in entries:
+            dist = (key ^ h).bit_count()
+            if dist < best_dist:
+                best, best_dist = key, dist
+                if dist == 0: break
+        if best is None:
+            self.misses += 1
+            return None
+        entries.move_to_end(best)
+        self.hits += 1
+        return entries[best][1]
+
+    def put(self, h, emotions, now):
+        if not self.enabled: return
+        self._entries[h] = (now, emotions)
+        self._entries.move_to_end(h)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        n = self.hits + self.misses
+        return self.hits / n if n else 0.0
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,44 @@
+import threading
+
+import numpy as np
+
+# ==== TRIPLE FRAME BUFFER ====
+# Preallocated frame memory shared by the capture worker and the GUI.
+#   back  - the worker is writing into it
+#   ready - newest finished frame, waiting for the GUI
+#   front - the GUI is displaying it; the worker never touches this one
+# publish() and acquire() only swap indices, so no frame is copied or
+# allocated per hand-off, and frames the GUI never shows are just overwritten.
+
+class FrameBuffer:
+    def __init__(self):
+        self._bufs = [None, None, None]
+        self._back, self._ready, self._front = 0, 1, 2
+        self._fresh = False
+        self._lock = threading.Lock()
+        self.published = 0
+        self.displayed = 0
+
+    def back(self, shape, dtype=np.uint8):
+        # Worker side: the slot to write the next frame into
+        buf = self._bufs[self._back]
+        if buf is None or buf.shape != shape:
+            buf = self._bufs[self._back] = np.empty(shape, dtype=dtype)
+        return buf
+
+    def publish(self):
+        with self._lock:
+            self._back, self._ready = self._ready, self._back
+            self._fresh = True
+            self.published += 1
+
+    def acquire(self):
+        # GUI side: newest frame, or None if nothing new since the last call.
+        # The returned array stays valid until the next acquire().
+        with self._lock:
+            if not self._fresh:
+                return None
+            self._front, self._ready = self._ready, self._front
+            self._fresh = False
+            self.displayed += 1
+            return self._bufs[self._front]
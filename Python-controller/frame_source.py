@@ -0,0 +1,136 @@
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# ==== FRAME SOURCES ====
+# Everything the pipeline can read frames from. All sources share the
+# cv2.VideoCapture-style read() -> (ok, frame) call; `eof` turns True once a
+# finite source (file, folder, synthetic run) is exhausted.
+#
+#   open_source("0")               -> webcam 0
+#   open_source("clip.mp4")        -> video file
+#   open_source("frames/")         -> directory of .jpg/.png frames
+#   open_source("synthetic:300")   -> 300 generated frames (no camera needed)
+
+IMAGE_EXTS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+
+class CameraSource:
+    def __init__(self, index=0, width=480, height=360):
+        # Use DSHOW on Windows for speed
+        self.cap = cv2.VideoCapture(index, cv2.CAP_DSHOW) if sys.platform == 'win32' else cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.eof = False
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+class VideoFileSource:
+    def __init__(self, path, loop=False, realtime=False):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise IOError(f"cannot open video: {path}")
+        self.loop = loop
+        self.realtime = realtime  # pace playback to the file's FPS
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._next_t = time.perf_counter()
+        self.eof = False
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            self.eof = True
+            return False, None
+        if self.realtime:
+            self._next_t += 1.0 / self.fps
+            delay = self._next_t - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+            else: self._next_t = time.perf_counter()
+        return True, frame
+
+    def release(self):
+        self.cap.release()
+
+class ImageSequenceSource:
+    def __init__(self, directory, loop=False, fps=None):
+        self.files = sorted(f for ext in IMAGE_EXTS for f in glob.glob(os.path.join(directory, ext)))
+        if not self.files:
+            raise IOError(f"no frames found in: {directory}")
+        self.loop = loop
+        self.fps = fps  # None = as fast as possible
+        self.index = 0
+        self.eof = False
+
+    def read(self):
+        if self.index >= len(self.files):
+            if not self.loop:
+                self.eof = True
+                return False, None
+            self.index = 0
+        frame = cv2.imread(self.files[self.index])
+        self.index += 1
+        if self.fps: time.sleep(1.0 / self.fps)
+        return frame is not None, frame
+
+    def release(self):
+        pass
+
+class SyntheticSource:
+    # A face-like blob drifting over a noisy background. Exercises every stage
+    # without a camera; detection may or may not fire on it.
+    def __init__(self, frames=None, width=480, height=360, fps=None, seed=0):
+        self.frames = frames
+        self.width, self.height = width, height
+        self.fps = fps
+        self.index = 0
+        self.eof = False
+        self.face_box = None  # ground truth (x, y, w, h) of the last frame, for bench_detectors.py
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+
+    def read(self):
+        if self.frames is not None and self.index >= self.frames:
+            self.eof = True
+            return False, None
+        t = self.index / 30.0
+        self.index += 1
+
+        frame = self._background.copy()
+        cx = int(self.width * (0.5 + 0.25 * np.sin(t * 0.7)))
+        cy = int(self.height * (0.5 + 0.15 * np.cos(t * 0.5)))
+        r = self.height // 6
+        self.face_box = (cx - r, cy - int(r * 1.25), 2 * r, int(r * 2.5))
+        cv2.ellipse(frame, (cx, cy), (r, int(r * 1.25)), 0, 0, 360, (150, 180, 220), -1)
+        cv2.circle(frame, (cx - r // 3, cy - r // 4), r // 8, (30, 30, 30), -1)
+        cv2.circle(frame, (cx + r // 3, cy - r // 4), r // 8, (30, 30, 30), -1)
+        mouth = int(r * 0.3 * (1 + np.sin(t * 2)))  # "smile" that comes and goes
+        cv2.ellipse(frame, (cx, cy + r // 2), (r // 2, max(1, mouth // 2)), 0, 0, 180, (40, 40, 120), 3)
+
+        if self.fps: time.sleep(1.0 / self.fps)
+        return True, frame
+
+    def release(self):
+        pass
+
+def open_source(spec, loop=False, realtime=False, width=480, height=360):
+    spec = str(spec)
+    if spec.isdigit():
+        return CameraSource(int(spec), width, height)
+    if spec.startswith("synthetic"):
+        _, _, count = spec.partition(":")
+        return SyntheticSource(int(count) if count else None, width, height,
+                               fps=30 if realtime else None)
+    if os.path.isdir(spec):
+        return ImageSequenceSource(spec, loop=loop, fps=30 if realtime else None)
+    return VideoFileSource(spec, loop=loop, realtime=realtime)
@@ -0,0 +1,184 @@
+import itertools
+import random
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+# ==== REALTIME FRAME STREAM (UDP) ====
+# Pushes whole LED frames to the lamp instead of one /api/pixel call per LED.
+# One datagram = one frame:
+#
+#   offset  size  field
+#   0       2     magic  b"MM"
+#   2       1     version (1)
+#   3       1     session id, 1-255, new for every streamer
+#   4       4     sequence number, uint32 little endian (wraps), from 0 per session
+#   8       1     width
+#   9       1     height
+#   10      W*H*3 RGB bytes, row-major, (0,0) = top-left
+#
+# An 8x8 frame is 202 bytes. The firmware applies its own XY() mapping, so
+# the host never needs to know about serpentine wiring. The sender only
+# keeps the newest frame: if the producer outruns the target FPS or the
+# socket pushes back, older frames are dropped, never queued.
+#
+# Every streamer starts again at seq 0, so the receiver starts the sequence
+# over on a new session id, after an /api/mode call, or after a pause of
+# RESYNC_S; otherwise a restarted stream would be dropped as "late" until it
+# caught up with the old one.
+
+STREAM_PORT = 4210
+MAGIC = b"MM"
+VERSION = 1
+HEADER = struct.Struct("<2sBBIBB")
+RESYNC_S = 1.0  # STREAM_RESYNC_MS in the firmware
+
+# Session ids: random across restarts, never the same twice in a row within one process
+_sessions = itertools.count(random.randrange(255))
+
+def pack_frame(seq, frame, session=0):
+    h, w = frame.shape[:2]
+    return HEADER.pack(MAGIC, VERSION, session, seq & 0xFFFFFFFF, w, h) + np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+
+def unpack_frame(datagram):
+    # -> (seq, frame, session) or None
+    if len(datagram) < HEADER.size:
+        return None
+    magic, version, session, seq, w, h = HEADER.unpack_from(datagram)
+    if magic != MAGIC or version != VERSION or len(datagram) != HEADER.size + w * h * 3:
+        return None
+    return seq, np.frombuffer(datagram, dtype=np.uint8, offset=HEADER.size).reshape(h, w, 3), session
+
+class FrameStreamer(threading.Thread):
+    def __init__(self, host, port=STREAM_PORT, fps=40):
+        super().__init__(daemon=True)
+        self.addr = (host, port)
+        self.fps = fps
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+
+        self._latest = None
+        self._cond = threading.Condition()
+        self._running = True
+        self.seq = 0
+        self.session = next(_sessions) % 255 + 1
+
+        # Counters
+        self.sent = 0
+        self.dropped = 0   # replaced before it could be sent
+        self.blocked = 0   # socket buffer full (back-pressure)
+
+    def push(self, frame):
+        # Producer side, never blocks: newest frame wins
+        with self._cond:
+            if self._latest is not None:
+                self.dropped += 1
+            self._latest = frame
+            self._cond.notify()
+
+    def run(self):
+        period = 1.0 / self.fps
+        next_t = time.perf_counter()
+        while True:
+            with self._cond:
+                while self._running and self._latest is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                frame, self._latest = self._latest, None
+
+            try:
+                self.sock.sendto(pack_frame(self.seq, frame, self.session), self.addr)
+                self.seq += 1
+                self.sent += 1
+            except (BlockingIOError, InterruptedError):
+                self.blocked += 1
+            except OSError:
+                self.blocked += 1  # lamp unreachable; keep the frame rate going
+
+            # Pace to the target FPS
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+            else: next_t = time.perf_counter()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self.join(timeout=1.0)
+        self.sock.close()
+
+# ==== LOCAL STAND-IN FOR THE LAMP ====
+# Binds a UDP port and decodes frames exactly like the firmware does
+# (newest sequence wins, late/duplicate packets ignored, new session / mode
+# call / pause starts over). For benchmarks and for trying the stream
+# without hardware.
+
+class UdpFrameReceiver(threading.Thread):
+    def __init__(self, host="127.0.0.1", port=0, resync=RESYNC_S):
+        super().__init__(daemon=True)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self._running = True
+        self.resync = resync
+
+        self.frame = None
+        self.last_seq = None  # None: the next frame starts a new stream
+        self.session = None
+        self.received = 0
+        self.late = 0      # older than what is already shown
+        self.lost = 0      # sequence gaps
+        self.invalid = 0
+        self.restarts = 0  # streams started over
+        self.first_t = None
+        self.last_t = None
+
+    def run(self):
+        while self._running:
+            try:
+                data, _ = self.sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            decoded = unpack_frame(data)
+            if decoded is None:
+                self.invalid += 1
+                continue
+            seq, frame, session = decoded
+            now = time.perf_counter()
+            if self.last_seq is None or session != self.session or now - self.last_t > self.resync:
+                self.restarts += 1
+            else:
+                diff = (seq - self.last_seq) & 0xFFFFFFFF
+                if diff == 0 or diff > 0x7FFFFFFF:
+                    self.late += 1
+                    continue
+                self.lost += diff - 1
+            self.last_seq = seq
+            self.session = session
+            self.frame = frame
+            self.received += 1
+            self.last_t = now
+            if self.first_t is None: self.first_t = self.last_t
+
+    def reset(self):
+        # /api/mode: the host left the stream, its next one starts at seq 0
+        self.last_seq = None
+
+    @property
+    def fps(self):
+        if self.received < 2:
+            return 0.0
+        return (self.received - 1) / (self.last_t - self.first_t)
+
+    def stop(self):
+        self._running = False
+        self.join(timeout=1.0)
+        self.sock.close()
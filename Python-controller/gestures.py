@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# ==== HAND TRACKING STAGE ====
+# MediaPipe Hands on its own thread. The capture loop pushes its downscaled
+# frame (the same one the face path uses) whenever the stage is due, at most
+# `rate` times a second, independent of the camera rate; the newest frame
+# wins, so a slow hands pass never blocks capture or face inference. Each
+# pass publishes a HandSample: the frame timestamp and the (21, 3) landmark
+# array in normalized image coordinates (or None: no hand).
+#
+# MediaPipe is imported and the model warmed up on the stage's thread, so
+# importing this module stays cheap.
+
+GESTURE_HOLD = 0.3  # seconds a hand sample stays "live" after its frame
+
+class HandSample:
+    __slots__ = ("seq", "t", "landmarks", "latency_ms")
+
+    def __init__(self, seq, t, landmarks, latency_ms):
+        self.seq = seq
+        self.t = t                    # timestamp of the frame it came from
+        self.landmarks = landmarks    # (21, 3) float32 array or None
+        self.latency_ms = latency_ms  # frame push -> landmarks published
+
+class HandStage(threading.Thread):
+    def __init__(self, rate=15.0, max_hands=1, min_conf=0.7):
+        super().__init__(name="hands", daemon=True)
+        self.rate = rate
+        self.max_hands = max_hands
+        self.min_conf = min_conf
+        self.state = "idle"  # idle -> loading -> ready / unavailable
+        self.connections = ()
+
+        self._frame = None   # (frame, t, pushed_at), newest wins
+        self._due = 0.0
+        self._latest = None
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._running = True
+
+        # Counters
+        self.processed = 0
+        self.replaced = 0  # frames overwritten before the stage got to them
+
+    # ==== CAPTURE SIDE (never blocks) ====
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def due(self, now):
+        return self.ready and now >= self._due
+
+    def push(self, frame, t):
+        # BGR frame; the RGB conversion happens on the stage thread
+        self._due = t + 1.0 / max(0.1, self.rate)
+        with self._cond:
+            if self._frame is not None: self.replaced += 1
+            self._frame = (frame, t, time.perf_counter())
+            self._cond.notify()
+
+    @property
+    def latest(self):
+        return self._latest
+
+    # ==== STAGE THREAD ====
+    def run(self):
+        self.state = "loading"
+        try:
+            import mediapipe as mp
+        except ImportError:
+            self.state = "unavailable"
+            print("WARNING: 'mediapipe' not found. Gesture control disabled.")
+            return
+        hands = mp.solutions.hands.Hands(max_num_hands=self.max_hands, min_detection_confidence=self.min_conf)
+        hands.process(np.zeros((64, 64, 3), dtype=np.uint8))  # dummy pass builds the graph
+        self.connections = tuple(mp.solutions.hands.HAND_CONNECTIONS)
+        self.state = "ready"
+
+        while True:
+            with self._cond:
+                while self._running and self._frame is None:
+                    self._cond.wait()
+                if not self._running: break
+                (frame, t, pushed), self._frame = self._frame, None
+
+            res = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            landmarks = None
+            if res.multi_hand_landmarks:
+                landmarks = np.array([(p.x, p.y, p.z) for p in res.multi_hand_landmarks[0].landmark], dtype=np.float32)
+            self._seq += 1
+            self._latest = HandSample(self._seq, t, landmarks, (time.perf_counter() - pushed) * 1000)
+            self.processed += 1
+        hands.close()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self.is_alive(): self.join(timeout=2.0)
+
+# ==== ONE-EURO FILTER ====
+# Casiez et al. 2012: a low-pass filter whose cutoff rises with speed, so a
+# still hand is steady (low cutoff, no jitter) and a fast one is followed
+# without lag (high cutoff). Works on floats and NumPy arrays; `dx` holds the
+# smoothed derivative (units per second).
+
+def _alpha(dt, cutoff):
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    def __init__(self, min_cutoff=1.0, beta=0.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def __call__(self, x, t):
+        if self._t is None:
+            self._x, self._t = x, t
+            self.dx = x * 0.0
+            return x
+        dt = max(t - self._t, 1e-6)
+        a_d = _alpha(dt, self.d_cutoff)
+        self.dx = a_d * (x - self._x) / dt + (1 - a_d) * self.dx
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx)
+        a = _alpha(dt, cutoff)
+        self._x = a * x + (1 - a) * self._x
+        self._t = t
+        return self._x
+
+    def reset(self):
+        self._x = None
+        self._t = None
+        self.dx = 0.0
+
+# ==== GESTURE MAPPING ====
+# Smoothed landmarks -> lamp controls:
+#   wrist height -> brightness, wrist x -> FX index, hand openness -> energy
+#   boost, wrist speed -> animation speed, fast horizontal swipe -> energy shift.
+
+SWIPE_SPEED = 1.0     # frame widths per second
+SWIPE_COOLDOWN = 0.4  # seconds between swipes
+
+class GestureMapper:
+    def __init__(self):
+        self.pos = OneEuroFilter(min_cutoff=1.0, beta=0.5)
+        self.span = OneEuroFilter(min_cutoff=1.0, beta=0.3)
+        self.brightness = 100
+        self.speed = 20
+        self.fx_index = 0
+        self._prev = None  # (t, raw wrist x)
+        self._last_swipe = 0.0
+
+    def update(self, sample):
+        # Returns the energy delta this sample asks for
+        lm, t = sample.landmarks, sample.t
+        wrist = lm[0, :2]
+        x, y = self.pos(wrist, t)
+
+        # A. Height -> Brightness (Inverted: Top=1.0 Brightness, Bottom=0.2)
+        self.brightness = max(40, min(255, int(np.interp(y, [0.1, 0.9], [255, 40]))))
+
+        # B. Horizontal -> FX Index
+        self.fx_index = int(np.interp(x, [0.1, 0.9], [0, 4]))
+
+        # C. Hand Openness -> Intensity Boost (per second, so the rate does not matter)
+        span = self.span(abs(float(lm[4, 0] - lm[20, 0])), t)
+        dt = min(0.2, t - self._prev[0]) if self._prev else 0.0
+        delta = np.interp(span, [0.05, 0.25], [0, 50]) * dt
+
+        # D. Velocity -> Animation Speed
+        velocity = float(np.linalg.norm(self.pos.dx))
+        self.speed = int(np.interp(velocity, [0.01, 0.5], [80, 5]))
+
+        # E. Swipes -> Emotion Shift (raw velocity: smoothing would eat the flick)
+        if self._prev and t > self._prev[0] and t - self._last_swipe > SWIPE_COOLDOWN:
+            vx = (float(wrist[0]) - self._prev[1]) / (t - self._prev[0])
+            if abs(vx) > SWIPE_SPEED:
+                delta += 20 if vx > 0 else -20
+                self._last_swipe = t
+        self._prev = (t, float(wrist[0]))
+        return delta
+
+    def reset(self):
+        self.pos.reset()
+        self.span.reset()
+        self._prev = None
+
+def draw_hand(frame, landmarks, connections, color=(0, 255, 255)):
+    h, w = frame.shape[:2]
+    pts = [(int(x * w), int(y * h)) for x, y, _ in landmarks]
+    for a, b in connections:
+        cv2.line(frame, pts[a], pts[b], color, 1)
+    for p in pts:
+        cv2.circle(frame, p, 2, (255, 255, 255), -1)
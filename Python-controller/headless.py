@@ -0,0 +1,141 @@
+import argparse
+import json
+import time
+
+from config import BASE_URL, RECORD_DIR
+from frame_source import open_source
+from control import LampController
+from lamp_client import LampSender
+from metrics import StageProfiler
+from pipeline import EmotionPipeline
+from tracks import AGGREGATORS
+from detectors import DETECTORS
+from classifier import BACKENDS
+from recorder import SessionRecorder
+
+# ==== HEADLESS RUNNER ====
+# Plays a frame source through the full pipeline (gestures, detection,
+# tracking, energy engine) and the lamp director, with no Qt window.
+# Reports throughput, per-stage latency and inference count so regressions
+# can be measured on machines without a camera or display.
+#
+#   python headless.py --source clip.mp4
+#   python headless.py --source synthetic:600 --json
+#   python headless.py --source 0 --max-frames 300 --lamp http://192.168.4.1
+
+def run(source_spec, max_frames=None, lamp_url=None, realtime=False, gestures=False, sync=False, aggregation=None, detector=None, gesture_rate=None, emotion_backend=None, record_dir=None):
+    source = open_source(source_spec, realtime=realtime)
+    pipeline = EmotionPipeline()
+    pipeline.gesture_enabled = gestures
+    pipeline.sync_inference = sync
+    if aggregation: pipeline.aggregation = aggregation
+    if detector: pipeline.detector = detector
+    if emotion_backend: pipeline.emotion_backend = emotion_backend
+    if gesture_rate: pipeline.hands.rate = gesture_rate
+    pipeline.profiler = prof = StageProfiler(size=16384)
+    lamp = None
+    if lamp_url:
+        lamp = LampSender(lamp_url)
+        lamp.start()
+    control = LampController(lamp) # same decisions + spam guard as the GUI worker
+    recorder = SessionRecorder(record_dir) if record_dir else None
+
+    frames = face_frames = max_faces = 0
+
+    pipeline.start()
+    start = time.perf_counter()
+    try:
+        while max_frames is None or frames < max_frames:
+            t = time.perf_counter()
+            ret, frame = source.read()
+            t = prof.lap("capture", t)
+            if not ret:
+                if source.eof: break
+                continue
+
+            result = pipeline.process(frame)
+            t = prof.lap("frame", t)
+            frames += 1
+
+            if result is None:
+                continue
+            face_frames += 1
+            max_faces = max(max_faces, len(result.people))
+            control.apply(result)
+            t = prof.lap("decide", t)
+            if recorder:
+                recorder.append(result, control.mode)
+                prof.lap("record", t)
+    finally:
+        elapsed = time.perf_counter() - start
+        ai_state = pipeline.ai_state
+        pipeline.close()
+        source.release()
+        if lamp: lamp.stop()
+        if recorder: recorder.close()
+
+    return {
+        "source": str(source_spec),
+        "detector": pipeline.detector,
+        "emotion_backend": pipeline.emotion_backend,
+        "frames": frames,
+        "face_frames": face_frames,
+        "max_faces": max_faces,
+        "elapsed_s": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "ai_state": ai_state,
+        "model_load_ms": pipeline.inference.load_ms,
+        "inference_count": pipeline.inference_count,
+        "inference_submitted": pipeline.inference.submitted,
+        "inference_crashes": pipeline.inference.crashes,
+        "inference_errors": pipeline.inference.errors,
+        "inference_ms_last": pipeline.inference_time,
+        "cache_hits": pipeline.face_cache.hits,
+        "cache_misses": pipeline.face_cache.misses,
+        "mode_commands": control.limiter.passed,
+        "settings_commands": control.settings_commands,
+        "rate_limited": control.limiter.limited,
+        "lamp_errors": lamp.errors if lamp else 0,
+        "recorded": recorder.records if recorder else 0,
+        "stages_ms": prof.snapshot(),
+    }
+
+def print_report(report):
+    print(f"source: {report['source']} | detector: {report['detector']} | emotion: {report['emotion_backend']}")
+    print(f"frames: {report['frames']} ({report['face_frames']} with face, up to {report['max_faces']} at once) in {report['elapsed_s']:.2f}s "
+          f"-> {report['fps']:.1f} fps")
+    print(f"inference: {report['inference_count']} results / {report['inference_submitted']} submitted | "
+          f"models {report['ai_state']} (load {report['model_load_ms']:.0f}ms)")
+    print(f"face cache: {report['cache_hits']} hits / {report['cache_misses']} misses")
+    print(f"lamp: {report['mode_commands']} mode, {report['settings_commands']} settings, "
+          f"{report['rate_limited']} rate-limited, {report['lamp_errors']} errors")
+    if report["inference_errors"]: print(f"inference errors: {report['inference_errors']} frames")
+    if report["inference_crashes"]: print(f"inference processes restarted: {report['inference_crashes']}")
+    if report["recorded"]: print(f"recorded: {report['recorded']} records")
+    for name, p in report["stages_ms"].items():
+        print(f"  {name:<9} p50 {p['p50']:7.2f}ms  p95 {p['p95']:7.2f}ms  p99 {p['p99']:7.2f}ms  n={p['count']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the MoodMatrix pipeline without a GUI")
+    parser.add_argument("--source", default="synthetic:300", help="camera index, video file, frame directory or synthetic[:N]")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--lamp", nargs="?", const=BASE_URL, default=None, help="also send commands to a lamp (default URL from config)")
+    parser.add_argument("--realtime", action="store_true", help="pace file sources to their native FPS")
+    parser.add_argument("--gestures", action="store_true", help="enable MediaPipe gesture stage")
+    parser.add_argument("--gesture-rate", type=float, default=None, help="hand tracking passes per second")
+    parser.add_argument("--sync", action="store_true", help="block on each inference (deterministic, not realtime)")
+    parser.add_argument("--aggregate", choices=sorted(AGGREGATORS), default=None, help="which face drives the lamp")
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default=None, help="face detector backend (default from config)")
+    parser.add_argument("--emotion-backend", choices=sorted(BACKENDS), default=None, help="emotion model backend (default from config)")
+    parser.add_argument("--record", nargs="?", const=RECORD_DIR, default=None, metavar="DIR", help="record the session (recorder.py)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(args.source, args.max_frames, args.lamp, args.realtime, args.gestures, args.sync, args.aggregate, args.detector, args.gesture_rate, args.emotion_backend, args.record)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import multiprocessing as mp
+import time
+from multiprocessing import connection, shared_memory
+
+import numpy as np
+
+from config import DETECTOR, EMOTION_BACKEND
+
+# ==== INFERENCE PROCESS POOL ====
+# DeepFace/TensorFlow runs in separate processes so the capture loop (and the
+# Qt signal thread) keeps going at camera rate. Each pool process owns one
+# shared-memory frame slot and a result pipe: the capture thread copies the
+# latest resized frame into an idle slot and carries on. If every process is busy the frame is
+# simply dropped, and results that arrive after a newer one are discarded.
+# A process that dies outside Python (OOM kill, segfault) is noticed on the
+# next poll: its frame is dropped and a new process takes the slot, up to
+# MAX_RESPAWNS times. A model error on a frame (bad input, TF out of memory)
+# comes back as an error, not as "no faces": it is counted, logged at most
+# every ERROR_LOG_S, and FAILING_AFTER of them in a row turn the state to
+# "failing".
+#
+# When the trackers already hold the faces, the caller passes their boxes
+# with the frame and they go straight to the emotion model (no detection).
+# Detection uses the configured detectors.py backend; classification is batched through
+# the configured classifier.py backend, one batch for all faces in the frame.
+
+MAX_FRAME_SHAPE = (720, 1280, 3)
+
+READY, FAILED = -1, -2  # control messages in the seq field of the result pipe
+MAX_RESPAWNS = 3        # per slot; a process that keeps dying is given up
+FAILING_AFTER = 3       # model errors in a row before the state says so
+ERROR_LOG_S = 10.0
+
+def _inference_loop(worker_id, shm_name, shape, task_q, results, detector_name, backend_name):
+    # heavy imports only happen in the pool; the models are built and warmed
+    # with a dummy pass here, then the parent is told the slot is ready
+    t0 = time.perf_counter()
+    try:
+        from classifier import make_classifier, emotion_dicts
+        from detectors import make_detector
+
+        detector = make_detector(detector_name)
+        detector.detect(np.zeros((240, 320, 3), dtype=np.uint8))
+        classifier = make_classifier(backend_name)  # built and warmed up
+    except Exception as e:
+        results.send((worker_id, FAILED, repr(e), 0.0, None))
+        return
+    results.send((worker_id, READY, None, (time.perf_counter() - t0) * 1000, None))
+
+    shm = shared_memory.SharedMemory(name=shm_name)  # segment is owned by the parent
+    slot = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+        seq, h, w, boxes = task
+        frame = slot[:h, :w]
+
+        faces, error = [], None
+        t0 = time.perf_counter()
+        try:
+            if boxes is None: boxes = detector.detect(frame)
+            boxes = [b for b in boxes if b[2] > 0 and b[3] > 0]
+            if boxes:
+                # Every face in the frame goes through the model in one batch
+                crops = [frame[y:y + bh, x:x + bw] for x, y, bw, bh in boxes]
+                probs = classifier.predict(classifier.prepare(crops))
+                for (x, y, bw, bh), emotion in zip(boxes, emotion_dicts(probs)):
+                    faces.append({"emotion": emotion, "region": {"x": x, "y": y, "w": bw, "h": bh}})
+        except Exception as e:
+            faces, error = [], repr(e)
+        inference_ms = (time.perf_counter() - t0) * 1000
+        results.send((worker_id, seq, faces, inference_ms, error))
+
+    detector.close()
+    shm.close()
+
+def roi_box(shape, box, margin=0.2):
+    # Face box (x, y, w, h) grown by `margin` on each side, clipped to the frame
+    x, y, w, h = box
+    mx, my = int(w * margin), int(h * margin)
+    H, W = shape[:2]
+    x0, y0 = max(0, x - mx), max(0, y - my)
+    x1, y1 = min(W, x + w + mx), min(H, y + h + my)
+    if x1 - x0 < 16 or y1 - y0 < 16:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def crop_roi(frame, box, margin=0.2):
+    r = roi_box(frame.shape, box, margin)
+    if r is None:
+        return None
+    x, y, w, h = r
+    return frame[y:y + h, x:x + w]
+
+class InferenceResult:
+    __slots__ = ("seq", "faces", "inference_ms", "meta")
+
+    def __init__(self, seq, faces, inference_ms, meta):
+        self.seq = seq
+        self.faces = faces
+        self.inference_ms = inference_ms
+        self.meta = meta
+
+class InferenceStage:
+    def __init__(self, workers=1, max_shape=MAX_FRAME_SHAPE, detector=DETECTOR, emotion_backend=EMOTION_BACKEND):
+        self.max_shape = max_shape
+        self.detector = detector
+        self.emotion_backend = emotion_backend
+        self.n_workers = max(1, workers)
+        self._ctx = mp.get_context("spawn")
+        self._slots = []
+        self._seq = 0
+        self._last_delivered = -1
+        self._meta = {}  # seq -> caller data, kept on this side of the pipe
+        self.load_ms = 0.0  # model load + warm-up time of the first ready process
+        self.error = None
+
+        # Counters
+        self.submitted = 0
+        self.dropped = 0
+        self.stale = 0
+        self.crashes = 0
+        self.errors = 0    # frames the models failed on
+        self._failing = 0  # ... in a row
+        self._error_logged = 0.0
+
+    def start(self):
+        nbytes = int(np.prod(self.max_shape))
+        for wid in range(self.n_workers):
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._slots.append({"shm": shm, "respawns": 0, "failed": False,
+                                "buf": np.ndarray(self.max_shape, dtype=np.uint8, buffer=shm.buf)})
+            self._spawn(wid)
+
+    def _spawn(self, wid):
+        slot = self._slots[wid]
+        # Fresh queue and pipe per process: one killed mid-read or mid-write can
+        # leave the locks of a shared multiprocessing.Queue held forever
+        task_q = self._ctx.Queue(maxsize=1)
+        results, child_end = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_inference_loop,
+            args=(wid, slot["shm"].name, self.max_shape, task_q, child_end, self.detector, self.emotion_backend),
+            daemon=True,
+        )
+        proc.start()
+        child_end.close()
+        # A slot counts as busy until its process reports its models are warm
+        slot.update(proc=proc, task_q=task_q, results=results, busy=True, ready=False, task=None)
+
+    def _reap(self):
+        # Slots whose process is gone without a word (a Python error is
+        # reported through the result pipe instead); True if any died
+        died = False
+        for wid, slot in enumerate(self._slots):
+            if slot["failed"] or slot["proc"].is_alive(): continue
+            died = True
+            self.crashes += 1
+            self.error = f"inference process {wid} died (exit code {slot['proc'].exitcode})"
+            self._meta.pop(slot["task"], None)
+            slot["task_q"].cancel_join_thread()
+            slot["task_q"].close()
+            slot["results"].close()
+            if slot["respawns"] < MAX_RESPAWNS:
+                slot["respawns"] += 1
+                self._spawn(wid)
+            else:
+                slot.update(ready=False, task=None, failed=True)
+        return died
+
+    @property
+    def idle(self):
+        return any(not s["busy"] for s in self._slots)
+
+    @property
+    def state(self):
+        if any(s["ready"] for s in self._slots): return "failing" if self._failing >= FAILING_AFTER else "ready"
+        if self.error and all(not s["proc"].is_alive() for s in self._slots): return "error"
+        return "restarting" if self.crashes else "loading"
+
+    def _messages(self, timeout=0.0):
+        # Everything the live processes have sent, waiting up to `timeout` for the first
+        conns = [s["results"] for s in self._slots if not s["failed"]]
+        out = []
+        for conn in connection.wait(conns, timeout) if conns else ():
+            try:
+                while conn.poll(): out.append(conn.recv())
+            except (EOFError, OSError): pass  # process gone: _reap() takes the slot over
+        return out
+
+    def _control(self, wid, seq, payload, ms, _error=None):
+        slot = self._slots[wid]
+        if seq == READY:
+            slot["ready"], slot["busy"] = True, False
+            if not self.load_ms: self.load_ms = ms
+        else:
+            slot["failed"] = True  # models did not load: respawning would fail the same way
+            self.error = payload
+
+    def _model_error(self, error):
+        self.errors += 1
+        self._failing += 1
+        self.error = error
+        now = time.monotonic()
+        if now - self._error_logged >= ERROR_LOG_S:
+            self._error_logged = now
+            print(f"WARNING: emotion inference failed ({error}), {self.errors} frames so far")
+
+    def wait_ready(self, timeout=120.0):
+        # Blocks until one process is warm (offline / synchronous runs)
+        end = time.monotonic() + timeout
+        while self.state in ("loading", "restarting") and time.monotonic() < end:
+            for msg in self._messages(0.5):
+                if msg[1] < 0: self._control(*msg)
+            self._reap()
+        return self.state == "ready"
+
+    def fits(self, frame):
+        return frame.shape[0] <= self.max_shape[0] and frame.shape[1] <= self.max_shape[1]
+
+    def submit(self, frame, meta=None, boxes=None):
+        # Never blocks: returns False (frame dropped) when the pool is saturated.
+        # boxes: [(x, y, w, h), ...] to classify as-is instead of detecting
+        slot = next((s for s in self._slots if not s["busy"]), None)
+        if slot is None or not self.fits(frame):
+            self.dropped += 1
+            return False
+
+        h, w = frame.shape[:2]
+        slot["buf"][:h, :w] = frame
+        slot["busy"] = True
+        seq = slot["task"] = self._seq
+        self._seq += 1
+        self._meta[seq] = meta
+        slot["task_q"].put_nowait((seq, h, w, boxes))
+        self.submitted += 1
+        return True
+
+    def poll(self, timeout=0.0):
+        # Drain finished jobs; return only the newest result (or None).
+        # timeout > 0 blocks for the first result (offline / synchronous runs).
+        newest = None
+        end = time.monotonic() + timeout
+        while True:
+            # Short waits: a process that died holding the job must not block the caller
+            wait = max(0.0, min(0.5, end - time.monotonic())) if timeout > 0 and newest is None else 0.0
+            for wid, seq, faces, inference_ms, error in self._messages(wait):
+                if seq < 0:
+                    self._control(wid, seq, faces, inference_ms)
+                    timeout = 0.0  # a process came up: let the caller submit
+                    continue
+                slot = self._slots[wid]
+                slot["busy"], slot["task"] = False, None
+                meta = self._meta.pop(seq, None)
+                if error is not None:
+                    # Not delivered: an empty result would read as "nobody in view"
+                    self._model_error(error)
+                    timeout = 0.0  # the job is over: a blocking caller stops waiting
+                    continue
+                self._failing = 0
+                if seq <= self._last_delivered or (newest is not None and seq < newest.seq):
+                    self.stale += 1
+                    continue
+                if newest is not None:
+                    self.stale += 1
+                newest = InferenceResult(seq, faces, inference_ms, meta)
+            if self._reap() or newest is not None or timeout <= 0 or time.monotonic() >= end: break
+
+        if newest is not None:
+            self._last_delivered = newest.seq
+        return newest
+
+    def stop(self):
+        for slot in self._slots:
+            try: slot["task_q"].put(None, timeout=0.5)
+            except Exception: pass
+        for slot in self._slots:
+            slot["proc"].join(timeout=2.0)
+            if slot["proc"].is_alive():
+                slot["proc"].terminate()
+            slot["results"].close()
+            slot["buf"] = None
+            slot["shm"].close()
+            slot["shm"].unlink()
+        self._slots = []
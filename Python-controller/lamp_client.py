@@ -0,0 +1,120 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# ==== ESP32 COMMAND SENDER ====
+# All lamp HTTP traffic goes through this thread so the Qt GUI thread never
+# blocks on the network. Pending commands are merged per key ("mode",
+# "brightness", "speed", ...): if the lamp is slow, only the newest value of
+# each key is sent once the link frees up. All settings pending in one tick
+# go out as a single merged JSON body over a pooled keep-alive session.
+
+MODE_RATE_LIMIT = 0.2  # min seconds between mode commands (spam guard)
+
+def make_session(pool_size=4):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class LampSender(threading.Thread):
+    def __init__(self, base_url, timeout=0.2, max_pending=8, profiler=None):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.profiler = profiler
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.session = make_session()
+
+        self._pending = {}  # key -> latest value, insertion ordered
+        self._cond = threading.Condition()
+        self._running = True
+
+        # Counters (read from the GUI for diagnostics)
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.errors = 0
+
+    # ==== PRODUCER SIDE (any thread, never blocks) ====
+    def send_mode(self, mode_name):
+        self._put("mode", mode_name)
+
+    def send_setting(self, key, val):
+        self._put(key, val)
+
+    def send_settings(self, settings):
+        with self._cond:
+            for key, val in settings.items():
+                self._merge(key, val)
+            self._cond.notify()
+
+    def _put(self, key, val):
+        with self._cond:
+            self._merge(key, val)
+            self._cond.notify()
+
+    def _merge(self, key, val):
+        if key in self._pending:
+            self.merged += 1
+        elif len(self._pending) >= self.max_pending:
+            # Queue is bounded: evict the oldest pending key
+            self._pending.pop(next(iter(self._pending)))
+            self.dropped += 1
+        self._pending[key] = val
+
+    # ==== CONSUMER SIDE (sender thread) ====
+    def run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                batch, self._pending = self._pending, {}
+
+            mode = batch.pop("mode", None)
+            if mode is not None:
+                self._request("GET", "/api/mode", params={"name": mode})
+            if batch:
+                # handleSettings() reads every key it knows from one JSON body
+                self._request("POST", "/api/settings", json=batch)
+
+    def _request(self, method, path, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+            self.sent += 1
+        except requests.RequestException:
+            self.errors += 1  # lamp offline, keep going
+        if self.profiler:
+            self.profiler.lap("http", t0)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self.join(timeout=1.0)
+        self.session.close()
+
+# ==== MODE RATE LIMITER ====
+# The spam guard in front of send_mode(): at most one mode command per
+# interval; anything in between is dropped and counted.
+
+class RateLimiter:
+    def __init__(self, interval=MODE_RATE_LIMIT):
+        self.interval = interval
+        self.last = float("-inf")
+        self.passed = 0
+        self.limited = 0
+
+    def allow(self, now=None):
+        now = time.time() if now is None else now
+        if now - self.last < self.interval:
+            self.limited += 1
+            return False
+        self.last = now
+        self.passed += 1
+        return True
@@ -0,0 +1,193 @@
+import argparse
+import collections
+import json
+import random
+import threading
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from frame_stream import UdpFrameReceiver
+from renderer import MODES
+
+# ==== LAMP EMULATOR ====
+# Local stand-in for the ESP32 firmware's HTTP API, for load-testing the
+# controller without hardware:
+#   GET  /api/mode?name=X    POST /api/settings {json}    GET /api/pixel?x&y&r&g&b
+#
+# Like server.handleClient() it serves ONE request at a time on one thread,
+# and closes the connection after every reply, so a slow lamp builds a queue
+# exactly like the real one. Latency, jitter and loss are configurable:
+#   latency/jitter - seconds of processing time per request (blocks the queue)
+#   loss           - share of requests dropped (connection closed, not applied)
+#
+#   python lamp_emulator.py --port 8080 --latency 0.03 --jitter 0.02 --loss 0.05
+#   python main.py --lamp-url http://127.0.0.1:8080
+
+Command = collections.namedtuple("Command", "received applied kind value")
+
+class LampEmulator(threading.Thread):
+    def __init__(self, port=0, host="127.0.0.1", latency=0.0, jitter=0.0, loss=0.0,
+                 seed=None, stream_port=None, history=100000):
+        super().__init__(daemon=True)
+        self.latency, self.jitter, self.loss = latency, jitter, loss
+        self.rng = random.Random(seed)
+
+        # Firmware state
+        self.mode = "happy"
+        self.brightness = 60
+        self.speed = 20
+        self.pixels = np.zeros((8, 8, 3), dtype=np.uint8)
+
+        # Recording
+        self.log = collections.deque(maxlen=history)  # Command, in apply order
+        self.counts = collections.Counter()           # mode / settings / pixel / lost / bad / abandoned
+        self._lock = threading.Lock()
+
+        emu = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"  # WebServer closes after each response
+
+            def do_GET(self):
+                emu._handle(self, "GET")
+
+            def do_POST(self):
+                emu._handle(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer((host, port), Handler)  # single-threaded on purpose
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+        # Optional UDP frame stream receiver on the same host
+        self.stream = UdpFrameReceiver(host, stream_port) if stream_port is not None else None
+
+    # ==== REQUEST HANDLING ====
+    def _handle(self, req, method):
+        received = time.perf_counter()
+        delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+        if delay > 0: time.sleep(delay)  # blocks the queue, like a busy loop()
+
+        if self.rng.random() < self.loss:
+            self._count("lost")
+            req.close_connection = True
+            return
+
+        url = urlsplit(req.path)
+        args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if method == "GET" and url.path == "/api/mode":
+            if "name" not in args:
+                req.close_connection = True  # firmware never answers this
+                return
+            name = args["name"].lower()
+            self.mode = name if name in MODES else "happy"
+            if self.stream: self.stream.reset()
+            self._record(received, "mode", args["name"])
+            self._reply(req, 200, "text/plain", "OK")
+
+        elif method == "POST" and url.path == "/api/settings":
+            try: body = json.loads(req.rfile.read(int(req.headers.get("Content-Length", 0))) or b"null")
+            except ValueError: body = None
+            if not isinstance(body, dict):
+                self._count("bad")
+                self._reply(req, 400, "text/plain", "Bad Request")
+                return
+            if "brightness" in body: self.brightness = int(body["brightness"])
+            if "speed" in body: self.speed = int(body["speed"])
+            self._record(received, "settings", body)
+            self._reply(req, 200, "application/json", '{"success":true}')
+
+        elif method == "GET" and url.path == "/api/pixel":
+            if "x" not in args or "y" not in args:
+                req.close_connection = True
+                return
+            self.mode = "manual"
+            x, y = int(args["x"]), int(args["y"])
+            color = [int(args.get(c, 255)) for c in "rgb"]
+            if 0 <= x < 8 and 0 <= y < 8: self.pixels[y, x] = color
+            self._record(received, "pixel", (x, y, *color))
+            self._reply(req, 200, "text/plain", "Lit")
+
+        elif method == "GET" and url.path == "/":
+            self._reply(req, 200, "text/plain", f"MoodMatrix emulator: {self.mode}")
+        else:
+            self._reply(req, 404, "text/plain", "Not Found")
+
+    def _reply(self, req, code, ctype, text):
+        data = text.encode()
+        try:
+            req.send_response(code)
+            req.send_header("Content-Type", ctype)
+            req.send_header("Content-Length", str(len(data)))
+            req.end_headers()
+            req.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            self._count("abandoned")  # client timed out; the command was still applied
+
+    def _record(self, received, kind, value):
+        with self._lock:
+            self.log.append(Command(received, time.perf_counter(), kind, value))
+            self.counts[kind] += 1
+
+    def _count(self, kind):
+        with self._lock:
+            self.counts[kind] += 1
+
+    # ==== INSPECTION ====
+    def commands(self, kind=None):
+        with self._lock:
+            return [c for c in self.log if kind is None or c.kind == kind]
+
+    def command_rate(self, window=1.0):
+        # Applied commands per second over the last `window` seconds
+        cutoff = time.perf_counter() - window
+        with self._lock:
+            return sum(1 for c in reversed(self.log) if c.applied >= cutoff) / window if self.log else 0.0
+
+    def snapshot(self):
+        return {"mode": self.mode, "brightness": self.brightness, "speed": self.speed,
+                "counts": dict(self.counts), "rate": self.command_rate(),
+                "stream_frames": self.stream.received if self.stream else 0}
+
+    # ==== LIFECYCLE ====
+    def run(self):
+        if self.stream: self.stream.start()
+        self.server.serve_forever(poll_interval=0.05)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.stream: self.stream.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Emulate the MoodMatrix lamp HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds added to latency")
+    parser.add_argument("--loss", type=float, default=0.0, help="share of requests dropped (0..1)")
+    parser.add_argument("--stream-port", type=int, default=None, help="also accept UDP frames (e.g. 4210)")
+    args = parser.parse_args()
+
+    emu = LampEmulator(args.port, args.host, args.latency, args.jitter, args.loss, stream_port=args.stream_port)
+    emu.start()
+    print(f"lamp emulator on {emu.url}  (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1.0)
+            s = emu.snapshot()
+            c = s["counts"]
+            print(f"mode={s['mode']:<12} bri={s['brightness']:<3} spd={s['speed']:<3} | {s['rate']:5.1f} cmd/s | "
+                  f"mode {c.get('mode', 0)} settings {c.get('settings', 0)} pixel {c.get('pixel', 0)} "
+                  f"lost {c.get('lost', 0)} | stream {s['stream_frames']}")
+    except KeyboardInterrupt:
+        pass
+    emu.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from config import LAMPS
+from lamp_client import make_session
+
+# ==== MULTI-LAMP FAN-OUT ====
+# Sends every mode/settings decision to N lamps in parallel on a bounded
+# worker pool. Each lamp has its own pending dict (newest value per key,
+# like LampSender) and at most one request in flight. A slow or dead lamp
+# therefore ties up one worker at most, its newer commands merge while it
+# is busy, and the other lamps are never delayed.
+#
+# Lamps that keep failing are marked "down" and retried with exponential
+# backoff; their newest pending values are delivered once they answer.
+#
+#   fleet = LampFleet(load_lamps("lamps.json"))
+#   fleet.start()
+#   fleet.send_mode("aurora")                  # same API as LampSender
+#   fleet.send_settings({"brightness": 120})
+
+DOWN_AFTER = 3  # consecutive failures before a lamp is backed off
+
+def load_lamps(path=None):
+    # lamps.json: ["http://192.168.4.1", {"name": "shelf", "url": "http://192.168.4.2"}, ...]
+    if path and os.path.exists(path):
+        with open(path) as f:
+            entries = json.load(f)
+    else:
+        entries = LAMPS
+    lamps = []
+    for i, entry in enumerate(entries):
+        if isinstance(entry, str): entry = {"url": entry}
+        lamps.append({"name": entry.get("name", f"lamp{i + 1}"), "url": entry["url"].rstrip("/")})
+    return lamps
+
+class LampLink:
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url
+        self.session = make_session(pool_size=1)
+        self.pending = {}
+        self.busy = False
+
+        # Health
+        self.sent = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.failures = 0       # consecutive
+        self.retry_at = 0.0
+        self.last_ms = 0.0
+
+    @property
+    def state(self):
+        if self.failures >= DOWN_AFTER: return "down"
+        return "degraded" if self.failures else "ok"
+
+class LampFleet:
+    def __init__(self, lamps, timeout=0.2, max_workers=16, max_pending=8, profiler=None,
+                 backoff=1.0, max_backoff=10.0):
+        self.links = [LampLink(l["name"], l["url"]) for l in lamps]
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.profiler = profiler
+        self.backoff, self.max_backoff = backoff, max_backoff
+        self.pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.links))),
+                                       thread_name_prefix="lamp")
+        self._lock = threading.Lock()
+        self._running = True
+
+        # Fleet-wide counters (same names as LampSender)
+        self.merged = 0
+        self.dropped = 0
+
+    # ==== PRODUCER SIDE (any thread, never blocks) ====
+    def start(self):
+        pass  # workers are created on demand; kept for LampSender compatibility
+
+    def send_mode(self, mode_name):
+        self.send_settings({"mode": mode_name})
+
+    def send_setting(self, key, val):
+        self.send_settings({key: val})
+
+    def send_settings(self, settings):
+        now = time.monotonic()
+        with self._lock:
+            if not self._running: return
+            for link in self.links:
+                for key, val in settings.items():
+                    self._merge(link, key, val)
+                self._kick(link, now)
+
+    def _merge(self, link, key, val):
+        if key in link.pending:
+            self.merged += 1
+        elif len(link.pending) >= self.max_pending:
+            link.pending.pop(next(iter(link.pending)))
+            self.dropped += 1
+        link.pending[key] = val
+
+    def _kick(self, link, now):
+        # Called with the lock held: start a delivery if the lamp is idle
+        if link.busy or not link.pending or now < link.retry_at:
+            return
+        batch, link.pending = link.pending, {}
+        link.busy = True
+        self.pool.submit(self._deliver, link, batch)
+
+    # ==== WORKER SIDE ====
+    def _deliver(self, link, batch):
+        t0 = time.perf_counter()
+        ok = True
+        mode = batch.pop("mode", None)
+        if mode is not None:
+            ok = self._request(link, "GET", "/api/mode", params={"name": mode})
+        if batch and ok:
+            ok = self._request(link, "POST", "/api/settings", json=batch)
+        link.last_ms = (time.perf_counter() - t0) * 1000.0
+        if self.profiler:
+            self.profiler.record("http", link.last_ms)
+
+        now = time.monotonic()
+        with self._lock:
+            link.busy = False
+            if ok:
+                link.failures = 0
+            else:
+                link.failures += 1
+                if link.failures >= DOWN_AFTER:
+                    link.retry_at = now + min(self.max_backoff, self.backoff * 2 ** (link.failures - DOWN_AFTER))
+                # Keep what did not go out unless something newer arrived meanwhile
+                if mode is not None: batch["mode"] = mode
+                for key, val in batch.items():
+                    link.pending.setdefault(key, val)
+            if self._running:
+                self._kick(link, now)
+
+    def _request(self, link, method, path, **kwargs):
+        try:
+            link.session.request(method, f"{link.url}{path}", timeout=self.timeout, **kwargs)
+            link.sent += 1
+            return True
+        except requests.Timeout:
+            link.timeouts += 1
+        except requests.RequestException:
+            link.errors += 1
+        return False
+
+    # ==== DIAGNOSTICS ====
+    @property
+    def sent(self): return sum(l.sent for l in self.links)
+
+    @property
+    def errors(self): return sum(l.errors + l.timeouts for l in self.links)
+
+    def health(self):
+        return [{"name": l.name, "url": l.url, "state": l.state, "sent": l.sent, "errors": l.errors,
+                 "timeouts": l.timeouts, "last_ms": l.last_ms} for l in self.links]
+
+    def format_health(self):
+        return "\n".join(f"{h['name']:<10}{h['state']:<10}sent {h['sent']:<6} err {h['errors']:<4} "
+                         f"timeout {h['timeouts']:<4} {h['last_ms']:6.1f}ms" for h in self.health())
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        for link in self.links:
+            link.session.close()
@@ -5,54 +5,32 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
 from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer
 from PyQt6.QtGui import QImage, QPixmap, QColor, QFont, QPalette, QBrush
 import sys
-import cv2
-import requests
+import argparse
+import json
 import time
-import collections
-import psutil
+from urllib.parse import urlsplit
 import numpy as np
-from deepface import DeepFace
-
-# Try importing MediaPipe and PyQtGraph
-try:
-    import mediapipe as mp
-    import pyqtgraph as pg
-    HAS_EXTRAS = True
-except ImportError:
-    HAS_EXTRAS = False
-    print("WARNING: 'mediapipe' or 'pyqtgraph' not found. Some features disabled.")
-
-# ==== CONFIG ====
-ESP32_IP = "192.168.4.1"   
-BASE_URL = f"http://{ESP32_IP}"
-
-# Mapped to ESP32 'emo*' functions (Used for AI Logic)
-EMOTION_MAP = {
-    "happy":    {"mode": "happy",    "color": "#FFD700", "label": "HAPPY ✨"},
-    "sad":      {"mode": "sad",      "color": "#0000FF", "label": "SAD 🌊"},
-    "angry":    {"mode": "angry",    "color": "#FF0000", "label": "ANGRY 🔥"},
-    "fear":     {"mode": "glitch",   "color": "#8000FF", "label": "FEAR 👻"}, 
-    "surprise": {"mode": "surprise", "color": "#FFFFFF", "label": "SURPRISE 😲"},
-    "disgust":  {"mode": "icon_alien","color": "#00FF00", "label": "DISGUST 👽"},
-    "neutral":  {"mode": "neutral",  "color": "#00CCFF", "label": "NEUTRAL 😐"}
-}
-
-# Dynamic FX Pools for AI Rotation
-EMOTION_FX_POOL = {
-    "happy":    ["bubbles", "flower", "stars", "aurora", "kaleidoscope"],
-    "sad":      ["liquid", "rain", "caustics", "snow"],
-    "angry":    ["magma", "fire", "shockwave", "lightning"],
-    "fear":     ["nebula", "glitch", "grid"],
-    "surprise": ["orbit", "shockwave", "pulse"],
-    "neutral":  ["nebula", "galaxy", "vortex", "liquid"],
-    "disgust":  ["icon_alien", "glitch"]
-}
-
-PERSONALITY_PROFILES = {
-    "Reactive": {"smooth": 3, "brightness": 120, "desc": "Fast response, high energy"},
-    "Chill":    {"smooth": 10, "brightness": 60,  "desc": "Slow transitions, relaxed"},
-    "Stable":   {"smooth": 6,  "brightness": 90,  "desc": "Balanced monitoring"}
-}
+from config import (LAMPS_FILE, EMOTION_MAP, MATRIX_WIDTH, MATRIX_HEIGHT, SERPENTINE, GESTURE_RATE, RECORD_ENABLED,
+                    DETECTOR_WIDTH, EMOTION_BACKENDS)
+from telemetry import Telemetry, TelemetryBus, UI_RATE
+from metrics import MetricsServer
+from frame_buffer import FrameBuffer
+from memory import ScrollBuffer
+from renderer import PatternRenderer
+from frame_stream import FrameStreamer
+
+# OpenCV, psutil, requests and the pipeline modules are imported once the
+# window is up (MainWindow.start_backend, EmotionWorker), PyQtGraph after
+# that (MainWindow.init_graph)
+pg = None
+HAS_EXTRAS = False
+
+DISPLAY_FPS = 30 # preview refresh rate (GUI side)
+RENDER_FPS = 40  # lamp preview / UDP stream rate
+
+# Stable Y-axis mapping for the emotion timeline
+GRAPH_LABELS = ["neutral", "happy", "surprise", "sad", "angry", "fear", "disgust"]
+GRAPH_INDEX = {e: i for i, e in enumerate(GRAPH_LABELS)}
 
 # ==== STYLESHEET ====
 MODERN_STYLE = """
@@ -121,272 +99,91 @@ MODERN_STYLE = """
 """
 
 class EmotionWorker(QThread):
-    change_pixmap_signal = pyqtSignal(QImage)
-    stats_signal = pyqtSignal(dict, str, dict) 
-    graph_signal = pyqtSignal(str) 
+    ai_state_signal = pyqtSignal(str) # loading -> ready / error (restarting after a crash, failing on model errors)
     
-    def __init__(self):
+    def __init__(self, source="0"):
+        from pipeline import EmotionPipeline
+        from recorder import SessionRecorder
         super().__init__()
         self._run_flag = True
-        self.last_mode = "neutral"
-        self.personality = "Stable"
-        self.smoothing_buffer = collections.deque(maxlen=6)
-        
-        # Flags
-        self.ai_enabled = True 
-        self.gesture_enabled = False # Toggle state
-        
-        # Emotional Energy
-        self.emotion_state = 0.0      
-        self.decay_rate = 5.0         
-        self.reactivity = 0.3         
-        
-        # AI Params
-        self.detection_interval = 0.4  
-        self.conf_threshold = 25       
-        self.reactive_mode = False     
-        
-        # Tracking
-        self.tracker = None
-        self.face_box = None 
-        self.frame_count = 0
-        self.tracking_active = False
-        self.last_inference_time = 0
-        
-        # Memory
-        self.emotion_memory = collections.deque(maxlen=600)
-        self.comfort_mode_active = False
-        self.gesture_lock = False
-
-        # Gesture State
-        self.prev_hand_pos = None
-        self.gesture_active = False
-        self.gesture_brightness = 100
-        self.gesture_speed = 20
-        self.gesture_fx_index = 0
-
-        # Metrics
-        self.fps_start_time = time.time()
-        self.fps_counter = 0
-        self.current_fps = 0
-        self.inference_time = 0
+        self.source = source
+        self.pipeline = EmotionPipeline()
+        self.frames = FrameBuffer() # GUI pulls the newest frame at its own rate
+        self.telemetry = TelemetryBus() # ... and the newest stats at UI_RATE
+        self.control = None # LampController: lamp decisions happen here, not in the UI
+        self.recorder = SessionRecorder() if RECORD_ENABLED else None # whole session on disk
 
     def run(self):
-        # Use DSHOW on Windows for speed
-        cap = cv2.VideoCapture(0, cv2.CAP_DSHOW) if sys.platform == 'win32' else cv2.VideoCapture(0)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
-        
-        mp_hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.7) if HAS_EXTRAS else None
+        from frame_source import open_source
+        source = open_source(self.source, loop=True, realtime=True)
+        self.pipeline.start()
+        prof = self.pipeline.profiler
+        ai_state = None
         
         while self._run_flag:
-            ret, frame = cap.read()
-            if not ret: continue
-
-            if not self.ai_enabled:
-                rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_image.shape
-                qt_img = QImage(rgb_image.data, w, h, ch * w, QImage.Format.Format_RGB888)
-                self.change_pixmap_signal.emit(qt_img)
+            t = time.perf_counter()
+            ret, frame = source.read()
+            t = prof.lap("capture", t)
+            if not ret:
+                if source.eof: break
+                continue
+
+            if not self.pipeline.ai_enabled:
+                np.copyto(self.frames.back(frame.shape), frame)
+                self.frames.publish()
                 time.sleep(0.03)
                 continue
 
-            self.frame_count += 1
-            
-            # ================= 1. GESTURE CONTROL ENGINE =================
-            self.gesture_active = False
-            
-            # Only run gestures if enabled AND frame modulo to save CPU
-            if self.gesture_enabled and mp_hands and self.frame_count % 3 == 0:
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                hand_results = mp_hands.process(rgb_frame)
-                
-                if hand_results.multi_hand_landmarks:
-                    self.gesture_active = True
-                    for landmarks in hand_results.multi_hand_landmarks:
-                        mp.solutions.drawing_utils.draw_landmarks(frame, landmarks, mp.solutions.hands.HAND_CONNECTIONS)
-                        
-                        wrist = landmarks.landmark[0]
-                        thumb_tip = landmarks.landmark[4]
-                        index_tip = landmarks.landmark[8]
-                        pinky_tip = landmarks.landmark[20]
-                        
-                        hand_y = wrist.y
-                        hand_x = wrist.x
-                        current_pos = np.array([wrist.x, wrist.y])
-
-                        # A. Height -> Brightness (Inverted: Top=1.0 Brightness, Bottom=0.2)
-                        b_val = int(np.interp(hand_y, [0.1, 0.9], [255, 40]))
-                        self.gesture_brightness = max(40, min(255, b_val))
-                        cv2.putText(frame, f"BRIGHT: {self.gesture_brightness}", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-
-                        # B. Horizontal -> FX Index
-                        self.gesture_fx_index = int(np.interp(hand_x, [0.1, 0.9], [0, 4]))
-                        
-                        # C. Hand Openness -> Intensity Boost
-                        hand_span = abs(thumb_tip.x - pinky_tip.x)
-                        intensity_boost = np.interp(hand_span, [0.05, 0.25], [0, 50])
-                        self.emotion_state += intensity_boost * 0.1 
-                        self.emotion_state = min(100, self.emotion_state)
-
-                        # D. Velocity -> Animation Speed
-                        if self.prev_hand_pos is not None:
-                            velocity = np.linalg.norm(current_pos - self.prev_hand_pos)
-                            s_val = int(np.interp(velocity, [0.001, 0.05], [80, 5]))
-                            self.gesture_speed = s_val
-                            cv2.putText(frame, f"SPEED: {s_val}ms", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-                            
-                            # E. Swipes -> Emotion Shift
-                            dx = wrist.x - self.prev_hand_pos[0]
-                            if abs(dx) > 0.1: 
-                                if dx > 0: self.emotion_state += 20 
-                                else: self.emotion_state -= 20      
-                        
-                        self.prev_hand_pos = current_pos
-
-            # ================= 2. DETECTION ENGINE =================
-            run_detection = False
-            if time.time() - self.last_inference_time > self.detection_interval:
-                run_detection = True
-            elif self.tracking_active:
-                try:
-                    success, box = self.tracker.update(frame)
-                    if success:
-                        self.face_box = tuple(map(int, box))
-                    else:
-                        self.tracking_active = False
-                except: self.tracking_active = False
-
-            emotions = {}
-            dominant = self.last_mode
-
-            if run_detection:
-                try:
-                    t0 = time.time()
-                    scale_factor_ai = 0.7
-                    small_frame = cv2.resize(frame, (0, 0), fx=scale_factor_ai, fy=scale_factor_ai)
-                    results = DeepFace.analyze(
-                        small_frame, actions=['emotion'], enforce_detection=False, 
-                        silent=True, detector_backend='opencv'
-                    )
-                    self.inference_time = (time.time() - t0) * 1000
-                    self.last_inference_time = time.time()
-                    
-                    if results:
-                        res = results[0]
-                        emotions = res['emotion']
-                        
-                        # Energy Engine
-                        positive = emotions["happy"] + emotions["surprise"]
-                        negative = emotions["sad"] + emotions["angry"] + emotions["fear"] + emotions["disgust"]
-                        delta = (positive - negative) * self.reactivity
-                        self.emotion_state = max(-100, min(100, self.emotion_state + delta))
-                        
-                        # Decay
-                        if self.emotion_state > 0: self.emotion_state -= self.decay_rate
-                        elif self.emotion_state < 0: self.emotion_state += self.decay_rate
-                        
-                        # Region
-                        region = res['region']
-                        coord_scale = 1.0 / scale_factor_ai
-                        x = int(region['x'] * coord_scale)
-                        y = int(region['y'] * coord_scale)
-                        w = int(region['w'] * coord_scale)
-                        h = int(region['h'] * coord_scale)
-                        self.face_box = (x, y, w, h)
-                        
-                        try: self.tracker = cv2.TrackerCSRT_create()
-                        except: self.tracker = cv2.TrackerKCF_create()
-                        self.tracker.init(frame, self.face_box)
-                        self.tracking_active = True
-                        
-                except Exception: self.tracking_active = False
-            
-            # ================= 3. OUTPUT LOGIC =================
-            if self.face_box:
-                
-                current_profile = PERSONALITY_PROFILES.get(self.personality, PERSONALITY_PROFILES["Stable"])
-                
-                # Determine Emotion from Energy
-                if self.emotion_state > 40: most_common = "happy"
-                elif self.emotion_state > 10: most_common = "surprise"
-                elif self.emotion_state < -40: most_common = "sad"
-                elif self.emotion_state < -10: most_common = "angry"
-                else: most_common = "neutral"
-                
-                # Memory Logic
-                self.emotion_memory.append(most_common)
-                recent_sadness = list(self.emotion_memory).count("sad")
-                if recent_sadness > len(self.emotion_memory) * 0.4:
-                    if not self.comfort_mode_active:
-                        self.comfort_mode_active = True
-                        most_common = "happy"
-                        self.emotion_state = 50
-                else:
-                    self.comfort_mode_active = False
-
-                if most_common != self.last_mode:
-                    self.last_mode = most_common
-                
-                # Prepare System Stats
-                sys_stats = {
-                    "cpu": psutil.cpu_percent(),
-                    "fps": self.current_fps,
-                    "inference": self.inference_time,
-                    "comfort": self.comfort_mode_active,
-                    "energy": self.emotion_state,
-                    # Gesture Data Overrides
-                    "gesture_active": self.gesture_active,
-                    "gesture_bri": self.gesture_brightness,
-                    "gesture_spd": self.gesture_speed,
-                    "gesture_fx": self.gesture_fx_index
-                }
-                
-                self.stats_signal.emit(emotions, most_common, sys_stats)
-                self.graph_signal.emit(most_common)
-
-                # Draw UI
-                x, y, w, h = self.face_box
-                color = (0, 255, 157) if not self.comfort_mode_active else (0, 165, 255)
-                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-                cv2.putText(frame, f"{most_common.upper()} ({int(self.emotion_state)})", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-
-            # FPS
-            self.fps_counter += 1
-            if time.time() - self.fps_start_time > 1.0:
-                self.current_fps = self.fps_counter
-                self.fps_counter = 0
-                self.fps_start_time = time.time()
-
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            qt_img = QImage(rgb_image.data, w, h, ch * w, QImage.Format.Format_RGB888)
-            self.change_pixmap_signal.emit(qt_img)
+            result = self.pipeline.process(frame)
+            if result is not None:
+                t = time.perf_counter()
+                decision = self.control.apply(result)
+                self.telemetry.publish(Telemetry(result.dominant, result.emotions, decision.status,
+                                                 decision.color, decision.gesture, result.sys_stats))
+                t = prof.lap("decide", t)
+                if self.recorder:
+                    self.recorder.append(result, self.control.mode)
+                    prof.lap("record", t)
+            if self.pipeline.ai_state != ai_state:
+                ai_state = self.pipeline.ai_state
+                self.ai_state_signal.emit(ai_state)
+
+            # BGR goes out as-is (Qt reads BGR888), no per-frame conversion
+            t = time.perf_counter()
+            np.copyto(self.frames.back(frame.shape), frame)
+            self.frames.publish()
+            prof.lap("publish", t)
         
-        cap.release()
+        self.pipeline.close()
+        source.release()
+        if self.recorder: self.recorder.close()
 
     def stop(self):
         self._run_flag = False
         self.wait()
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, source="0", metrics_port=0, lamps=None, detector=None, startup_report=False, emotion_backend=None,
+                 lamps_file=LAMPS_FILE):
         super().__init__()
+        # Startup marks (time.time()) for bench_startup.py, None when not reporting
+        self.startup = {} if startup_report else None
         self.setWindowTitle("MoodMatrix By Yogarathinam")
         self.resize(1300, 850)
         self.setStyleSheet(MODERN_STYLE)
         
-        self.last_sent_emotion = None
-        self.current_fx = None
-        self.last_fx_change = 0
-        self.fx_change_interval = 8
-        
         # Initialize Graph Data safely
-        self.graph_data = collections.deque(maxlen=100)
+        self.graph_data = ScrollBuffer(100)
         self.curve = None
 
-        # Rate Limiting for ESP32
-        self.last_api_call = 0
+        # Host-side copy of the lamp's patterns: drives the preview and the UDP stream
+        self.renderer = PatternRenderer(MATRIX_WIDTH, MATRIX_HEIGHT, SERPENTINE)
+        self.streamers = [] # one per lamp while streaming
+        self.mode_seq = 0   # last LampController mode the renderer picked up
+        self.speed = None
+
+        # UI state actually on screen, so unchanged values are not re-applied
+        self.shown = {}
 
         # Main Layout
         central = QWidget()
@@ -414,12 +211,60 @@ class MainWindow(QMainWindow):
         
         main_layout.addWidget(splitter)
 
+        # Runs once the event loop is up, i.e. after the first paint
+        QTimer.singleShot(0, lambda: self.start_backend(source, metrics_port, lamps, lamps_file, detector, emotion_backend))
+
+    def start_backend(self, source, metrics_port, lamps, lamps_file, detector, emotion_backend):
+        self.mark_startup("window")
+        from control import LampController
+        from lamp_fleet import LampFleet, load_lamps
+        from tracks import AGGREGATORS
+
+        # Worker first: its profiler is shared with the lamp dispatcher
+        self.worker = EmotionWorker(source)
+        if detector: self.worker.pipeline.detector = detector
+        if emotion_backend: self.worker.pipeline.emotion_backend = emotion_backend
+        self.profiler = self.worker.pipeline.profiler
+
+        # Network I/O lives on its own thread, never on the GUI thread
+        # Every decision fans out to all lamps in parallel (bounded worker pool)
+        self.lamp = LampFleet(lamps or load_lamps(lamps_file), profiler=self.profiler)
+        self.lamp.start()
+
+        # Emotion -> lamp command decisions (gesture / auto FX / plain mode), on the worker thread
+        self.control = LampController(self.lamp)
+        self.worker.control = self.control
+
+        # Optional local /metrics endpoint (Prometheus text + JSON lines)
+        self.metrics_server = None
+        if metrics_port:
+            self.metrics_server = MetricsServer(self.profiler, metrics_port)
+            self.metrics_server.start()
+
+        self.combo_aggregate.addItems(list(AGGREGATORS))
+        self.combo_aggregate.setCurrentText(self.worker.pipeline.aggregation)
+        self.combo_aggregate.currentTextChanged.connect(self.update_aggregation)
+
         # Start Logic
-        self.worker = EmotionWorker()
-        self.worker.change_pixmap_signal.connect(self.update_image)
-        self.worker.stats_signal.connect(self.update_stats)
-        self.worker.graph_signal.connect(self.update_graph)
+        self.worker.ai_state_signal.connect(self.update_ai_state)
         self.worker.start()
+        self.mark_startup("backend")
+
+        # Stats, bars and graph follow the telemetry bus at a fixed UI rate
+        self.ui_timer = QTimer(self)
+        self.ui_timer.timeout.connect(self.update_telemetry)
+        self.ui_timer.start(int(1000 / UI_RATE))
+
+        QTimer.singleShot(0, self.init_graph) # PyQtGraph last, the camera is already running
+
+        # Preview refresh runs at the display rate, independent of camera FPS
+        self.display_timer = QTimer(self)
+        self.display_timer.timeout.connect(self.update_image)
+        self.display_timer.start(int(1000 / DISPLAY_FPS))
+
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self.update_preview)
+        self.render_timer.start(int(1000 / RENDER_FPS))
 
     def setup_left_panel(self, parent):
         layout = QVBoxLayout(parent)
@@ -439,6 +284,31 @@ class MainWindow(QMainWindow):
         self.status_display.setStyleSheet("font-size: 24px; font-weight: 900; color: #fff; background: #1e1e24; padding: 15px; border-radius: 8px; border: 1px solid #333;")
         layout.addWidget(self.status_display)
 
+        # Model readiness (the pool loads and warms the models in the background)
+        self.ai_state_lbl = QLabel("AI MODEL: LOADING...")
+        self.ai_state_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.ai_state_lbl.setStyleSheet("font-size: 12px; font-weight: bold; color: #FFA500;")
+        layout.addWidget(self.ai_state_lbl)
+
+        # Lamp Preview (rendered on the host, optionally streamed to the lamp)
+        preview_group = QGroupBox("LAMP PREVIEW")
+        preview_layout = QHBoxLayout()
+        self.preview_lbl = QLabel()
+        self.preview_lbl.setFixedSize(128, 128)
+        self.preview_lbl.setStyleSheet("background: #000; border: 1px solid #333;")
+        preview_layout.addWidget(self.preview_lbl)
+        preview_side = QVBoxLayout()
+        self.preview_mode_lbl = QLabel("MODE: -")
+        self.preview_mode_lbl.setStyleSheet("font-size: 13px; font-weight: bold; color: #00e676;")
+        preview_side.addWidget(self.preview_mode_lbl)
+        self.cb_stream = QCheckBox("Stream Frames (UDP)")
+        self.cb_stream.toggled.connect(self.toggle_stream)
+        preview_side.addWidget(self.cb_stream)
+        preview_side.addStretch()
+        preview_layout.addLayout(preview_side)
+        preview_group.setLayout(preview_layout)
+        layout.addWidget(preview_group)
+
         # Reactive Emotion Bars (Below Camera)
         bars_group = QGroupBox("LIVE EMOTION MATRIX")
         bars_layout = QGridLayout()
@@ -502,7 +372,7 @@ class MainWindow(QMainWindow):
             for i, (name, code) in enumerate(items):
                 btn = QPushButton(name)
                 btn.setMinimumHeight(45)
-                btn.clicked.connect(lambda ch, c=code: self.trigger_esp32_raw(c))
+                btn.clicked.connect(lambda ch, c=code: self.control.set_mode(c))
                 gl.addWidget(btn, i // col_count, i % col_count)
             g.setLayout(gl)
             scroll_grid.addWidget(g)
@@ -558,10 +428,21 @@ class MainWindow(QMainWindow):
         grp_ai = QGroupBox("AI CONFIG")
         l_ai = QVBoxLayout()
         add_slider(l_ai, "Detection (ms)", 100, 1500, 400, self.update_detection_interval)
+        add_slider(l_ai, "Re-acquire (ms)", 500, 5000, 2000, self.update_reacquire_interval)
+        add_slider(l_ai, "Adaptive Max (ms)", 400, 5000, 2000, self.update_max_interval)
+        self.cb_adaptive = QCheckBox("Adaptive Detection")
+        self.cb_adaptive.setChecked(True)
+        self.cb_adaptive.toggled.connect(self.update_adaptive)
+        l_ai.addWidget(self.cb_adaptive)
         add_slider(l_ai, "Reactivity", 1, 10, 3, self.update_reactivity)
         add_slider(l_ai, "Decay Rate", 1, 20, 5, self.update_decay)
+        add_slider(l_ai, "Gesture Rate (Hz)", 2, 30, GESTURE_RATE, self.update_gesture_rate)
+        l_ai.addWidget(QLabel("Several Faces"))
+        self.combo_aggregate = QComboBox() # filled by start_backend
+        l_ai.addWidget(self.combo_aggregate)
         self.cb_auto_fx = QCheckBox("Auto FX Cycle")
         self.cb_auto_fx.setChecked(True)
+        self.cb_auto_fx.toggled.connect(self.update_auto_fx)
         l_ai.addWidget(self.cb_auto_fx)
         btn_reset = QPushButton("Reset Memory")
         btn_reset.clicked.connect(self.reset_buffers)
@@ -595,20 +476,27 @@ class MainWindow(QMainWindow):
 
         # -- GRAPH TAB --
         tab_graph = QWidget()
-        graph_layout = QVBoxLayout(tab_graph)
-        if HAS_EXTRAS:
-            self.plot_widget = pg.PlotWidget(title="EMOTION TIMELINE")
-            self.plot_widget.setBackground('#1a1a1d') # Matches groupbox bg roughly
-            self.plot_widget.setYRange(0, 7) # 7 emotions
-            # Use fixed Y-Axis Labels
-            self.plot_widget.getAxis('left').setTicks([[(i, e) for i, e in enumerate(["neutral", "happy", "surprise", "sad", "angry", "fear", "disgust"])]])
-            self.curve = self.plot_widget.plot(pen=pg.mkPen('#00e676', width=2))
-            graph_layout.addWidget(self.plot_widget)
-        else:
-            graph_layout.addWidget(QLabel("Install pyqtgraph to enable graphs."))
-        
+        self.graph_layout = QVBoxLayout(tab_graph)
+        self.graph_placeholder = QLabel("Loading graph...") # replaced by init_graph()
+        self.graph_layout.addWidget(self.graph_placeholder)
         ctrl_tabs.addTab(tab_graph, "GRAPH")
 
+        # -- METRICS TAB --
+        tab_metrics = QWidget()
+        metrics_layout = QVBoxLayout(tab_metrics)
+        self.metrics_lbl = QLabel("Waiting for frames...")
+        self.metrics_lbl.setStyleSheet("font-family: Consolas, monospace; font-size: 12px; color: #ddd;")
+        self.metrics_lbl.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        metrics_layout.addWidget(self.metrics_lbl)
+        btn_export = QPushButton("Export Snapshot (metrics.jsonl)")
+        btn_export.clicked.connect(lambda: self.profiler.dump_jsonl("metrics.jsonl"))
+        metrics_layout.addWidget(btn_export)
+        ctrl_tabs.addTab(tab_metrics, "METRICS")
+
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.update_metrics)
+        self.metrics_timer.start(1000)
+
         layout.addWidget(ctrl_tabs)
 
         # Footer
@@ -622,142 +510,194 @@ class MainWindow(QMainWindow):
         layout.addWidget(btn_close)
 
     # ==== LOGIC ====
+    def init_graph(self):
+        global pg, HAS_EXTRAS
+        try:
+            import pyqtgraph as pg
+            HAS_EXTRAS = True
+        except ImportError:
+            print("WARNING: 'pyqtgraph' not found. Graphs disabled.")
+            self.graph_placeholder.setText("Install pyqtgraph to enable graphs.")
+            return
+
+        self.plot_widget = pg.PlotWidget(title="EMOTION TIMELINE")
+        self.plot_widget.setBackground('#1a1a1d') # Matches groupbox bg roughly
+        self.plot_widget.setYRange(0, 7) # 7 emotions
+        # Use fixed Y-Axis Labels
+        self.plot_widget.getAxis('left').setTicks([[(i, e) for i, e in enumerate(GRAPH_LABELS)]])
+        self.curve = self.plot_widget.plot(pen=pg.mkPen('#00e676', width=2))
+        self.graph_layout.replaceWidget(self.graph_placeholder, self.plot_widget)
+        self.graph_placeholder.deleteLater()
+
+    def update_ai_state(self, state):
+        if state == "ready":
+            load_s = self.worker.pipeline.inference.load_ms / 1000.0
+            self.ai_state_lbl.setText(f"AI MODEL: READY (loaded in {load_s:.1f}s)")
+            self.ai_state_lbl.setStyleSheet("font-size: 12px; font-weight: bold; color: #00e676;")
+            self.mark_startup("ai_ready")
+        elif state == "error":
+            self.ai_state_lbl.setText(f"AI MODEL: FAILED {self.worker.pipeline.inference.error}")
+            self.ai_state_lbl.setStyleSheet("font-size: 12px; font-weight: bold; color: #ff5555;")
+        elif state == "failing":
+            self.ai_state_lbl.setText(f"AI MODEL: ERRORS ({self.worker.pipeline.inference.error})")
+            self.ai_state_lbl.setStyleSheet("font-size: 12px; font-weight: bold; color: #ff5555;")
+        elif state == "restarting":
+            self.ai_state_lbl.setText(f"AI MODEL: RESTARTING ({self.worker.pipeline.inference.error})")
+            self.ai_state_lbl.setStyleSheet("font-size: 12px; font-weight: bold; color: #ffa500;")
+        else:
+            self.ai_state_lbl.setText("AI MODEL: LOADING...")
+
+    def mark_startup(self, name):
+        if self.startup is None or name in self.startup: return
+        self.startup[name] = time.time()
+        if name == "first_emotion":
+            # bench_startup.py reads this line, then the window closes itself
+            print("STARTUP " + json.dumps(self.startup), flush=True)
+            self.close()
+
     def toggle_ai(self):
-        self.worker.ai_enabled = not self.worker.ai_enabled
-        if self.worker.ai_enabled:
+        self.worker.pipeline.ai_enabled = not self.worker.pipeline.ai_enabled
+        if self.worker.pipeline.ai_enabled:
             self.btn_ai_toggle.setText("AI: ACTIVE")
             self.btn_ai_toggle.setStyleSheet("background-color: #00ff9d; color: #000; padding: 10px;")
         else:
             self.btn_ai_toggle.setText("AI: STANDBY")
             self.btn_ai_toggle.setStyleSheet("background-color: #444; color: #aaa; padding: 10px;")
-            self.status_display.setText("MANUAL MODE")
+            self.set_text(self.status_display, "MANUAL MODE")
 
     def toggle_gesture(self):
-        self.worker.gesture_enabled = not self.worker.gesture_enabled
-        if self.worker.gesture_enabled:
+        self.worker.pipeline.gesture_enabled = not self.worker.pipeline.gesture_enabled
+        if self.worker.pipeline.gesture_enabled:
             self.btn_gesture.setText("✋ GESTURE CONTROL: ON")
             self.btn_gesture.setStyleSheet("background-color: #00d4ff; color: #000; padding: 8px;")
         else:
             self.btn_gesture.setText("✋ GESTURE CONTROL: OFF")
             self.btn_gesture.setStyleSheet("background-color: #2a2a35; color: #888; padding: 8px;")
 
-    def update_image(self, qimg):
-        self.image_label.setPixmap(QPixmap.fromImage(qimg).scaled(
-            self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+    def update_image(self):
+        frame = self.worker.frames.acquire()
+        if frame is None: return # no new frame since last tick
+        if self.startup is not None: self.mark_startup("first_frame")
+        t = time.perf_counter()
+        h, w, ch = frame.shape
+        # QImage wraps the front buffer without copying; the worker won't touch it until next acquire
+        qimg = QImage(frame.data, w, h, ch * w, QImage.Format.Format_BGR888)
+        self.image_label.setPixmap(QPixmap.fromImage(qimg.scaled(
+            self.image_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)))
+        self.profiler.lap("display", t)
+
+    def update_preview(self):
+        t = time.perf_counter()
+        control = self.control
+        if control.mode_seq != self.mode_seq:
+            self.mode_seq = control.mode_seq
+            self.renderer.set_pattern(control.mode)
+        if control.speed != self.speed:
+            self.speed = control.speed
+            self.renderer.frame_ms = self.speed + 1
+        frame = self.renderer.render(1)[0]
+        for streamer in self.streamers: streamer.push(frame)
+        h, w, ch = frame.shape
+        qimg = QImage(frame.data, w, h, ch * w, QImage.Format.Format_RGB888)
+        self.preview_lbl.setPixmap(QPixmap.fromImage(qimg.scaled(
+            self.preview_lbl.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.FastTransformation)))
+        self.set_text(self.preview_mode_lbl, f"MODE: {self.renderer.mode.upper()}")
+        self.profiler.lap("render", t)
+
+    def toggle_stream(self, checked):
+        self.control.streaming = checked
+        if checked:
+            self.streamers = [FrameStreamer(urlsplit(link.url).hostname, fps=RENDER_FPS) for link in self.lamp.links]
+            for streamer in self.streamers: streamer.start()
+        else:
+            for streamer in self.streamers: streamer.stop()
+            self.streamers = []
+            self.lamp.send_mode(self.renderer.mode) # hand the LEDs back to the firmware patterns
+
+    # ==== TELEMETRY (UI_RATE) ====
+    def set_text(self, widget, text):
+        if self.shown.get(id(widget)) != text:
+            self.shown[id(widget)] = text
+            widget.setText(text)
+
+    def set_style(self, widget, css):
+        # Stylesheet re-parsing is expensive: only when the look really changes
+        key = (id(widget), "css")
+        if self.shown.get(key) != css:
+            self.shown[key] = css
+            widget.setStyleSheet(css)
+
+    def update_telemetry(self):
+        rec = self.worker.telemetry.poll()
+        if rec is None: return
+        if rec.emotions and self.startup is not None: self.mark_startup("first_emotion")
+
+        for emo, bar in self.emotion_bars.items():
+            val = int(rec.emotions.get(emo, 0)) if rec.emotions else bar.value()
+            if val != bar.value(): bar.setValue(val)
+
+        if self.worker.pipeline.ai_enabled:
+            self.set_text(self.status_display, rec.status)
+            if rec.gesture:
+                self.set_style(self.status_display, f"font-size: 32px; font-weight: 900; color: {rec.color}; background: #111; padding: 15px; border: 2px solid {rec.color}; border-radius: 8px;")
+            else:
+                self.set_style(self.status_display, f"font-size: 32px; font-weight: 900; color: {rec.color}; background: #1e1e24; padding: 15px; border-radius: 8px;")
 
-    def update_stats(self, emotions, dominant, sys_stats):
-        if emotions:
-            for emo, bar in self.emotion_bars.items():
-                val = emotions.get(emo, 0)
-                bar.setValue(int(val))
+        self.set_text(self.sys_lbl, f"CPU: {rec.cpu}% | FPS: {rec.fps} | AI: {int(rec.inference_ms)}ms every {int(rec.interval_ms)}ms | Energy: {int(rec.energy)} | Faces: {rec.faces} | Cache: {rec.cache_hit_rate:.0%}")
+        self.update_graph(rec.dominant)
 
-        if self.worker.ai_enabled:
-            
-            # --- DECISION LOGIC: GESTURE vs AI ---
-            if sys_stats.get("gesture_active", False):
-                # Gesture Override active
-                brightness = sys_stats["gesture_bri"]
-                speed = sys_stats["gesture_spd"]
-                
-                # Get FX from pool based on hand X position
-                fx_pool = EMOTION_FX_POOL.get(dominant, ["neutral"])
-                fx_idx = sys_stats.get("gesture_fx", 0)
-                selected_fx = fx_pool[min(fx_idx, len(fx_pool)-1)]
-                
-                self.trigger_esp32_raw(selected_fx)
-                self.send_setting("brightness", brightness)
-                self.send_setting("speed", speed)
-                
-                # UI Update for Override
-                self.status_display.setText(f"GESTURE: {selected_fx.upper()}")
-                self.status_display.setStyleSheet(f"font-size: 32px; font-weight: 900; color: #00d4ff; background: #111; padding: 15px; border: 2px solid #00d4ff; border-radius: 8px;")
-                
-            else:
-                # Standard AI Logic
-                brightness = 140 if sys_stats["comfort"] else sys_stats.get("brightness", 100)
-                
-                if self.cb_auto_fx.isChecked():
-                    now = time.time()
-                    if (dominant != self.last_sent_emotion) or (now - self.last_fx_change > self.fx_change_interval):
-                        self.last_sent_emotion = dominant
-                        self.last_fx_change = now
-                        
-                        fx_pool = EMOTION_FX_POOL.get(dominant, ["neutral"])
-                        energy = sys_stats.get("energy", 0)
-                        intensity = abs(energy)
-                        idx = int(np.interp(intensity, [0, 100], [0, len(fx_pool)-1]))
-                        selected_fx = fx_pool[idx]
-                        
-                        self.current_fx = selected_fx
-                        self.trigger_esp32_raw(selected_fx)
-                        self.send_setting("brightness", brightness)
-                else:
-                    if dominant != self.last_sent_emotion:
-                        self.last_sent_emotion = dominant
-                        config = EMOTION_MAP.get(dominant, EMOTION_MAP["neutral"])
-                        self.trigger_esp32_raw(config['mode'])
-                        self.send_setting("brightness", brightness)
-                        
-                # UI Update for AI
-                txt = f"COMFORT ({dominant.upper()})" if sys_stats["comfort"] else dominant.upper()
-                col = "#FFA500" if sys_stats["comfort"] else EMOTION_MAP.get(dominant, {}).get("color", "#fff")
-                self.status_display.setText(txt)
-                self.status_display.setStyleSheet(f"font-size: 32px; font-weight: 900; color: {col}; background: #1e1e24; padding: 15px; border-radius: 8px;")
-
-        self.sys_lbl.setText(f"CPU: {sys_stats['cpu']}% | FPS: {sys_stats['fps']} | AI: {int(sys_stats['inference'])}ms | Energy: {int(sys_stats.get('energy',0))}")
-        
     def update_graph(self, emotion):
         if not HAS_EXTRAS or self.curve is None: return
-        # Stable mapping
-        mapping = ["neutral", "happy", "surprise", "sad", "angry", "fear", "disgust"]
-        try: val = mapping.index(emotion)
-        except: val = 0
-        self.graph_data.append(val)
-        self.curve.setData(list(self.graph_data))
+        self.graph_data.append(GRAPH_INDEX.get(emotion, 0))
+        self.curve.setData(self.graph_data.view())
+
+    def update_metrics(self):
+        lamp = self.lamp
+        self.metrics_lbl.setText(self.profiler.format_table() + "\n\n(latency in ms)\n\n"
+            f"LAMPS  merged {lamp.merged} | dropped {lamp.dropped} | rate-limited {self.control.limiter.limited}\n"
+            f"TELEMETRY  published {self.worker.telemetry.published} | skipped by UI {self.worker.telemetry.skipped}\n"
+            + lamp.format_health())
 
     # ==== HANDLERS ====
-    def update_detection_interval(self, value): self.worker.detection_interval = value / 1000.0
-    def update_reactivity(self, value): self.worker.reactivity = value / 10.0
-    def update_decay(self, value): self.worker.decay_rate = value
+    def update_detection_interval(self, value): self.worker.pipeline.detection_interval = value / 1000.0
+    def update_reacquire_interval(self, value): self.worker.pipeline.reacquire_interval = value / 1000.0
+    def update_max_interval(self, value): self.worker.pipeline.scheduler.max_interval = value / 1000.0
+    def update_adaptive(self, checked): self.worker.pipeline.adaptive_detection = checked
+    def update_auto_fx(self, checked): self.control.director.auto_fx = checked
+    def update_reactivity(self, value): self.worker.pipeline.reactivity = value / 10.0
+    def update_decay(self, value): self.worker.pipeline.decay_rate = value
+    def update_aggregation(self, name): self.worker.pipeline.aggregation = name
+    def update_gesture_rate(self, value): self.worker.pipeline.hands.rate = value
     def reset_buffers(self):
-        self.worker.smoothing_buffer.clear()
-        self.worker.emotion_memory.clear()
-        self.worker.emotion_state = 0
-        self.worker.last_mode = "neutral"
-        self.last_sent_emotion = None
-
-    def trigger_esp32_raw(self, mode_name):
-        # Prevent spamming ESP32
-        if time.time() - self.last_api_call < 0.2:
-            return
-
-        self.last_api_call = time.time()
-
-        try:
-            requests.get(
-                f"{BASE_URL}/api/mode", 
-                params={"name": mode_name}, 
-                timeout=0.2 # small timeout
-            )
-        except:
-            pass # silently ignore if not connected
+        self.worker.pipeline.reset()
+        self.control.reset()
 
     def send_setting(self, key, val):
-        try:
-            requests.post(
-                f"{BASE_URL}/api/settings", 
-                json={key: val}, 
-                timeout=0.2
-            )
-        except:
-            pass
+        self.control.send_settings({key: val})
 
     def closeEvent(self, event):
         self.worker.stop()
+        self.lamp.stop()
+        for streamer in self.streamers: streamer.stop()
+        if self.metrics_server: self.metrics_server.stop()
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = MainWindow()
+    parser = argparse.ArgumentParser(description="MoodMatrix AI controller")
+    parser.add_argument("--source", default="0", help="camera index, video file, frame directory or synthetic[:N]")
+    parser.add_argument("--metrics-port", type=int, default=0, help="serve /metrics on 127.0.0.1:PORT (0 = off)")
+    parser.add_argument("--lamp-url", help="single lamp base URL, e.g. a local lamp_emulator.py")
+    parser.add_argument("--lamps", default=LAMPS_FILE, help="JSON file listing several lamps")
+    parser.add_argument("--detector", choices=sorted(DETECTOR_WIDTH), default=None, help="face detector backend (default from config)")
+    parser.add_argument("--emotion-backend", choices=sorted(EMOTION_BACKENDS), default=None, help="emotion model backend (default from config)")
+    parser.add_argument("--startup-report", action="store_true", help="print startup timings, quit at the first emotion")
+    args, qt_args = parser.parse_known_args()
+    imports_done = time.time()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    lamps = [{"name": "lamp1", "url": args.lamp_url}] if args.lamp_url else None
+    window = MainWindow(args.source, args.metrics_port, lamps, args.detector, args.startup_report, args.emotion_backend,
+                        args.lamps)
+    if window.startup is not None: window.startup["imports"] = imports_done
     window.show()
     sys.exit(app.exec())
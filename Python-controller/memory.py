@@ -0,0 +1,75 @@
+import collections
+import time
+
+import numpy as np
+
+# ==== EMOTION MEMORY ====
+# Rolling window of emotion labels with running per-label counts, so
+# "what fraction of the window was sad?" is O(1) instead of a scan over the
+# whole deque every frame. The window is bounded by a frame count and,
+# optionally, by age in seconds.
+
+class LabelWindow:
+    def __init__(self, maxlen=600, window_s=None):
+        self.maxlen = maxlen
+        self.window_s = window_s
+        self._items = collections.deque()  # (timestamp, label)
+        self.counts = collections.defaultdict(int)
+
+    def append(self, label, now=None):
+        now = time.time() if now is None else now
+        self._items.append((now, label))
+        self.counts[label] += 1
+
+        items = self._items
+        while len(items) > self.maxlen:
+            self._evict()
+        if self.window_s is not None:
+            cutoff = now - self.window_s
+            while items and items[0][0] < cutoff:
+                self._evict()
+
+    def _evict(self):
+        _, label = self._items.popleft()
+        self.counts[label] -= 1
+
+    def count(self, label):
+        return self.counts.get(label, 0)
+
+    def fraction(self, label):
+        n = len(self._items)
+        return self.counts.get(label, 0) / n if n else 0.0
+
+    def clear(self):
+        self._items.clear()
+        self.counts.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+# ==== SCROLLING PLOT BUFFER ====
+# Fixed-size NumPy ring for the timeline graph. Every value is written twice
+# (at i and i + size), so the last `size` samples are always one contiguous
+# slice: view() is a zero-copy array in oldest -> newest order.
+
+class ScrollBuffer:
+    def __init__(self, size, dtype=np.float32):
+        self.size = size
+        self._data = np.zeros(2 * size, dtype=dtype)
+        self._i = 0
+        self.count = 0
+
+    def append(self, value):
+        self._data[self._i] = value
+        self._data[self._i + self.size] = value
+        self._i = (self._i + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def view(self):
+        end = self._i + self.size
+        return self._data[end - self.count:end]
+
+    def clear(self):
+        self._i = 0
+        self.count = 0
@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+# ==== HOT-PATH METRICS ====
+# Per-stage latency samples (milliseconds) kept in fixed-size ring buffers, so
+# recording is an O(1) store with no allocation. Percentiles are computed
+# only when somebody asks (UI refresh, export, /metrics scrape).
+#
+#   t = time.perf_counter()
+#   ... stage work ...
+#   t = profiler.lap("tracker", t)      # records and restarts the clock
+#
+#   with profiler.span("draw"):         # or as a (non-reentrant) context
+#       ...
+
+QUANTILES = (50, 95, 99)
+
+class RingHistogram:
+    def __init__(self, size=1024):
+        self.samples = np.zeros(size, dtype=np.float64)
+        self.size = size
+        self.index = 0
+        self.count = 0      # lifetime totals (for Prometheus _count/_sum)
+        self.total = 0.0
+        self.last = 0.0
+
+    def add(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count += 1
+        self.total += value
+        self.last = value
+
+    def values(self):
+        return self.samples[:min(self.count, self.size)]
+
+    def summary(self):
+        window = self.values()
+        if window.size == 0:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "count": 0, "sum": 0.0, "last": 0.0}
+        p50, p95, p99 = np.percentile(window, QUANTILES)
+        return {"p50": float(p50), "p95": float(p95), "p99": float(p99),
+                "count": self.count, "sum": self.total, "last": self.last}
+
+class _Span:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+        self.t0 = 0.0
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.add((time.perf_counter() - self.t0) * 1000.0)
+        return False
+
+class StageProfiler:
+    def __init__(self, size=1024):
+        self.size = size
+        self.enabled = True
+        self.stages = {}   # name -> RingHistogram, insertion ordered
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def _hist(self, name):
+        hist = self.stages.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.stages.setdefault(name, RingHistogram(self.size))
+        return hist
+
+    def record(self, name, ms):
+        if self.enabled:
+            self._hist(name).add(ms)
+
+    def lap(self, name, t0):
+        now = time.perf_counter()
+        if self.enabled:
+            self._hist(name).add((now - t0) * 1000.0)
+        return now
+
+    def span(self, name):
+        span = self._spans.get(name)
+        if span is None:
+            span = self._spans[name] = _Span(self._hist(name))
+        return span
+
+    def snapshot(self):
+        with self._lock:
+            items = list(self.stages.items())
+        return {name: hist.summary() for name, hist in items}
+
+    # ==== EXPORT ====
+    def to_jsonl(self):
+        return json.dumps({"ts": time.time(), "stages_ms": self.snapshot()}) + "\n"
+
+    def dump_jsonl(self, path):
+        with open(path, "a") as f:
+            f.write(self.to_jsonl())
+
+    def to_prometheus(self, prefix="moodmatrix"):
+        metric = f"{prefix}_stage_latency_ms"
+        lines = [f"# HELP {metric} Per-stage latency of the MoodMatrix hot path",
+                 f"# TYPE {metric} summary"]
+        for name, s in self.snapshot().items():
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{q / 100}"}} {s[f"p{q}"]:.4f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {s["count"]}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {s["sum"]:.4f}')
+        return "\n".join(lines) + "\n"
+
+    def format_table(self):
+        rows = [f"{'STAGE':<10}{'P50':>9}{'P95':>9}{'P99':>9}{'COUNT':>9}"]
+        for name, s in self.snapshot().items():
+            rows.append(f"{name:<10}{s['p50']:>9.2f}{s['p95']:>9.2f}{s['p99']:>9.2f}{s['count']:>9}")
+        return "\n".join(rows)
+
+# ==== LOCAL METRICS ENDPOINT ====
+#   GET /metrics        -> Prometheus text format
+#   GET /metrics.jsonl  -> one JSON line with the current snapshot
+
+class MetricsServer(threading.Thread):
+    def __init__(self, profiler, port=9108, host="127.0.0.1"):
+        super().__init__(daemon=True)
+        prof = profiler
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, ctype = prof.to_prometheus(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.jsonl":
+                    body, ctype = prof.to_jsonl(), "application/x-ndjson"
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
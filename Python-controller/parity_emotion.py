@@ -0,0 +1,82 @@
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from classifier import EMOTION_LABELS, backend_from_spec
+from bench_classifier import load_crops
+
+# ==== EMOTION BACKEND PARITY CHECK ====
+# Runs a fixed set of face crops through DeepFace.analyze() (the reference:
+# what the controller used before the backends) and through each backend,
+# and compares the probabilities. Exits non-zero if any backend falls below
+# --min-agreement (top-1 label match) or above --max-diff (largest absolute
+# probability difference), so it can gate a new export.
+#
+#   python parity_emotion.py --faces path/to/face_crops
+#   python parity_emotion.py --faces crops --backends deepface onnx:models/emotion.onnx onnx:models/emotion_int8.onnx
+#
+# Without --faces it uses seeded random crops: that checks the numbers line
+# up, not accuracy on real faces.
+
+def reference_probs(crops):
+    from deepface import DeepFace
+    out = []
+    for crop in crops:
+        res = DeepFace.analyze(crop, actions=['emotion'], enforce_detection=False,
+                               silent=True, detector_backend='skip')
+        out.append([res[0]['emotion'][k] for k in EMOTION_LABELS])
+    out = np.array(out, dtype=np.float32)
+    return out / out.sum(axis=1, keepdims=True)
+
+def compare(ref, probs):
+    diff = np.abs(ref - probs)
+    return {
+        "agreement": float((ref.argmax(axis=1) == probs.argmax(axis=1)).mean()),
+        "max_diff": float(diff.max()),
+        "mean_diff": float(diff.mean()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Check emotion backends against DeepFace.analyze")
+    parser.add_argument("--faces", help="directory of face crops (seeded random crops if omitted)")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--backends", nargs="+", default=["deepface", "onnx"], help="deepface, onnx or onnx:PATH")
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    parser.add_argument("--max-diff", type=float, default=0.10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    crops = load_crops(args.faces, args.count)
+    ref = reference_probs(crops)
+
+    results, ok = [], True
+    for spec in args.backends:
+        try:
+            clf = backend_from_spec(spec)
+        except (KeyError, ImportError, OSError) as e:
+            results.append({"backend": spec, "error": repr(e), "pass": False})
+            ok = False
+            continue
+        probs = clf.predict(clf.prepare(crops))
+        r = {"backend": spec, **compare(ref, probs)}
+        r["pass"] = r["agreement"] >= args.min_agreement and r["max_diff"] <= args.max_diff
+        ok = ok and r["pass"]
+        results.append(r)
+
+    if args.json:
+        print(json.dumps({"faces": len(crops), "results": results}, indent=2))
+    else:
+        print(f"faces: {len(crops)} ({args.faces or 'synthetic'})")
+        print(f"{'backend':<36}{'top-1 agree':>12}{'max |dp|':>10}{'mean |dp|':>11}")
+        for r in results:
+            if "error" in r:
+                print(f"{r['backend']:<36}  unavailable: {r['error']}  FAIL")
+                continue
+            print(f"{r['backend']:<36}{r['agreement']:>11.1%}{r['max_diff']:>10.4f}{r['mean_diff']:>11.4f}"
+                  f"  {'ok' if r['pass'] else 'FAIL'}")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
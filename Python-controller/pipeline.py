@@ -0,0 +1,369 @@
+import collections
+import time
+
+import cv2
+import numpy as np
+import psutil
+
+from config import EMOTION_MAP, EMOTION_FX_POOL, PERSONALITY_PROFILES, COMFORT_SAD_RATIO, AGGREGATION, DETECTOR, EMOTION_BACKEND, GESTURE_RATE
+from gestures import HandStage, GestureMapper, GESTURE_HOLD, draw_hand
+from face_cache import FaceCache, dhash
+from inference import InferenceStage, roi_box
+from metrics import StageProfiler
+from scheduler import DetectionScheduler
+from tracks import TrackManager, AGGREGATORS
+
+AI_SCALE = 0.7  # face inference and hand tracking both work on this downscaled frame
+
+# ==== EMOTION PIPELINE ====
+# Per-frame logic behind the lamp: gestures, detection/tracking, the energy
+# engine and comfort memory. No Qt in here, so the same code drives the GUI
+# worker (main.py) and the headless runner (headless.py).
+#
+# Every face in view gets its own track (tracks.py) with its own energy and
+# memory; the aggregation policy decides which emotion the lamp shows. Hand
+# tracking runs on its own thread (gestures.HandStage) at its own rate.
+
+class FrameResult:
+    __slots__ = ("emotions", "dominant", "sys_stats", "people")
+
+    def __init__(self, emotions, dominant, sys_stats, people=()):
+        self.emotions = emotions
+        self.dominant = dominant
+        self.sys_stats = sys_stats
+        self.people = people  # [{"id", "box", "label", "energy", "comfort"}, ...]
+
+class EmotionPipeline:
+    def __init__(self):
+        self.last_mode = "neutral"
+        self.personality = "Stable"
+        self.smoothing_buffer = collections.deque(maxlen=6)
+
+        # Flags
+        self.ai_enabled = True
+        self.gesture_enabled = False # Toggle state
+
+        # Emotional Energy (per person, in self.tracks; this is the aggregate)
+        self.emotion_state = 0.0
+        self.decay_rate = 5.0
+        self.reactivity = 0.3
+
+        # AI Params
+        self.detection_interval = 0.4  # base interval; the scheduler stretches/shrinks it
+        self.adaptive_detection = True
+        self.scheduler = DetectionScheduler()
+        self.current_interval = self.detection_interval
+        self.conf_threshold = 25
+        self.reactive_mode = False
+        self.inference_workers = 1     # DeepFace processes (each loads its own model)
+        self.detector = DETECTOR       # detectors.py backend used by the pool
+        self.emotion_backend = EMOTION_BACKEND  # classifier.py backend used by the pool
+        self.sync_inference = False    # wait for each result (offline runs only)
+        self.inference = None
+        self.reacquire_interval = 2.0  # full-frame detection at least this often
+        self.roi_margin = 0.2          # extra context around the tracked box
+        self.last_full_detection = 0
+        self.face_cache = FaceCache()  # still faces reuse their last emotion instead of a forward pass
+
+        # Tracking: one track per face, each with its own energy and memory
+        self.tracks = TrackManager()
+        self.aggregation = AGGREGATION   # key of tracks.AGGREGATORS
+        self.focus_id = None             # track the lamp currently follows
+        self.frame_count = 0
+        self.last_inference_time = 0
+
+        # Memory
+        self.comfort_ratio = COMFORT_SAD_RATIO
+        self.comfort_mode_active = False
+        self.gesture_lock = False
+
+        # Gesture State
+        self.hands = HandStage(rate=GESTURE_RATE)  # set .rate to change the gesture update rate
+        self.gesture_map = GestureMapper()
+        self.hand_seq = 0              # last hand sample applied
+        self.gesture_active = False
+        self.gesture_brightness = 100
+        self.gesture_speed = 20
+        self.gesture_fx_index = 0
+
+        # Metrics
+        self.fps_start_time = time.time()
+        self.fps_counter = 0
+        self.current_fps = 0
+        self.inference_time = 0
+        self.inference_count = 0
+        self.feed_count = 0  # emotion results fed to the energy engine (model or face cache)
+        self.profiler = StageProfiler()
+
+    def start(self):
+        # Models load in the background: the pool processes build and warm up
+        # the detector + emotion CNN, the hand stage loads MediaPipe on its
+        # thread. Frames flow (tracking, drawing) straight away; inference
+        # starts once ready.
+        self.inference = InferenceStage(workers=self.inference_workers, detector=self.detector,
+                                        emotion_backend=self.emotion_backend)
+        self.inference.start()
+        self.hands.start()
+        if self.sync_inference: self.inference.wait_ready()
+
+    @property
+    def ai_state(self):
+        # "loading" until a pool process has its models warm, then "ready" (or "error";
+        # "restarting" while a crashed process is replaced, "failing" while the models error out)
+        return self.inference.state if self.inference else "loading"
+
+    def close(self):
+        if self.inference: self.inference.stop()
+        self.hands.stop()
+
+    def process(self, frame, now=None):
+        # Runs one frame through the engine and annotates it in place.
+        # Returns a FrameResult while a face is known, else None.
+        self.frame_count += 1
+        prof = self.profiler
+        t = time.perf_counter()
+
+        now = time.time() if now is None else now
+        small_frame = None  # one downscaled copy per frame, shared by the hand and face stages
+
+        # ================= 1. GESTURE CONTROL ENGINE =================
+        # The hand stage gets the newest frame when it is due and publishes
+        # landmarks on its own; here we only apply samples that have arrived.
+        self.gesture_active = False
+        hand = None
+        if self.gesture_enabled and self.hands.ready:
+            if self.hands.due(now):
+                small_frame = cv2.resize(frame, (0, 0), fx=AI_SCALE, fy=AI_SCALE)
+                self.hands.push(small_frame, now)
+            hand = self.hands.latest
+            if hand is not None and hand.landmarks is not None and now - hand.t < GESTURE_HOLD:
+                self.gesture_active = True
+                if hand.seq != self.hand_seq:
+                    self.hand_seq = hand.seq
+                    self.tracks.nudge(self.gesture_map.update(hand))
+                    self.gesture_brightness = self.gesture_map.brightness
+                    self.gesture_speed = self.gesture_map.speed
+                    self.gesture_fx_index = self.gesture_map.fx_index
+                    prof.record("hands", hand.latency_ms)
+            t = prof.lap("gesture", t)
+
+        # ================= 2. DETECTION ENGINE =================
+        # Trackers follow every face at camera rate; DeepFace runs in the pool
+        tracks = self.tracks
+        if tracks.tracks:
+            tracks.follow(frame)
+            t = prof.lap("tracker", t)
+
+        focus = tracks.get(self.focus_id)
+        if self.adaptive_detection:
+            self.current_interval = self.scheduler.update(
+                frame, focus.box if focus else None, bool(focus and focus.tracking), self.last_mode, now, self.detection_interval)
+        else:
+            self.current_interval = self.detection_interval
+        t = prof.lap("schedule", t)
+
+        if now - self.last_inference_time > self.current_interval and self.inference.idle:
+            scale_factor_ai = AI_SCALE
+            if small_frame is None: small_frame = cv2.resize(frame, (0, 0), fx=AI_SCALE, fy=AI_SCALE)
+
+            # Fast path: every tracker is healthy -> classify the tracked boxes, skip detection
+            rois = None
+            if tracks.all_tracking and now - self.last_full_detection < self.reacquire_interval:
+                rois = [roi_box(small_frame.shape, tuple(int(v * scale_factor_ai) for v in tr.box), self.roi_margin)
+                        for tr in tracks.tracks]
+                if any(r is None for r in rois): rois = None
+
+            if rois is not None:
+                ids, hashes = [tr.id for tr in tracks.tracks], [None] * len(rois)
+                if self.face_cache.enabled:
+                    # Cache hits feed the energy engine right away; only misses go to the model
+                    misses = []
+                    for i, (x, y, w, h) in enumerate(rois):
+                        hashes[i] = dhash(small_frame[y:y + h, x:x + w])
+                        emotions = self.face_cache.get(hashes[i], now)
+                        if emotions is None:
+                            misses.append(i)
+                        else:
+                            tracks.tracks[i].feed(emotions, self.reactivity, self.decay_rate)
+                            self.feed_count += 1
+                    ids, hashes, rois = [ids[i] for i in misses], [hashes[i] for i in misses], [rois[i] for i in misses]
+                if rois:
+                    meta = {"scale": scale_factor_ai, "roi": True, "tracks": ids, "hashes": hashes}
+                    submitted = self.inference.submit(small_frame, meta, boxes=rois)
+                else:
+                    submitted = True  # every face came from the cache
+            else:
+                submitted = self.inference.submit(small_frame, {"scale": scale_factor_ai, "roi": False})
+                if submitted: self.last_full_detection = now
+            if submitted: self.last_inference_time = now
+            t = prof.lap("submit", t)
+
+        pending = self.sync_inference and self.ai_state == "ready" and not self.inference.idle
+        result = self.inference.poll(timeout=30.0 if pending else 0.0)
+        t = prof.lap("poll", t)
+        if result is not None:
+            self.inference_time = result.inference_ms
+            self.inference_count += 1
+            prof.record("deepface", result.inference_ms)
+            if result.meta["roi"]:
+                # ROI results keep the trackers' boxes as-is
+                owners = [tracks.get(tid) for tid in result.meta["tracks"]]
+            else:
+                # Detections are a few frames old; matched trackers re-lock on the current frame
+                coord_scale = 1.0 / result.meta["scale"]
+                boxes = [tuple(int(res['region'][k] * coord_scale) for k in ("x", "y", "w", "h"))
+                         for res in result.faces]
+                owners = tracks.associate(frame, boxes)
+            for track, res in zip(owners, result.faces):
+                if track is None: continue
+                track.feed(res['emotion'], self.reactivity, self.decay_rate)
+                self.feed_count += 1
+            for h, res in zip(result.meta.get("hashes", ()), result.faces):
+                if h is not None: self.face_cache.put(h, res['emotion'], now)
+            t = prof.lap("associate", t)
+
+        # ================= 3. OUTPUT LOGIC =================
+        frame_result = None
+        if tracks.tracks:
+
+            current_profile = PERSONALITY_PROFILES.get(self.personality, PERSONALITY_PROFILES["Stable"])
+
+            # Per-person label + comfort memory, then one emotion for the lamp
+            for track in tracks.tracks: track.remember(now, self.comfort_ratio)
+            aggregate = AGGREGATORS.get(self.aggregation, AGGREGATORS["dominant"])
+            most_common, self.emotion_state, emotions, comfort, focus = aggregate(tracks.tracks)
+            self.comfort_mode_active = comfort
+            self.focus_id = focus.id if focus else None
+
+            if most_common != self.last_mode:
+                self.last_mode = most_common
+
+            people = [{"id": tr.id, "box": tr.box, "label": tr.label, "energy": tr.energy, "comfort": tr.comfort}
+                      for tr in tracks.tracks]
+
+            # Prepare System Stats
+            sys_stats = {
+                "cpu": psutil.cpu_percent(),
+                "fps": self.current_fps,
+                "inference": self.inference_time,
+                "interval": self.current_interval * 1000,
+                "comfort": self.comfort_mode_active,
+                "energy": self.emotion_state,
+                "faces": len(people),
+                "feeds": self.feed_count,
+                "cache_hits": self.face_cache.hits,
+                "cache_misses": self.face_cache.misses,
+                "cache_hit_rate": self.face_cache.hit_rate,
+                # Gesture Data Overrides
+                "gesture_active": self.gesture_active,
+                "gesture_bri": self.gesture_brightness,
+                "gesture_spd": self.gesture_speed,
+                "gesture_fx": self.gesture_fx_index
+            }
+            frame_result = FrameResult(emotions, most_common, sys_stats, people)
+            t = prof.lap("energy", t)
+
+            # Draw UI: every person, the one driving the lamp in bold
+            for tr in tracks.tracks:
+                x, y, w, h = tr.box
+                color = (0, 255, 157) if not tr.comfort else (0, 165, 255)
+                if tr is not focus: color = tuple(c // 2 for c in color)
+                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2 if tr is focus else 1)
+                cv2.putText(frame, f"#{tr.id} {tr.label.upper()} ({int(tr.energy)})", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2 if tr is focus else 1)
+            prof.lap("draw", t)
+        else:
+            self.focus_id = None
+
+        # Hand overlay last, so the trackers never see it
+        if self.gesture_active:
+            draw_hand(frame, hand.landmarks, self.hands.connections)
+            cv2.putText(frame, f"BRIGHT: {self.gesture_brightness}", (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+            cv2.putText(frame, f"SPEED: {self.gesture_speed}ms", (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+
+        # FPS
+        self.fps_counter += 1
+        if time.time() - self.fps_start_time > 1.0:
+            self.current_fps = self.fps_counter
+            self.fps_counter = 0
+            self.fps_start_time = time.time()
+
+        return frame_result
+
+    def reset(self):
+        self.smoothing_buffer.clear()
+        self.tracks.clear()
+        self.face_cache.clear()
+        self.gesture_map.reset()
+        self.focus_id = None
+        self.emotion_state = 0
+        self.last_mode = "neutral"
+        self.scheduler.reset()
+
+# ==== LAMP DIRECTOR ====
+# Turns each FrameResult into lamp commands: gesture override, auto FX
+# rotation from the emotion's FX pool, or the plain emotion mode. Also
+# produces the status line the GUI shows for it.
+
+class LampDecision:
+    __slots__ = ("mode", "settings", "status", "color", "gesture")
+
+    def __init__(self, mode, settings, status, color, gesture):
+        self.mode = mode          # firmware pattern name to send, or None
+        self.settings = settings  # {"brightness": .., "speed": ..} to send, or None
+        self.status = status
+        self.color = color
+        self.gesture = gesture
+
+class LampDirector:
+    def __init__(self):
+        self.auto_fx = True
+        self.last_sent_emotion = None
+        self.current_fx = None
+        self.last_fx_change = 0
+        self.fx_change_interval = 8
+
+    def decide(self, dominant, sys_stats, now=None):
+        now = time.time() if now is None else now
+        mode, settings = None, None
+
+        # --- DECISION LOGIC: GESTURE vs AI ---
+        if sys_stats.get("gesture_active", False):
+            # Get FX from pool based on hand X position
+            fx_pool = EMOTION_FX_POOL.get(dominant, ["neutral"])
+            fx_idx = sys_stats.get("gesture_fx", 0)
+            selected_fx = fx_pool[min(fx_idx, len(fx_pool)-1)]
+
+            mode = selected_fx
+            settings = {"brightness": sys_stats["gesture_bri"], "speed": sys_stats["gesture_spd"]}
+            return LampDecision(mode, settings, f"GESTURE: {selected_fx.upper()}", "#00d4ff", True)
+
+        # Standard AI Logic
+        brightness = 140 if sys_stats["comfort"] else sys_stats.get("brightness", 100)
+
+        if self.auto_fx:
+            if (dominant != self.last_sent_emotion) or (now - self.last_fx_change > self.fx_change_interval):
+                self.last_sent_emotion = dominant
+                self.last_fx_change = now
+
+                fx_pool = EMOTION_FX_POOL.get(dominant, ["neutral"])
+                energy = sys_stats.get("energy", 0)
+                intensity = abs(energy)
+                idx = int(np.interp(intensity, [0, 100], [0, len(fx_pool)-1]))
+                selected_fx = fx_pool[idx]
+
+                self.current_fx = selected_fx
+                mode = selected_fx
+                settings = {"brightness": brightness}
+        else:
+            if dominant != self.last_sent_emotion:
+                self.last_sent_emotion = dominant
+                config = EMOTION_MAP.get(dominant, EMOTION_MAP["neutral"])
+                mode = config['mode']
+                settings = {"brightness": brightness}
+
+        txt = f"COMFORT ({dominant.upper()})" if sys_stats["comfort"] else dominant.upper()
+        col = "#FFA500" if sys_stats["comfort"] else EMOTION_MAP.get(dominant, {}).get("color", "#fff")
+        return LampDecision(mode, settings, txt, col, False)
+
+    def reset(self):
+        self.last_sent_emotion = None
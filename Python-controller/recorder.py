@@ -0,0 +1,276 @@
+import argparse
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+try: import fcntl
+except ImportError: fcntl = None  # Windows: a segment that is still mapped cannot be removed anyway
+
+from config import EMOTION_FX_POOL, EMOTION_MAP, RECORD_DIR, RECORD_KEEP, RECORD_SEGMENT
+from classifier import EMOTION_LABELS
+
+# ==== SESSION RECORDER ====
+# Everything the worker computes per face frame, kept for the whole session
+# instead of the last few hundred entries. Records are fixed-width (RECORD
+# below, 64 bytes) and go into a preallocated, memory-mapped segment file:
+# one struct.pack_into() into the mapping plus an 8-byte count update, no
+# allocation, no syscall, about a microsecond. The OS writes the pages back;
+# a crash loses nothing the count already covers.
+#
+# A segment holds RECORD_SEGMENT records (about 2.4 h at 30 fps); then the
+# recorder rotates to a new file and keeps the newest RECORD_KEEP segments.
+# The next file is allocated on a helper thread PREPARE_AHEAD records before
+# the switch, so rotation is a pointer swap on the frame path too.
+# Several recorders can share a directory (GUI + headless, say): session ids
+# carry the pid, files are created exclusively, and a writer holds a shared
+# flock on its open segments so pruning never removes a live one.
+#
+# Segment layout: a 4096-byte header (magic, record count, capacity, then a
+# JSON block with the dtype, the emotion labels and the FX name table), then
+# the records. read_segment() maps the file and returns the records as a NumPy
+# structured array view; nothing is parsed per record.
+#
+#   python recorder.py sessions/                  # summary of the newest session
+#   python recorder.py sessions/ --plot           # energy / emotions over the whole session
+
+MAGIC = b"MMREC001"
+HEADER_SIZE = 4096
+PREPARE_AHEAD = 1024  # records before the end of a segment to allocate the next one
+_COUNTS = struct.Struct("<8sQQ")  # magic, count, capacity
+
+# Every effect name the director can pick, in a fixed order (index stored per record)
+FX_NAMES = ("",) + tuple(sorted({fx for pool in EMOTION_FX_POOL.values() for fx in pool} |
+                               {cfg["mode"] for cfg in EMOTION_MAP.values()}))
+FX_INDEX = {name: i for i, name in enumerate(FX_NAMES)}
+LABEL_INDEX = {name: i for i, name in enumerate(EMOTION_LABELS)}
+
+# (field, struct code, NumPy type): the two views of one little-endian, packed record
+_FIELDS = (
+    ("t", "d", "<f8"),              # time.time()
+    ("probs", "7f", ("<f4", (7,))),  # emotion probabilities, EMOTION_LABELS order, 0-1
+    ("energy", "f", "<f4"),
+    ("inference_ms", "f", "<f4"),
+    ("fps", "f", "<f4"),
+    ("cpu", "f", "<f4"),
+    ("feeds", "I", "<u4"),          # emotion results fed to the energy engine so far (cache hits too)
+    ("dominant", "B", "u1"),        # index into EMOTION_LABELS
+    ("fx", "B", "u1"),              # index into FX_NAMES ("" = nothing sent yet)
+    ("comfort", "B", "u1"),
+    ("faces", "B", "u1"),
+    ("gesture", "B", "u1"),         # 1 while a hand is driving the lamp
+    ("gesture_bri", "B", "u1"),
+    ("gesture_spd", "B", "u1"),
+    ("gesture_fx", "B", "u1"),
+)
+RECORD = np.dtype([(name, dt) for name, _, dt in _FIELDS])
+_PACK = struct.Struct("<" + "".join(code for _, code, _ in _FIELDS))
+assert RECORD.itemsize == _PACK.size == 64
+
+def _in_use(path):
+    # True while some recorder holds the segment open (its shared flock)
+    if fcntl is None: return False
+    try:
+        with open(path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError: return True
+    except OSError: return False
+    return False
+
+class SessionRecorder:
+    def __init__(self, directory=RECORD_DIR, segment_records=RECORD_SEGMENT, keep=RECORD_KEEP):
+        self.directory = directory
+        self.segment_records = segment_records
+        self.keep = keep
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.segment = 0
+        self.path = None
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._next = None      # (path, file, map) allocated ahead of rotation
+        self._preparing = None
+
+        # Counters
+        self.records = 0
+        self.rotations = 0
+
+    def _create(self, segment):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"session-{self.session}-{segment:04d}.mmr")
+        size = HEADER_SIZE + self.segment_records * RECORD.itemsize
+        f = open(path, "x+b")  # never another recorder's file
+        if fcntl: fcntl.flock(f, fcntl.LOCK_SH)  # released by close()
+        try: os.posix_fallocate(f.fileno(), 0, size)  # real blocks, no ENOSPC mid-session
+        except (AttributeError, OSError): f.truncate(size)
+        m = mmap.mmap(f.fileno(), size)
+
+        meta = json.dumps({"dtype": RECORD.descr, "labels": EMOTION_LABELS, "fx": FX_NAMES,
+                           "session": self.session, "segment": segment}).encode()
+        m[_COUNTS.size:_COUNTS.size + len(meta)] = meta
+        _COUNTS.pack_into(m, 0, MAGIC, 0, self.segment_records)
+        return path, f, m
+
+    def _prepare(self):
+        self._next = self._create(self.segment + 1)
+
+    def _rotate(self):
+        if self._preparing: self._preparing.join()
+        self._preparing = None
+        nxt, self._next = self._next, None
+        old = (self._file, self._map)
+        self.segment += 1
+        self.path, self._file, self._map = nxt or self._create(self.segment)
+        self._count = 0
+        if old[1] is None:
+            self._prune()
+            return
+        # Flushing 16 MB of dirty pages takes milliseconds: not on the frame path
+        self.rotations += 1
+        threading.Thread(target=self._retire, args=old, name="recorder-retire", daemon=True).start()
+
+    def _retire(self, f, m):
+        os.fsync(f.fileno())  # writes the mapped pages too; unlike mmap.flush() it releases the GIL
+        m.close()
+        f.close()
+        self._prune()
+
+    def _prune(self):
+        if not self.keep: return
+        ahead = self._next[0] if self._next else None  # allocated, nothing in it yet
+        segments = sorted(p for p in glob.glob(os.path.join(self.directory, "session-*.mmr")) if p != ahead)
+        for path in segments[:-self.keep]:
+            if _in_use(path): continue  # still being written, by us or another recorder
+            try: os.remove(path)
+            except OSError: pass
+
+    def append(self, result, fx=None, t=None):
+        # result: pipeline.FrameResult; fx: the effect the lamp is showing
+        if self._count >= self.segment_records or self._map is None:
+            self._rotate()
+        elif self._count == self.segment_records - PREPARE_AHEAD:
+            self._preparing = threading.Thread(target=self._prepare, name="recorder-prepare", daemon=True)
+            self._preparing.start()
+
+        e, s = result.emotions, result.sys_stats
+        _PACK.pack_into(
+            self._map, HEADER_SIZE + self._count * RECORD.itemsize,
+            time.time() if t is None else t,
+            e.get("angry", 0.0) * 0.01, e.get("disgust", 0.0) * 0.01, e.get("fear", 0.0) * 0.01,
+            e.get("happy", 0.0) * 0.01, e.get("sad", 0.0) * 0.01, e.get("surprise", 0.0) * 0.01,
+            e.get("neutral", 0.0) * 0.01,
+            s["energy"], s["inference"], s["fps"], s["cpu"], s.get("feeds", 0) & 0xFFFFFFFF,
+            LABEL_INDEX.get(result.dominant, 6), FX_INDEX.get(fx, 0), s["comfort"], min(255, s.get("faces", 0)),
+            s.get("gesture_active", False), s.get("gesture_bri", 0), s.get("gesture_spd", 0), s.get("gesture_fx", 0),
+        )
+        self._count += 1
+        struct.pack_into("<Q", self._map, 8, self._count)  # publish the record
+        self.records += 1
+
+    def close(self):
+        if self._map is not None:
+            self._retire(self._file, self._map)
+            self._map = self._file = None
+        # A segment allocated ahead but never written is removed again
+        if self._preparing: self._preparing.join()
+        self._preparing = None
+        if self._next:
+            path, f, m = self._next
+            m.close()
+            f.close()
+            os.remove(path)
+            self._next = None
+
+# ==== READER ====
+def _dtype(descr):
+    # JSON header dtype -> np.dtype; older segments carry other fields (e.g. "seq"
+    # before "feeds"), so the header, not RECORD, describes the records
+    return np.dtype([(f[0], f[1], tuple(f[2])) if len(f) == 3 else tuple(f) for f in descr])
+
+def read_segment(path):
+    # -> (records, meta): a read-only structured array over the mapped file
+    # (only the recorded part) and the header dict
+    with open(path, "rb") as f:
+        head = f.read(HEADER_SIZE)
+        magic, count, capacity = _COUNTS.unpack_from(head)
+        if magic != MAGIC:
+            raise ValueError(f"not a session segment: {path}")
+        meta = json.loads(head[_COUNTS.size:].rstrip(b"\0"))
+        meta["count"], meta["capacity"] = count, capacity
+    dtype = _dtype(meta["dtype"])
+    if count == 0:
+        return np.zeros(0, dtype=dtype), meta
+    records = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+    return records, meta
+
+def list_segments(path, session=None):
+    # A directory (newest session, or `session`), one segment file, or a glob
+    if os.path.isdir(path):
+        segments = sorted(glob.glob(os.path.join(path, "session-*.mmr")))
+        if not segments: return []
+        session = session or os.path.basename(segments[-1]).rsplit("-", 1)[0]
+        if not session.startswith("session-"): session = "session-" + session
+        return [p for p in segments if os.path.basename(p).startswith(session + "-")]
+    return sorted(glob.glob(path))
+
+def read_session(path, session=None):
+    # -> (records, meta) for a whole session; segments are joined (one copy)
+    parts = [read_segment(p) for p in list_segments(path, session)]
+    if not parts: raise FileNotFoundError(f"no session segments in {path}")
+    records = parts[0][0] if len(parts) == 1 else np.concatenate([r for r, _ in parts])
+    return records, parts[-1][1]
+
+def summary(records, meta):
+    if len(records) == 0:
+        return {"records": 0}
+    t = records["t"]
+    labels = np.bincount(records["dominant"], minlength=len(meta["labels"]))
+    fx = records["fx"]
+    return {
+        "records": int(len(records)),
+        "duration_s": float(t[-1] - t[0]),
+        "start": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t[0])),
+        "labels": {name: round(float(n) / len(records), 3) for name, n in zip(meta["labels"], labels) if n},
+        "fx_changes": int(np.count_nonzero(fx[1:] != fx[:-1])),
+        "comfort_s": float(np.sum(np.diff(t)[records["comfort"][:-1] > 0])),
+        "energy_mean": float(records["energy"].mean()),
+        "inference_ms_p95": float(np.percentile(records["inference_ms"], 95)),
+    }
+
+def plot(records, meta):
+    import pyqtgraph as pg
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication([])
+    win = pg.GraphicsLayoutWidget(title="MoodMatrix session")
+    t = records["t"] - records["t"][0]
+    energy = win.addPlot(row=0, col=0, title="Energy")
+    energy.plot(t, records["energy"], pen=pg.mkPen('#00d4ff', width=1))
+    probs = win.addPlot(row=1, col=0, title="Emotions")
+    probs.addLegend()
+    probs.setXLink(energy)
+    for i, name in enumerate(meta["labels"]):
+        color = EMOTION_MAP.get(name, {}).get("color", "#888888")
+        probs.plot(t, records["probs"][:, i], pen=pg.mkPen(color), name=name)
+    for p in (energy, probs): p.setDownsampling(auto=True, mode="peak"); p.setClipToView(True)
+    win.resize(1200, 700)
+    win.show()
+    app.exec()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded MoodMatrix sessions")
+    parser.add_argument("path", nargs="?", default=RECORD_DIR, help="session directory, segment file or glob")
+    parser.add_argument("--session", help="session id (default: the newest in the directory)")
+    parser.add_argument("--plot", action="store_true", help="plot energy and emotions over the session")
+    args = parser.parse_args()
+
+    records, meta = read_session(args.path, args.session)
+    print(json.dumps({"session": meta.get("session"), **summary(records, meta)}, indent=2))
+    if args.plot and len(records): plot(records, meta)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+import colorsys
+
+import numpy as np
+
+# ==== HOST-SIDE PATTERN RENDERER ====
+# NumPy port of the MoodMatrix.ino pattern library, used for the GUI preview
+# and as the frame source for the UDP stream. Every pattern works on whole
+# (H, W, 3) pixel grids at once; stateless "field" patterns also render many
+# frames per call by broadcasting over a time axis.
+#
+# Coordinates are virtual lamp units (0..8 across, like the firmware's 8x8),
+# so a 32x32 or 64x64 matrix shows the same pattern at a higher resolution.
+#
+#   r = PatternRenderer(32, 32)
+#   r.set_pattern("aurora")
+#   frames = r.render(60)        # (60, 32, 32, 3) uint8 RGB, row-major
+#   leds = r.strip(frames)       # (60, 1024, 3) in LED wiring order
+
+MATRIX = 8            # firmware matrix size = virtual coordinate range
+FRAME_MS = 21         # firmware frame period at the default gSpeed (20) -> '>' check
+TRANSITION_FRAMES = 16
+PALETTE_BLEND = 0.25  # per-frame step of the palette cross-fade
+
+# ==== LED WIRING ====
+def xy_index(width, height, serpentine=False):
+    # Same mapping as XY() in the firmware: LED index of every (y, x)
+    y, x = np.indices((height, width))
+    if serpentine:
+        x = np.where(y & 1, width - 1 - x, x)
+    return y * width + x
+
+# ==== PALETTES (FastLED 16-entry palettes, expanded to 256-entry LUTs) ====
+def _hex(*colors):
+    return np.array([[(c >> 16) & 255, (c >> 8) & 255, c & 255] for c in colors], dtype=np.float32)
+
+PALETTES16 = {
+    "rainbow": _hex(0xFF0000, 0xD52A00, 0xAB5500, 0xAB7F00, 0xABAB00, 0x56D500, 0x00FF00, 0x00D52A,
+                    0x00AB55, 0x0056AA, 0x0000FF, 0x2A00D5, 0x5500AB, 0x7F0081, 0xAB0055, 0xD5002B),
+    "party":   _hex(0x5500AB, 0x84007C, 0xB5004B, 0xE5001B, 0xE81700, 0xB84700, 0xAB7700, 0xABAB00,
+                    0xAB5500, 0xDD2200, 0xF2000E, 0xC2003E, 0x8F0071, 0x5F00A1, 0x2F00D0, 0x0007F9),
+    "ocean":   _hex(0x191970, 0x00008B, 0x191970, 0x000080, 0x00008B, 0x0000CD, 0x2E8B57, 0x008080,
+                    0x5F9EA0, 0x0000FF, 0x008B8B, 0x6495ED, 0x7FFFD4, 0x2E8B57, 0x00FFFF, 0x87CEFA),
+    "lava":    _hex(0x000000, 0x800000, 0x000000, 0x800000, 0x8B0000, 0x8B0000, 0x800000, 0x8B0000,
+                    0x8B0000, 0x8B0000, 0xFF0000, 0xFFA500, 0xFFFFFF, 0xFFA500, 0xFF0000, 0x8B0000),
+    "forest":  _hex(0x006400, 0x006400, 0x556B2F, 0x006400, 0x008000, 0x228B22, 0x6B8E23, 0x008000,
+                    0x2E8B57, 0x66CDAA, 0x32CD32, 0x9ACD32, 0x90EE90, 0x7CFC00, 0x66CDAA, 0x228B22),
+}
+
+def palette_lut(entries):
+    # ColorFromPalette with LINEARBLEND, precomputed for all 256 indices
+    i = np.arange(256)
+    lo = entries[i >> 4]
+    hi = entries[((i >> 4) + 1) % 16]
+    return lo + (hi - lo) * ((i & 15) / 16.0)[:, None].astype(np.float32)
+
+PALETTES = {name: palette_lut(p) for name, p in PALETTES16.items()}
+
+def _heat_lut():
+    # HeatColor(): black -> red -> yellow -> white
+    t = np.arange(256)
+    t192 = ((t * 191) >> 8) + (t > 0)
+    ramp = (t192 & 0x3F) << 2
+    lut = np.zeros((256, 3), dtype=np.float32)
+    hot, mid = (t192 & 0x80) > 0, (t192 & 0x40) > 0
+    lut[:, 0] = np.where(hot | mid, 255, ramp)
+    lut[:, 1] = np.where(hot, 255, np.where(mid, ramp, 0))
+    lut[:, 2] = np.where(hot, ramp, 0)
+    return lut
+
+HEAT = _heat_lut()
+
+# ==== FASTLED MATH ====
+def sin8(x):
+    return np.floor(128 + 127.5 * np.sin(np.asarray(x) * (2 * np.pi / 256)))
+
+_PERM = np.random.default_rng(1337).permutation(256)
+_P = np.concatenate([_PERM, _PERM])
+
+def _grad(h, x, y, z):
+    h = h & 15
+    u = np.where(h < 8, x, y)
+    v = np.where(h < 4, y, np.where((h == 12) | (h == 14), x, z))
+    return np.where(h & 1, -u, u) + np.where(h & 2, -v, v)
+
+def inoise8(x, y=0.0, z=0.0):
+    # 3D Perlin noise like FastLED's inoise8: 256 units per lattice cell, 0..255 out
+    x, y, z = (np.asarray(c, dtype=np.float64) / 256.0 for c in (x, y, z))
+    xi, yi, zi = np.floor(x), np.floor(y), np.floor(z)
+    x, y, z = (x - xi).astype(np.float32), (y - yi).astype(np.float32), (z - zi).astype(np.float32)
+    X, Y, Z = (c.astype(np.int64) & 255 for c in (xi, yi, zi))
+    u, v, w = (c * c * c * (c * (c * 6 - 15) + 10) for c in (x, y, z))
+
+    A, B = _P[X] + Y, _P[X + 1] + Y
+    AA, AB, BA, BB = _P[A] + Z, _P[A + 1] + Z, _P[B] + Z, _P[B + 1] + Z
+    lerp = lambda t, a, b: a + t * (b - a)
+    n = lerp(w, lerp(v, lerp(u, _grad(_P[AA], x, y, z), _grad(_P[BA], x - 1, y, z)),
+                        lerp(u, _grad(_P[AB], x, y - 1, z), _grad(_P[BB], x - 1, y - 1, z))),
+                lerp(v, lerp(u, _grad(_P[AA + 1], x, y, z - 1), _grad(_P[BA + 1], x - 1, y, z - 1)),
+                        lerp(u, _grad(_P[AB + 1], x, y - 1, z - 1), _grad(_P[BB + 1], x - 1, y - 1, z - 1))))
+    return np.clip(128 + n * 170, 0, 255)
+
+def _fade(c, amount):
+    c *= (256 - amount) / 256.0   # fadeToBlackBy
+
+def _add(c, mask, rgb):
+    c[mask] = np.minimum(c[mask] + rgb, 255)
+
+# ==== FIELD PATTERNS (stateless, batched over time) ====
+# f(r, t, hue, pal): t and hue are (n, 1, 1); returns (n, H, W, 3) floats.
+
+def _liquid(r, t, hue, pal):
+    return pal(inoise8(r.u * 40, r.v * 40 - t / 4, t / 10))
+
+def _caustics(r, t, hue, pal):
+    v = (sin8(r.u * 30 + t / 3) + sin8(r.v * 25 + t / 4)) % 256
+    return pal(v // 2 + 100)
+
+def _vortex(r, t, hue, pal):
+    return pal(r.angle * 40 + r.dist * 20 - t / 2)
+
+def _nebula(r, t, hue, pal):
+    n = inoise8(r.u * 20, r.v * 20, t / 30)
+    return pal(n, 100 + n * (155 / 255))
+
+def _lava_crack(r, t, hue, pal):
+    n = inoise8(r.strip_pos * 50, t / 5)[..., None]
+    return np.where(n > 230, 255.0, np.where(n > 200, pal(n[..., 0]), 0.0))
+
+def _pulse(r, t, hue, pal):
+    breath = (np.exp(np.sin(t / 500.0 * np.pi)) - 0.36787944) * 108.0
+    return pal(hue, np.clip(breath - r.dist * 40, 0, 255))
+
+def _aurora(r, t, hue, pal):
+    return pal(inoise8(r.u * 30, t / 10), inoise8(r.u * 20, r.v * 20 - t / 5))
+
+def _kaleidoscope(r, t, hue, pal):
+    # One quadrant of noise, mirrored x4
+    fu, fv = np.minimum(r.u, MATRIX - 1 - r.u), np.minimum(r.v, MATRIX - 1 - r.v)
+    return pal(inoise8(fu * 40, fv * 40, t / 5))
+
+def _rings(r, t, hue, pal):
+    return pal(sin8(r.dist * 30 - t / 2) + hue)
+
+FIELDS = {
+    "liquid": _liquid, "caustics": _caustics, "vortex": _vortex, "nebula": _nebula,
+    "lava_crack": _lava_crack, "pulse": _pulse, "aurora": _aurora,
+    "kaleidoscope": _kaleidoscope, "rings": _rings,
+}
+
+# ==== STEP PATTERNS (stateful, one frame at a time) ====
+# f(r, c, t, hue): c is the (H, W, 3) float canvas, updated in place.
+
+def _lightning(r, c, t, hue):
+    _fade(c, 30)
+    if r.chance(5): c[:, r.cell_x == r.rng.integers(MATRIX)] = 255  # flash column
+    if r.chance(2): c[:] = (100, 100, 150)                          # global flash
+
+def _fire(r, c, t, hue):
+    # Fire2012 per column on the virtual 8 rows, burning from row 0 like the lamp
+    heat = r.state.setdefault("heat", np.zeros((MATRIX, r.width), dtype=np.int64))
+    heat -= r.rng.integers(0, 10, heat.shape)
+    np.maximum(heat, 0, out=heat)
+    heat[2:] = (heat[1:-1] + 2 * heat[:-2]) // 3
+    for _ in range(r.trials(120)):
+        x = r.rng.integers(r.width)
+        heat[0, x] = min(heat[0, x] + r.rng.integers(160, 256), 255)
+    c[:] = HEAT[heat[r.cell_y]]
+
+def _shockwave(r, c, t, hue):
+    _fade(c, 60)
+    radius = r.state.get("radius", 0)
+    if radius < 12:
+        _add(c, r.dist.astype(int) == radius // 2, r.color(hue))
+        if int(t) % 50 == 0: radius += 1
+    elif r.chance(10):
+        radius = 0  # trigger a new wave
+    r.state["radius"] = radius
+
+def _glitch(r, c, t, hue):
+    if r.chance(40):
+        c[r.cell_y == r.rng.integers(MATRIX)] = np.array(colorsys.hsv_to_rgb(r.rng.random(), 1, 1)) * 255
+    else:
+        _fade(c, 10)
+    if r.chance(10):
+        c[r.rng.integers(256, size=(r.height, r.width)) > 200] = 255
+
+def _starfield(r, c, t, hue):
+    _fade(c, 20)
+    k = r.trials(30)
+    r.particles.spawn(r.rng.random(k) * MATRIX, r.rng.random(k) * MATRIX, 0, 0, 255, 255, 5)
+
+def _galaxy(r, c, t, hue):
+    _fade(c, 40)
+    angle = r.state.get("angle", 0.0)
+    radius = float(sin8(t / 20)) / 255.0 * 3.0 + 1.0
+    for arm in range(2):
+        r.plot(c, 3.5 + np.cos(angle + arm * 3.14) * radius, 3.5 + np.sin(angle + arm * 3.14) * radius, r.color(angle * 10))
+    r.state["angle"] = angle + 0.1
+
+def _orbit(r, c, t, hue):
+    _fade(c, 20)
+    angle = r.state.get("angle", 0.0)
+    r.plot(c, 3.5 + np.cos(angle) * 3.0, 3.5 + np.sin(angle) * 3.0, 255)
+    r.state["angle"] = angle + 0.1
+
+def _grid(r, c, t, hue):
+    _fade(c, 40)
+    line = r.state.get("line", 0)
+    if int(t) % 200 == 0: line = (line + 1) % MATRIX
+    r.state["line"] = line
+    _add(c, np.s_[:, r.cell_x == line], 128)
+    _add(c, r.cell_y == line, 128)
+
+def _rain(r, c, t, hue):
+    _fade(c, 20)
+    k = r.trials(40)
+    r.particles.spawn(r.rng.random(k) * MATRIX, 0, 0, 0.2, r.color(128), 255, 5)
+
+def _snow(r, c, t, hue):
+    _fade(c, 10)
+    k = r.trials(20)
+    r.particles.spawn(r.rng.random(k) * MATRIX, 0, r.rng.random(k) * 0.1 - 0.05, 0.05, 255, 255, 2)
+
+def _flower(r, c, t, hue):
+    size = r.state.get("size", 0.0)
+    c[:] = 0
+    bloom = r.dist < size
+    c[bloom] = r.lut[(r.dist[bloom] * 30).astype(int) & 255]
+    size += 0.05
+    r.state["size"] = 0.0 if size > 5 else size
+
+def _bounce(r, c, t, hue):
+    bx, by, vx, vy = r.state.get("ball", (3.5, 3.5, 0.2, 0.3))
+    _fade(c, 20)
+    bx, by = bx + vx, by + vy
+    if bx < 0 or bx > 7: vx = -vx
+    if by < 0 or by > 7: vy = -vy
+    r.state["ball"] = (bx, by, vx, vy)
+    r.plot(c, min(max(bx, 0), 7), min(max(by, 0), 7), 255)
+
+def _snake(r, c, t, hue):
+    _fade(c, 50)
+    sx, sy, vx, vy = r.state.get("snake", (3.5, 3.5, 0.2, 0.0))
+    if r.chance(20):
+        step = 0.2 if r.chance(128) else -0.2
+        vx, vy = (0.0, step) if r.chance(128) else (step, 0.0)
+    sx, sy = (sx + vx) % MATRIX, (sy + vy) % MATRIX
+    r.state["snake"] = (sx, sy, vx, vy)
+    r.plot(c, sx, sy, r.color(hue))
+
+def _bubbles(r, c, t, hue):
+    _fade(c, 20)
+    k = r.trials(60)
+    r.particles.spawn(r.rng.random(k) * MATRIX, 7, 0, -0.2, r.lut[r.rng.integers(256, size=k)], 255, 5)
+
+def _audio(r, c, t, hue):
+    # Fake EQ bars
+    _fade(c, 80)
+    height = (inoise8(r.u * 50, t / 2) * 8 / 255).astype(int)
+    bars = r.cell_y[:, None] > (MATRIX - 1) - height
+    c[:] = np.where(bars[..., None], r.lut[(r.cell_y * 30) & 255][:, None, :], c)
+
+CYCLE = ("nebula", "rain", "fire", "aurora", "audio")
+
+def _cycle(r, c, t, hue):
+    r.run_effect(CYCLE[int(t // 5000) % len(CYCLE)], c, t, hue)
+
+def _icon(bitmap, rgb):
+    bits = np.array([[(bitmap >> ((7 - y) * 8 + (7 - x))) & 1 for x in range(8)] for y in range(8)], dtype=bool)
+    def draw(r, c, t, hue):
+        _add(c, bits[r.cell_y[:, None], r.cell_x[None, :]], rgb)
+    return draw
+
+def _manual(r, c, t, hue): pass
+def _blackout(r, c, t, hue): _fade(c, 10)
+
+STEPS = {
+    "lightning": _lightning, "fire": _fire, "shockwave": _shockwave, "glitch": _glitch,
+    "starfield": _starfield, "galaxy": _galaxy, "orbit": _orbit, "grid": _grid,
+    "rain": _rain, "snow": _snow, "flower": _flower, "bounce": _bounce, "snake": _snake,
+    "bubbles": _bubbles, "audio": _audio, "cycle": _cycle,
+    "icon_happy": _icon(0x3C4299A581A5423C, (255, 255, 0)),
+    "icon_sad":   _icon(0x3C42A5998199423C, (0, 0, 255)),
+    "icon_heart": _icon(0x0066FF7E3C180000, (255, 0, 0)),
+    "icon_skull": _icon(0x3C42A581C381423C, (255, 255, 255)),
+    "icon_alien": _icon(0xC3423C5A5A3C42C3, (0, 128, 0)),
+    "manual": _manual, "off": _blackout,
+}
+
+# Firmware mode names (setPatternByName) -> (effect, palette set by the emo* wrapper)
+MODES = {
+    "happy": ("bubbles", "party"), "sad": ("rain", "ocean"), "angry": ("glitch", "lava"),
+    "surprise": ("shockwave", "rainbow"), "neutral": ("pulse", "forest"),
+    "liquid": ("liquid", None), "caustics": ("caustics", None), "vortex": ("vortex", None),
+    "nebula": ("nebula", None), "magma": ("lava_crack", None),
+    "lightning": ("lightning", None), "fire": ("fire", None), "shockwave": ("shockwave", None),
+    "glitch": ("glitch", None), "pulse": ("pulse", None),
+    "stars": ("starfield", None), "galaxy": ("galaxy", None), "orbit": ("orbit", None),
+    "aurora": ("aurora", None), "kaleidoscope": ("kaleidoscope", None), "rings": ("rings", None),
+    "grid": ("grid", None), "flower": ("flower", None), "rain": ("rain", None), "snow": ("snow", None),
+    "bounce": ("bounce", None), "snake": ("snake", None), "bubbles": ("bubbles", None),
+    "audio": ("audio", None), "cycle": ("cycle", None),
+    "icon_happy": ("icon_happy", None), "icon_sad": ("icon_sad", None), "icon_heart": ("icon_heart", None),
+    "icon_skull": ("icon_skull", None), "icon_alien": ("icon_alien", None),
+    "manual": ("manual", None), "off": ("off", None),
+}
+
+# ==== PARTICLE ENGINE ====
+# Fixed pool like the firmware's; every update is one vectorised pass.
+
+class _Particles:
+    def __init__(self, size):
+        self.pos = np.zeros((size, 2), dtype=np.float32)
+        self.vel = np.zeros((size, 2), dtype=np.float32)
+        self.color = np.zeros((size, 3), dtype=np.float32)
+        self.life = np.zeros(size, dtype=np.float32)
+        self.decay = np.zeros(size, dtype=np.float32)
+        self.active = np.zeros(size, dtype=bool)
+
+    def clear(self):
+        self.active[:] = False
+
+    def spawn(self, x, y, vx, vy, color, life, decay):
+        x = np.atleast_1d(x)
+        free = np.flatnonzero(~self.active)[:x.size]  # pool full -> extra spawns are dropped
+        k = free.size
+        if not k: return
+        fit = lambda a, shape=(x.size,): np.broadcast_to(a, shape)[:k]
+        self.pos[free, 0], self.pos[free, 1] = x[:k], fit(y)
+        self.vel[free, 0], self.vel[free, 1] = fit(vx), fit(vy)
+        self.color[free] = fit(color, (x.size, 3))
+        self.life[free], self.decay[free] = life, decay
+        self.active[free] = True
+
+    def update(self):
+        a = self.active
+        if not a.any(): return
+        self.pos[a] += self.vel[a]
+        alive = self.life > self.decay
+        self.life = np.where(a & alive, self.life - self.decay, self.life)
+        x, y = self.pos[:, 0], self.pos[:, 1]
+        self.active = a & alive & (x >= -2) & (x <= MATRIX + 2) & (y >= -2) & (y <= MATRIX + 2)
+
+    def render(self, c):
+        a = self.active
+        if not a.any(): return
+        x, y = self.pos[a, 0], self.pos[a, 1]
+        inside = (x >= 0) & (x < MATRIX) & (y >= 0) & (y < MATRIX)
+        h, w = c.shape[:2]
+        ix = (x[inside] * w / MATRIX).astype(int)
+        iy = (y[inside] * h / MATRIX).astype(int)
+        scale = (self.life[a][inside] / 256.0)[:, None]
+        c[iy, ix] = np.minimum(c[iy, ix] + self.color[a][inside], 255) * scale
+
+# ==== RENDERER ====
+class PatternRenderer:
+    def __init__(self, width=MATRIX, height=MATRIX, serpentine=False, frame_ms=FRAME_MS, seed=None):
+        self.width, self.height = width, height
+        self.frame_ms = frame_ms
+        self.rng = np.random.default_rng(seed)
+
+        # Pixel centres in virtual lamp units (identical to x, y on an 8x8)
+        self.u = ((np.arange(width) + 0.5) * MATRIX / width - 0.5)[None, :]
+        self.v = ((np.arange(height) + 0.5) * MATRIX / height - 0.5)[:, None]
+        dx, dy = np.broadcast_arrays(self.u - 3.5, self.v - 3.5)
+        self.dist = np.hypot(dx, dy)
+        self.angle = np.arctan2(dy, dx)
+        self.cell_x = np.arange(width) * MATRIX // width    # lamp column/row each pixel belongs to
+        self.cell_y = np.arange(height) * MATRIX // height
+
+        # LED wiring, precomputed once
+        self.index = xy_index(width, height, serpentine)
+        self.order = np.argsort(self.index.ravel())
+        self.strip_pos = self.index * (MATRIX * MATRIX / (width * height))
+
+        # Bigger matrices get proportionally more particles and spawns
+        self.density = max(1, (width * height) // (MATRIX * MATRIX))
+        self.particles = _Particles(16 * self.density)
+
+        self.canvas = np.zeros((height, width, 3), dtype=np.float32)
+        self.lut = PALETTES["rainbow"].copy()
+        self.target_lut = self.lut.copy()
+        self.t_ms = 0.0
+        self.mode = None
+        self.effect = "bubbles"
+        self.state = {}
+        self._next = None
+        self._transition = 0
+        self.set_pattern("happy", transition=False)
+
+    # ---- helpers used by the pattern functions ----
+    def chance(self, p8):
+        return self.rng.random() < p8 / 256.0   # random8() < p8
+
+    def trials(self, p8):
+        return self.rng.binomial(self.density, p8 / 256.0)
+
+    def color(self, index, bright=255):
+        return self.lut[int(index) & 255] * (bright / 255.0)
+
+    def plot(self, c, x, y, rgb):
+        # One lamp LED worth of pixels at virtual position (x, y)
+        if not (0 <= x < MATRIX and 0 <= y < MATRIX): return
+        px, py = int(x * self.width / MATRIX), int(y * self.height / MATRIX)
+        sx, sy = max(1, self.width // MATRIX), max(1, self.height // MATRIX)
+        c[py:py + sy, px:px + sx] = rgb
+
+    def run_effect(self, name, c, t, hue):
+        fx = STEPS.get(name)
+        if fx is not None:
+            fx(self, c, t, hue)
+            return
+        luts = self.lut[None]
+        c[:] = FIELDS[name](self, np.full((1, 1, 1), t), np.full((1, 1, 1), hue), self._pal(luts, 1))[0]
+
+    # ---- control ----
+    def set_pattern(self, mode, transition=True):
+        mode = mode.lower()
+        if mode not in MODES: mode = "happy"  # same fallback as the firmware
+        if mode == (self._next if self._transition else self.mode): return
+        if transition:
+            self._next, self._transition = mode, TRANSITION_FRAMES
+        else:
+            self._switch(mode)
+
+    def _switch(self, mode):
+        self.mode = mode
+        self.effect, palette = MODES[mode]
+        if palette: self.target_lut = PALETTES[palette]
+        self.state = {}
+        self.particles.clear()
+        self._transition = 0
+
+    def _pal(self, luts, n):
+        frame_ix = np.arange(n).reshape(n, 1, 1)
+        shape = (n, self.height, self.width)
+        def pal(index, bright=None):
+            index = np.broadcast_to(np.floor(index).astype(np.int64) & 255, shape)
+            rgb = luts[frame_ix, index]
+            if bright is not None:
+                rgb *= np.broadcast_to(bright, shape)[..., None] / 255.0
+            return rgb
+        return pal
+
+    def _blend_palette(self, n):
+        # Cross-fade toward the target palette; returns the LUT of each frame
+        keep = (1.0 - PALETTE_BLEND) ** np.arange(1, n + 1, dtype=np.float32)
+        luts = self.target_lut + (self.lut - self.target_lut) * keep[:, None, None]
+        self.lut = luts[-1].copy()
+        return luts
+
+    # ---- rendering ----
+    def render(self, frames=1):
+        out = np.empty((frames, self.height, self.width, 3), dtype=np.uint8)
+        c = self.canvas
+        i = 0
+        while i < frames:
+            if self._transition or self.effect not in FIELDS:
+                self.t_ms += self.frame_ms
+                self._blend_palette(1)
+                t, hue = self.t_ms, int(self.t_ms // 20) % 256
+                if self._transition:
+                    _fade(c, 40)
+                    self._transition -= 1
+                    if not self._transition: self._switch(self._next)
+                else:
+                    STEPS[self.effect](self, c, t, hue)
+                    self.particles.update()
+                    self.particles.render(c)
+                out[i] = c
+                i += 1
+            else:
+                # Whole remaining batch in one broadcast over time
+                n = frames - i
+                t = (self.t_ms + self.frame_ms * np.arange(1, n + 1)).reshape(n, 1, 1)
+                hue = (t // 20) % 256
+                block = FIELDS[self.effect](self, t, hue, self._pal(self._blend_palette(n), n))
+                out[i:] = block
+                c[:] = block[-1]
+                self.t_ms = float(t[-1, 0, 0])
+                i = frames
+        return out
+
+    def strip(self, frames):
+        # (..., H, W, 3) -> (..., N, 3) in LED wiring order
+        flat = frames.reshape(frames.shape[:-3] + (-1, 3))
+        return flat[..., self.order, :]
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+# ==== ADAPTIVE DETECTION SCHEDULER ====
+# Decides how long to wait before the next emotion inference. A still face
+# whose emotion has not changed for a while gets stretched intervals (up to
+# max_interval); a motion spike inside the tracked box brings it straight
+# down to min_interval. Without a tracked face the base interval is used.
+
+PATCH_SIZE = 32  # motion is measured on a downscaled grayscale patch
+
+class DetectionScheduler:
+    def __init__(self, min_interval=0.15, max_interval=2.0,
+                 motion_low=2.0, motion_high=12.0, stable_after=3.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_low = motion_low      # mean abs diff (0-255) treated as "still"
+        self.motion_high = motion_high    # ... and as a motion spike
+        self.stable_after = stable_after  # seconds of unchanged emotion for full stretch
+
+        self.motion = 0.0
+        self.interval = 0.0
+        self._prev_patch = None
+        self._label = None
+        self._label_since = 0.0
+
+    def motion_energy(self, frame, box):
+        x, y, w, h = box
+        roi = frame[max(0, y):y + h, max(0, x):x + w]
+        if roi.size == 0:
+            self._prev_patch = None
+            return self.motion_high
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+        patch = cv2.resize(gray, (PATCH_SIZE, PATCH_SIZE), interpolation=cv2.INTER_AREA).astype(np.int16)
+        prev, self._prev_patch = self._prev_patch, patch
+        if prev is None:
+            return self.motion_high
+        return float(np.abs(patch - prev).mean())
+
+    def update(self, frame, box, tracker_ok, label, now, base_interval):
+        if label != self._label:
+            self._label = label
+            self._label_since = now
+
+        if not tracker_ok or box is None:
+            # Nothing tracked: plain fixed-rate search
+            self._prev_patch = None
+            self.motion = self.motion_high
+            self.interval = base_interval
+            return self.interval
+
+        # Spikes react immediately, calm-down is smoothed
+        m = self.motion_energy(frame, box)
+        self.motion = m if m > self.motion else 0.8 * self.motion + 0.2 * m
+
+        if self.motion >= self.motion_high:
+            self.interval = self.min_interval
+            return self.interval
+
+        stillness = np.clip((self.motion_high - self.motion) / (self.motion_high - self.motion_low), 0.0, 1.0)
+        stability = np.clip((now - self._label_since) / self.stable_after, 0.0, 1.0)
+        stretch = float(stillness * stability)
+        self.interval = base_interval + (max(self.max_interval, base_interval) - base_interval) * stretch
+        return self.interval
+
+    def reset(self):
+        self._prev_patch = None
+        self._label = None
+        self.motion = 0.0
@@ -0,0 +1,375 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from config import (CLIENT_BUFFER, JPEG_QUALITY, LAMPS_FILE, RECORD_DIR, SERVICE_HOST, SERVICE_PORT,
+                    STREAM_FPS)
+from classifier import BACKENDS
+from control import LampController
+from detectors import DETECTORS
+from frame_source import open_source
+from frame_buffer import FrameBuffer
+from lamp_fleet import LampFleet, load_lamps
+from pipeline import EmotionPipeline
+from recorder import SessionRecorder
+from telemetry import UI_RATE, Telemetry, TelemetryBus
+
+# ==== HEADLESS SERVICE ====
+# The controller without Qt, watched from a browser:
+#   GET /              viewer page (preview + emotion bars)
+#   GET /stream.mjpg   annotated preview, multipart MJPEG
+#   GET /snapshot.jpg  one preview frame
+#   GET /ws            WebSocket, telemetry JSON at UI_RATE
+#   GET /status        JSON counters, /metrics Prometheus stage latencies
+#
+# Capture, pipeline, lamp decisions and the recorder run on one thread, as in
+# the GUI worker; nothing a viewer does reaches it. The asyncio loop takes the
+# newest annotated frame from the FrameBuffer at up to STREAM_FPS, JPEG-encodes
+# it once on a helper thread (only while someone watches) and writes the same
+# bytes to every viewer. A viewer whose socket still holds more than
+# CLIENT_BUFFER unsent bytes (the kernel send buffer is capped to match) skips
+# that frame: a slow viewer gets a lower frame rate, never a growing backlog.
+# Telemetry is serialized once per tick and fanned out the same way.
+#
+#   python service.py --source 0 --lamps lamps.json
+#   python service.py --source synthetic --host 0.0.0.0 --port 8080
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_MAX_PAYLOAD = 65536  # control frames and small client messages only
+BOUNDARY = b"frame"
+
+# ==== CAPTURE SIDE ====
+class ServiceWorker(threading.Thread):
+    def __init__(self, source="0", control=None, recorder=None):
+        super().__init__(name="capture", daemon=True)
+        self._run_flag = True
+        self.source = source
+        self.pipeline = EmotionPipeline()
+        self.frames = FrameBuffer()      # encoder pulls the newest annotated frame
+        self.telemetry = TelemetryBus()  # ... and the newest stats at UI_RATE
+        self.control = control or LampController()
+        self.recorder = recorder
+
+    def run(self):
+        source = open_source(self.source, loop=True, realtime=True)
+        self.pipeline.start()
+        prof = self.pipeline.profiler
+        try:
+            while self._run_flag:
+                t = time.perf_counter()
+                ret, frame = source.read()
+                t = prof.lap("capture", t)
+                if not ret:
+                    if source.eof: break
+                    continue
+
+                result = self.pipeline.process(frame)
+                if result is not None:
+                    t = time.perf_counter()
+                    decision = self.control.apply(result)
+                    self.telemetry.publish(Telemetry(result.dominant, result.emotions, decision.status,
+                                                     decision.color, decision.gesture, result.sys_stats))
+                    t = prof.lap("decide", t)
+                    if self.recorder:
+                        self.recorder.append(result, self.control.mode)
+                        prof.lap("record", t)
+
+                # One copy per frame whatever the number of viewers
+                t = time.perf_counter()
+                np.copyto(self.frames.back(frame.shape), frame)
+                self.frames.publish()
+                prof.lap("publish", t)
+        finally:
+            self.pipeline.close()
+            source.release()
+            if self.recorder: self.recorder.close()
+
+    def stop(self):
+        self._run_flag = False
+        self.join(timeout=5)
+
+# ==== FAN-OUT ====
+class Broadcast:
+    # The same bytes to every client; a client that has not drained the last
+    # messages (more than `limit` bytes queued in its transport) skips this one
+    def __init__(self, limit=CLIENT_BUFFER):
+        self.clients = set()
+        self.limit = limit
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, parts):
+        for writer in list(self.clients):
+            transport = writer.transport
+            if transport.is_closing():
+                self.clients.discard(writer)
+            elif transport.get_write_buffer_size() > self.limit:
+                self.dropped += 1
+            else:
+                writer.writelines(parts)
+                self.sent += 1
+
+def ws_frame(payload, opcode=0x1):
+    # Server -> client frames are never masked
+    n = len(payload)
+    if n < 126: head = bytes((0x80 | opcode, n))
+    elif n < 65536: head = bytes((0x80 | opcode, 126)) + n.to_bytes(2, "big")
+    else: head = bytes((0x80 | opcode, 127)) + n.to_bytes(8, "big")
+    return head + payload
+
+async def ws_read(reader):
+    # -> (opcode, payload) of one client frame (always masked)
+    head = await reader.readexactly(2)
+    opcode, n = head[0] & 0x0F, head[1] & 0x7F
+    if n == 126: n = int.from_bytes(await reader.readexactly(2), "big")
+    elif n == 127: n = int.from_bytes(await reader.readexactly(8), "big")
+    if n > WS_MAX_PAYLOAD: raise ConnectionError("websocket frame too large")
+    mask = await reader.readexactly(4) if head[1] & 0x80 else None
+    data = await reader.readexactly(n)
+    if mask: data = (np.frombuffer(data, np.uint8) ^ np.resize(np.frombuffer(mask, np.uint8), n)).tobytes()
+    return opcode, data
+
+def telemetry_json(rec, mode):
+    return json.dumps({
+        "seq": rec.seq, "t": rec.t, "dominant": rec.dominant,
+        "emotions": {k: round(v, 1) for k, v in rec.emotions.items()},
+        "status": rec.status, "color": rec.color, "gesture": rec.gesture, "fx": mode,
+        "energy": round(rec.energy, 1), "comfort": bool(rec.comfort), "faces": rec.faces,
+        "fps": round(rec.fps, 1), "cpu": rec.cpu, "inference_ms": round(rec.inference_ms, 1),
+    }, separators=(",", ":")).encode()
+
+# ==== HTTP SIDE ====
+class PreviewService:
+    def __init__(self, worker, host=SERVICE_HOST, port=SERVICE_PORT, fps=STREAM_FPS, quality=JPEG_QUALITY, client_buffer=CLIENT_BUFFER):
+        self.worker = worker
+        self.host = host
+        self.port = port
+        self.period = 1.0 / fps
+        self.quality = quality
+        self.mjpeg = Broadcast(client_buffer)
+        self.ws = Broadcast(client_buffer)
+        self.jpeg = None            # newest encoded preview, shared by every response
+        self._snapshot_until = 0.0  # keep encoding this long after a snapshot request
+        self._new_jpeg = None
+        self._encoder = ThreadPoolExecutor(1, thread_name_prefix="jpeg")  # cv2.imencode releases the GIL
+        self.server = None
+
+        # Counters
+        self.encoded = 0
+        self.connections = 0
+
+    def _encode(self, frame):
+        t = time.perf_counter()
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        self.worker.pipeline.profiler.lap("jpeg", t)
+        return buf.tobytes() if ok else None
+
+    async def _stream_loop(self):
+        loop = asyncio.get_running_loop()
+        frames = self.worker.frames
+        while True:
+            t0 = loop.time()
+            if self.mjpeg.clients or t0 < self._snapshot_until:
+                # The acquired buffer stays ours until the next acquire(), i.e. past this encode
+                frame = frames.acquire()
+                if frame is not None:
+                    jpeg = await loop.run_in_executor(self._encoder, self._encode, frame)
+                    if jpeg is not None:
+                        self.jpeg = jpeg
+                        self.encoded += 1
+                        self._new_jpeg.set()
+                        self._new_jpeg = asyncio.Event()
+                        self.mjpeg.send((b"--%s\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+                                         % (BOUNDARY, len(jpeg)), jpeg, b"\r\n"))
+            await asyncio.sleep(max(0.0, self.period - (loop.time() - t0)))
+
+    async def _telemetry_loop(self):
+        bus = self.worker.telemetry
+        while True:
+            await asyncio.sleep(1.0 / UI_RATE)
+            if not self.ws.clients: continue
+            rec = bus.poll()
+            if rec is not None:
+                self.ws.send((ws_frame(telemetry_json(rec, self.worker.control.mode)),))
+
+    # ==== REQUESTS ====
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            lines = head.decode("latin-1").split("\r\n")
+            method, path = lines[0].split(" ")[:2]
+            headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+            path = path.split("?", 1)[0]
+            if method != "GET":
+                await self._respond(writer, 405, b"method not allowed\n")
+            elif path == "/stream.mjpg":
+                await self._serve_mjpeg(reader, writer)
+            elif path == "/ws":
+                await self._serve_ws(reader, writer, headers)
+            elif path == "/snapshot.jpg":
+                await self._serve_snapshot(writer)
+            elif path == "/status":
+                await self._respond(writer, 200, json.dumps(self.status(), indent=2).encode(), "application/json")
+            elif path == "/metrics":
+                await self._respond(writer, 200, self.worker.pipeline.profiler.to_prometheus().encode(), "text/plain; version=0.0.4")
+            elif path == "/":
+                await self._respond(writer, 200, INDEX_HTML.encode(), "text/html; charset=utf-8")
+            else:
+                await self._respond(writer, 404, b"not found\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.mjpeg.clients.discard(writer)
+            self.ws.clients.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer, code, body, ctype="text/plain"):
+        reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}[code]
+        writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\nCache-Control: no-store\r\nConnection: close\r\n\r\n"
+                     % (code, reason.encode(), ctype.encode(), len(body)) + body)
+        await writer.drain()
+
+    async def _serve_mjpeg(self, reader, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary=%s\r\n"
+                     b"Cache-Control: no-store\r\nConnection: close\r\n\r\n" % BOUNDARY)
+        if self.jpeg: writer.writelines((b"--%s\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n"
+                                         % (BOUNDARY, len(self.jpeg)), self.jpeg, b"\r\n"))
+        # Cap the kernel buffer too, or TCP autotuning queues seconds of stale frames there
+        sock = writer.get_extra_info("socket")
+        if sock is not None: sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.mjpeg.limit)
+        self.mjpeg.clients.add(writer)
+        await reader.read()  # viewers never send anything: returns when they hang up
+
+    async def _serve_snapshot(self, writer):
+        self._snapshot_until = asyncio.get_running_loop().time() + 2.0
+        try: await asyncio.wait_for(self._new_jpeg.wait(), 2.0)
+        except asyncio.TimeoutError: pass
+        if self.jpeg is None:
+            await self._respond(writer, 503, b"no frame yet\n")
+            return
+        await self._respond(writer, 200, self.jpeg, "image/jpeg")
+
+    async def _serve_ws(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if headers.get("upgrade", "").lower() != "websocket" or not key:
+            await self._respond(writer, 404, b"websocket only\n")
+            return
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WS_GUID).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Accept: %s\r\n\r\n" % accept)
+        self.ws.clients.add(writer)
+        while True:
+            opcode, data = await ws_read(reader)
+            if opcode == 0x8:  # close: echo it and hang up
+                writer.write(ws_frame(data[:2], 0x8))
+                return
+            if opcode == 0x9: writer.write(ws_frame(data, 0xA))
+
+    def status(self):
+        frames = self.worker.frames
+        return {
+            "source": str(self.worker.source),
+            "ai_state": self.worker.pipeline.ai_state,
+            "captured": frames.published,
+            "encoded": self.encoded,
+            "viewers": len(self.mjpeg.clients),
+            "frames_sent": self.mjpeg.sent,
+            "frames_dropped": self.mjpeg.dropped,
+            "telemetry_clients": len(self.ws.clients),
+            "telemetry_sent": self.ws.sent,
+            "telemetry_dropped": self.ws.dropped,
+            "connections": self.connections,
+            "recorded": self.worker.recorder.records if self.worker.recorder else 0,
+            "stages_ms": self.worker.pipeline.profiler.snapshot(),
+        }
+
+    async def serve(self):
+        self._new_jpeg = asyncio.Event()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # port 0 -> the one picked
+        tasks = [asyncio.create_task(self._stream_loop()), asyncio.create_task(self._telemetry_loop())]
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            for task in tasks: task.cancel()
+            self._encoder.shutdown(wait=True)
+
+INDEX_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>MoodMatrix</title>
+<style>
+body { background:#121212; color:#e0e0e0; font-family:sans-serif; display:flex; gap:20px; padding:20px; margin:0; }
+img { max-width:70vw; border:1px solid #333; border-radius:8px; }
+#side { min-width:260px; }
+#status { font-size:22px; font-weight:bold; margin-bottom:12px; }
+.bar { display:flex; align-items:center; gap:8px; margin:4px 0; font-size:13px; }
+.bar span { width:70px; } .bar div { height:12px; background:#00d4ff; border-radius:3px; }
+#stats { margin-top:14px; font-size:12px; color:#888; }
+</style></head>
+<body><img src="/stream.mjpg">
+<div id="side"><div id="status">connecting...</div><div id="bars"></div><div id="stats"></div></div>
+<script>
+const bars = document.getElementById("bars"), status = document.getElementById("status"), stats = document.getElementById("stats");
+function connect() {
+  const ws = new WebSocket(`ws://${location.host}/ws`);
+  ws.onmessage = (e) => {
+    const t = JSON.parse(e.data);
+    status.textContent = t.status; status.style.color = t.color;
+    bars.innerHTML = Object.entries(t.emotions).map(([k, v]) =>
+      `<div class="bar"><span>${k}</span><div style="width:${v * 1.8}px"></div>${v.toFixed(0)}%</div>`).join("");
+    stats.textContent = `FX ${t.fx || "-"} | energy ${t.energy} | ${t.faces} face(s) | ${t.fps} fps | CPU ${t.cpu}% | inference ${t.inference_ms} ms`;
+  };
+  ws.onclose = () => { status.textContent = "reconnecting..."; setTimeout(connect, 1000); };
+}
+connect();
+</script></body></html>
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Run MoodMatrix headless with a browser preview and telemetry")
+    parser.add_argument("--source", default="0", help="camera index, video file, frame directory or synthetic[:N]")
+    parser.add_argument("--host", default=SERVICE_HOST, help="address to listen on (0.0.0.0 for the whole network)")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--lamp-url", help="single lamp base URL, e.g. a local lamp_emulator.py")
+    parser.add_argument("--lamps", default=LAMPS_FILE, help="JSON file listing several lamps")
+    parser.add_argument("--no-lamp", action="store_true", help="dry run: decide, but send nothing")
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default=None, help="face detector backend (default from config)")
+    parser.add_argument("--emotion-backend", choices=sorted(BACKENDS), default=None, help="emotion model backend (default from config)")
+    parser.add_argument("--record", nargs="?", const=RECORD_DIR, default=None, metavar="DIR", help="record the session (recorder.py)")
+    parser.add_argument("--fps", type=float, default=STREAM_FPS, help="preview frames per second (encoded once for all viewers)")
+    parser.add_argument("--quality", type=int, default=JPEG_QUALITY, help="preview JPEG quality")
+    args = parser.parse_args()
+
+    worker = ServiceWorker(args.source, recorder=SessionRecorder(args.record) if args.record else None)
+    if args.detector: worker.pipeline.detector = args.detector
+    if args.emotion_backend: worker.pipeline.emotion_backend = args.emotion_backend
+    lamp = None
+    if not args.no_lamp:
+        lamps = [{"name": "lamp1", "url": args.lamp_url}] if args.lamp_url else load_lamps(args.lamps)
+        lamp = LampFleet(lamps, profiler=worker.pipeline.profiler)
+        lamp.start()
+    worker.control = LampController(lamp)
+    worker.start()
+
+    service = PreviewService(worker, args.host, args.port, args.fps, args.quality)
+    print(f"MoodMatrix service on http://{args.host}:{args.port}/ (stream.mjpg, ws, status)")
+    try:
+        asyncio.run(service.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+        if lamp: lamp.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+
+from config import COMFORT_SAD_RATIO, EMOTION_FX_POOL
+from classifier import EMOTION_LABELS
+from lamp_client import MODE_RATE_LIMIT
+from recorder import FX_INDEX
+
+# ==== ENERGY ENGINE SWEEP SIMULATOR ====
+# Replays recorded emotion traces (recorder.py sessions or bulk_analyze.py
+# timelines) through the whole decision logic for thousands of parameter sets
+# at once: energy engine (reactivity, decay, clip), label thresholds, the
+# comfort rule over the label memory, the director's FX pick (np.interp of
+# |energy| into the label's FX pool, re-pick every fx_interval seconds) and
+# the mode rate limit.
+#
+# Every parameter set is one column of the state arrays. Frames are stepped
+# in order, because each frame depends on the last (clipping, sign-dependent
+# decay, the comfort reset), but one step is a handful of array operations
+# over all columns, never a Python loop per parameter set.
+#
+#   python simulator.py sessions/ --reactivity 0.1:1:10 --decay 1:10:10 --comfort-ratio 0.2:0.6:5
+#   python simulator.py timelines/party.npz --window 300,600,1200 --sort comfort_share --csv sweep.csv
+#   python simulator.py sessions/ --check       # vectorised result == the real Track / LampDirector code
+
+# Energy labels (tracks.energy_label) as codes
+ENGINE_LABELS = ("neutral", "happy", "surprise", "angry", "sad")
+NEUTRAL, HAPPY, SURPRISE, ANGRY, SAD = range(len(ENGINE_LABELS))
+
+# FX pool per label as a padded table of recorder.FX_NAMES indices
+POOL_LEN = np.array([len(EMOTION_FX_POOL[name]) for name in ENGINE_LABELS])
+FX_TABLE = np.zeros((len(ENGINE_LABELS), POOL_LEN.max()), dtype=np.int64)
+for _i, _name in enumerate(ENGINE_LABELS):
+    FX_TABLE[_i, :POOL_LEN[_i]] = [FX_INDEX[fx] for fx in EMOTION_FX_POOL[_name]]
+
+# Parameters and their live defaults (pipeline.py, tracks.py, LampDirector, lamp_client.RateLimiter)
+DEFAULTS = {
+    "reactivity": 0.3,
+    "decay": 5.0,
+    "happy": 40.0,        # energy > happy -> happy
+    "surprise": 10.0,     # energy > surprise -> surprise
+    "angry": -10.0,       # energy < angry -> angry
+    "sad": -40.0,         # energy < sad -> sad
+    "comfort_ratio": COMFORT_SAD_RATIO,
+    "window": 600,        # label memory, frames
+    "fx_interval": 8.0,   # seconds before the director re-picks an FX
+    "mode_limit": MODE_RATE_LIMIT,
+}
+
+METRICS = ("modes_per_min", "fx_changes_per_min", "rate_limited", "comfort_share", "comfort_entries",
+           "mean_abs_energy") + tuple(f"{name}_share" for name in ENGINE_LABELS)
+
+def make_grid(**axes):
+    # Every combination of the given axes (scalars or sequences); the rest at DEFAULTS
+    values = [np.atleast_1d(np.asarray(axes.get(name, default), dtype=np.float64)) for name, default in DEFAULTS.items()]
+    mesh = np.meshgrid(*values, indexing="ij")
+    return {name: m.ravel() for name, m in zip(DEFAULTS, mesh)}
+
+def load_trace(path):
+    # -> (t, probs, fed): timestamps, (N, 7) probabilities, rows where a new
+    # emotion result arrived (the energy engine is only fed on those; in a
+    # recorded session the same emotions repeat until the next result, and the
+    # "feeds" counter says when one came, face-cache hits included)
+    if path.endswith(".npz"):
+        from bulk_analyze import load_timeline
+        d = load_timeline(path)
+        keep = d["faces"] > 0  # the live pipeline has no output without a face
+        t, probs = d["t"][keep], d["probs"][keep]
+        return t, probs, np.ones(len(t), dtype=bool)
+    from recorder import read_session
+    records, _ = read_session(path)
+    t, probs = np.asarray(records["t"]), np.asarray(records["probs"])
+    fed = np.ones(len(t), dtype=bool)
+    if "feeds" in records.dtype.names:
+        feeds = np.asarray(records["feeds"])
+        fed[1:] = feeds[1:] != feeds[:-1]
+    else:
+        # Recorded before the counter: guessed from the probabilities changing,
+        # so a still face served from the face cache replays as not fed
+        fed[1:] = np.any(probs[1:] != probs[:-1], axis=1)
+    return t, probs, fed
+
+def drive(probs):
+    # (positive - negative) in percent, summed in the same order as Track.feed
+    pct = (probs * 100.0).astype(np.float64)
+    col = {name: pct[:, i] for i, name in enumerate(EMOTION_LABELS)}
+    return (col["happy"] + col["surprise"]) - (col["sad"] + col["angry"] + col["fear"] + col["disgust"])
+
+def energy_labels(energy, g):
+    # tracks.energy_label for every column: happy, then surprise, sad, angry
+    hi = energy > g["happy"]
+    su = energy > g["surprise"]
+    sa = energy < g["sad"]
+    an = energy < g["angry"]
+    su &= ~hi
+    pos = hi | su
+    sa &= ~pos
+    an &= ~(pos | sa)
+    return hi.view(np.uint8) * HAPPY + su.view(np.uint8) * SURPRISE + sa.view(np.uint8) * SAD + an.view(np.uint8) * ANGRY
+
+def simulate(t, probs, fed, grid, history=False):
+    # Columns are sorted by memory window so each window length reads its ring row as a slice
+    order = np.argsort(grid["window"], kind="stable")
+    g = {k: v[order] for k, v in grid.items()}
+    P, T = len(order), len(t)
+    push = drive(probs)
+    dt = np.diff(t, append=t[-1]) if T else t  # how long each frame's state lasted
+    times = t.tolist()
+
+    window = g["window"].astype(np.int64)
+    W = int(window.max())
+    blocks = [(int(w), a, b) for w, a, b in zip(*_runs(window))]
+    ring = np.zeros((W, P), dtype=bool)          # sad flags of the last `window` frames
+    sad_count = np.zeros(P, dtype=np.int64)
+    leaving = np.zeros(P, dtype=bool)
+
+    energy = np.zeros(P)
+    comfort = np.zeros(P, dtype=bool)
+    last_label = np.full(P, 255, dtype=np.uint8)
+    last_change = np.zeros(P)
+    limiter_last = np.full(P, -np.inf)
+    fx = np.zeros(P, dtype=np.int64)             # FX on the lamp (0: none yet)
+    fx_flat = FX_TABLE.ravel()
+    pool_last = (POOL_LEN - 1).astype(np.float64)
+
+    sent = np.zeros(P, dtype=np.int64)
+    limited = np.zeros(P, dtype=np.int64)
+    fx_changes = np.zeros(P, dtype=np.int64)
+    comfort_entries = np.zeros(P, dtype=np.int64)
+    comfort_time = np.zeros(P)
+    abs_energy = np.zeros(P)
+    label_time = np.zeros((len(ENGINE_LABELS), P))
+    B = 256                                      # labels are buffered, time shares summed per block
+    labels = np.zeros((B, P), dtype=np.uint8)
+    trace = {"energy": np.zeros((T, P)), "fx": np.zeros((T, P), dtype=np.int64)} if history else None
+
+    stale = True  # energy changed since the labels were computed
+    for i in range(T):
+        now = times[i]
+        # Energy engine (Track.feed)
+        if fed[i]:
+            energy += push[i] * g["reactivity"]
+            np.clip(energy, -100, 100, out=energy)
+            energy -= np.sign(energy) * g["decay"]
+            stale = True
+
+        # Label + comfort memory (Track.remember); between results energy, and so the label, holds
+        if stale:
+            label = base = energy_labels(energy, g)
+            is_sad = base == SAD
+            intensity = np.abs(energy)
+            stale = False
+        label = base
+        for w, a, b in blocks:
+            if i >= w: leaving[a:b] = ring[(i - w) % W, a:b]
+        ring[i % W] = is_sad
+        sad_count += is_sad
+        sad_count -= leaving
+        over = sad_count / np.minimum(i + 1, window) > g["comfort_ratio"]
+        enter = over & ~comfort
+        if enter.any():
+            label = base.copy()
+            label[enter] = HAPPY
+            energy[enter] = 50.0
+            intensity = np.abs(energy)
+            comfort_entries += enter
+            stale = True
+        comfort = over
+
+        # Director (LampDirector.decide, auto FX) + LampController's rate limit
+        change = (label != last_label) | (now - last_change > g["fx_interval"])
+        if change.any():  # most frames: same label, interval not up anywhere
+            last_label = np.where(change, label, last_label)
+            last_change = np.where(change, now, last_change)
+            last = pool_last.take(label)
+            idx = np.where(intensity >= 100, last, last / 100.0 * intensity).astype(np.int64)  # == int(np.interp(...))
+            allowed = change & (now - limiter_last >= g["mode_limit"])
+            limited += change & ~allowed
+            limiter_last = np.where(allowed, now, limiter_last)
+            new_fx = np.where(allowed, fx_flat.take(label * FX_TABLE.shape[1] + idx), fx)
+            fx_changes += new_fx != fx
+            fx = new_fx
+            sent += allowed
+
+        comfort_time += comfort * dt[i]
+        abs_energy += intensity
+        labels[i % B] = label
+        if i % B == B - 1 or i == T - 1:
+            n = i % B + 1
+            w = dt[i - n + 1:i + 1, None]
+            for k in range(len(ENGINE_LABELS)):
+                label_time[k] += ((labels[:n] == k) * w).sum(axis=0)
+        if history:
+            trace["energy"][i], trace["fx"][i] = energy, fx
+
+    duration = max(float(t[-1] - t[0]), 1e-9) if T else 1e-9
+    minutes = duration / 60.0
+    metrics = {
+        "modes_per_min": sent / minutes,
+        "fx_changes_per_min": fx_changes / minutes,
+        "rate_limited": limited,
+        "comfort_share": comfort_time / duration,
+        "comfort_entries": comfort_entries,
+        "mean_abs_energy": abs_energy / max(T, 1),
+        **{f"{name}_share": label_time[k] / duration for k, name in enumerate(ENGINE_LABELS)},
+    }
+    # Back to the caller's column order
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(P)
+    metrics = {k: v[inverse] for k, v in metrics.items()}
+    if history:
+        trace = {k: v[:, inverse] for k, v in trace.items()}
+        return metrics, trace
+    return metrics
+
+def _runs(values):
+    # Sorted array -> (value, start, stop) of each run of equal values
+    edges = np.flatnonzero(np.diff(values)) + 1
+    starts = np.r_[0, edges]
+    stops = np.r_[edges, len(values)]
+    return values[starts], starts, stops
+
+def reference(t, probs, fed, params=None):
+    # The real classes frame by frame (what --check compares against), at the
+    # defaults or at one grid column; the label thresholds are fixed in tracks.energy_label
+    from lamp_client import RateLimiter
+    from pipeline import LampDirector
+    from tracks import Track
+    p = {**DEFAULTS, **(params or {})}
+    person, director, limiter = Track(0, None), LampDirector(), RateLimiter(p["mode_limit"])
+    person.memory.maxlen = int(p["window"])
+    director.fx_change_interval = p["fx_interval"]
+    emotions = [dict(zip(EMOTION_LABELS, row)) for row in (probs * 100.0).tolist()]
+    energy, fx = np.zeros(len(t)), []
+    mode = None
+    for i in range(len(t)):
+        if fed[i]: person.feed(emotions[i], p["reactivity"], p["decay"])
+        label = person.remember(t[i], p["comfort_ratio"])
+        decision = director.decide(label, {"energy": person.energy, "comfort": person.comfort}, now=t[i])
+        if decision.mode and limiter.allow(t[i]): mode = decision.mode
+        energy[i] = person.energy
+        fx.append(FX_INDEX.get(mode, 0))
+    return energy, np.array(fx)
+
+def parse_axis(spec):
+    # "0.3" | "0.1,0.3,0.5" | "0.1:1.0:10" (linspace)
+    if ":" in spec:
+        lo, hi, n = spec.split(":")
+        return np.linspace(float(lo), float(hi), int(n))
+    return [float(v) for v in spec.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep energy engine / director parameters over recorded traces")
+    parser.add_argument("traces", nargs="+", help="recorder session directory / segment, or bulk_analyze .npz")
+    for name, default in DEFAULTS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=parse_axis, default=None, metavar="SPEC",
+                            help=f"value, list a,b,c or range lo:hi:n (default {default})")
+    parser.add_argument("--sort", default="modes_per_min", choices=METRICS, help="metric to sort by")
+    parser.add_argument("--desc", action="store_true", help="sort descending")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--csv", help="write every combination + metrics to this CSV")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--check", action="store_true", help="compare the default parameters against the real classes "
+                             "(on sessions recorded without the feed counter, face-cache hits on a still face "
+                             "are guessed as not fed, in both)")
+    args = parser.parse_args()
+
+    axes = {name: getattr(args, name) for name in DEFAULTS if getattr(args, name) is not None}
+    grid = make_grid(**axes)
+    P = len(grid["reactivity"])
+
+    if args.check:
+        ok = True
+        for path in args.traces:
+            t, probs, fed = load_trace(path)
+            _, trace = simulate(t, probs, fed, make_grid(), history=True)
+            energy, fx = reference(t, probs, fed)
+            same = np.allclose(trace["energy"][:, 0], energy, atol=1e-9) and np.array_equal(trace["fx"][:, 0], fx)
+            ok = ok and same
+            print(f"{path}: {len(t)} frames, {'identical' if same else 'MISMATCH'}")
+        sys.exit(0 if ok else 1)
+
+    # Several traces: metrics are averaged, weighted by trace duration
+    total, weights, frames = None, 0.0, 0
+    start = time.perf_counter()
+    for path in args.traces:
+        t, probs, fed = load_trace(path)
+        if len(t) < 2: continue
+        metrics = simulate(t, probs, fed, grid)
+        w = float(t[-1] - t[0])
+        total = {k: v * w for k, v in metrics.items()} if total is None else {k: total[k] + v * w for k, v in metrics.items()}
+        weights += w
+        frames += len(t)
+    elapsed = time.perf_counter() - start
+    if total is None:
+        raise SystemExit("no usable traces")
+    metrics = {k: v / weights for k, v in total.items()}
+
+    order = np.argsort(metrics[args.sort])
+    if args.desc: order = order[::-1]
+    rows = [{**{k: float(grid[k][i]) for k in axes}, **{k: float(metrics[k][i]) for k in metrics}} for i in order]
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.json:
+        print(json.dumps({"combinations": P, "frames": frames, "elapsed_s": elapsed, "top": rows[:args.top]}, indent=2))
+        return
+
+    print(f"{P} combinations x {frames} frames ({weights / 60:.1f} min of trace) in {elapsed:.2f}s "
+          f"-> {P * frames / elapsed / 1e6:.1f} M combination-frames/s")
+    shown = list(axes) + ["modes_per_min", "fx_changes_per_min", "comfort_share", "comfort_entries", "mean_abs_energy"]
+    if args.sort not in shown: shown.append(args.sort)
+    print("".join(f"{k[:14]:>15}" for k in shown))
+    for row in rows[:args.top]:
+        print("".join(f"{row[k]:>15.3f}" if isinstance(row[k], float) else f"{row[k]:>15}" for k in shown))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import threading
+import time
+
+# ==== TELEMETRY BUS ====
+# The worker publishes one compact Telemetry record per face frame; the GUI
+# polls the bus on its own timer (UI_RATE) and only ever sees the newest
+# record. Nothing crosses the thread boundary per frame except a reference
+# swap, and at high camera FPS the extra records are simply skipped instead
+# of queueing Qt signals and repaints.
+
+UI_RATE = 15  # GUI telemetry polls per second
+
+class Telemetry:
+    __slots__ = ("seq", "t", "dominant", "emotions", "status", "color", "gesture",
+                 "comfort", "energy", "faces", "fps", "cpu", "inference_ms", "interval_ms", "cache_hit_rate")
+
+    def __init__(self, dominant, emotions, status, color, gesture, sys_stats):
+        self.seq = 0
+        self.t = time.time()
+        self.dominant = dominant
+        self.emotions = emotions  # shared, not copied: the pipeline builds a new dict per result
+        self.status = status
+        self.color = color
+        self.gesture = gesture
+        self.comfort = sys_stats["comfort"]
+        self.energy = sys_stats["energy"]
+        self.faces = sys_stats.get("faces", 0)
+        self.fps = sys_stats["fps"]
+        self.cpu = sys_stats["cpu"]
+        self.inference_ms = sys_stats["inference"]
+        self.interval_ms = sys_stats["interval"]
+        self.cache_hit_rate = sys_stats.get("cache_hit_rate", 0.0)
+
+class TelemetryBus:
+    def __init__(self):
+        self._latest = None
+        self._lock = threading.Lock()
+        self._seq = 0
+
+        # Counters
+        self.published = 0
+        self.skipped = 0   # records replaced before anyone polled them
+        self._polled = 0
+
+    def publish(self, record):
+        with self._lock:
+            self._seq += 1
+            record.seq = self._seq
+            if self._latest is not None and self._latest.seq > self._polled:
+                self.skipped += 1
+            self._latest = record
+            self.published += 1
+
+    def poll(self, since=None):
+        # Newest record if it is newer than `since` (default: the last poll), else None
+        with self._lock:
+            rec = self._latest
+            since = self._polled if since is None else since
+            if rec is None or rec.seq <= since:
+                return None
+            self._polled = rec.seq
+            return rec
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the controller modules flat, like the scripts next to them do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,97 @@
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from frame_stream import HEADER, MAGIC, VERSION, UdpFrameReceiver, pack_frame, unpack_frame
+
+# ==== FRAME STREAM: WIRE FORMAT + RECEIVER SEQUENCE RULES ====
+
+def _frame(value=0, w=8, h=8):
+    frame = np.zeros((h, w, 3), dtype=np.uint8)
+    frame[0, 0] = (value, value + 1, value + 2)
+    return frame
+
+@pytest.fixture
+def receiver():
+    rx = UdpFrameReceiver(resync=0.3)
+    rx.start()
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(data):
+        # One datagram, then wait until the receiver has counted it
+        seen = rx.received + rx.late + rx.invalid
+        tx.sendto(data, ("127.0.0.1", rx.port))
+        end = time.monotonic() + 2.0
+        while rx.received + rx.late + rx.invalid == seen:
+            assert time.monotonic() < end, "datagram never arrived"
+            time.sleep(0.001)
+
+    rx.send = send
+    yield rx
+    tx.close()
+    rx.stop()
+
+def test_pack_unpack_round_trip():
+    frame = np.random.default_rng(1).integers(0, 256, (8, 16, 3), dtype=np.uint8)
+    data = pack_frame(0x1_0000_0005, frame, session=7)
+    assert len(data) == HEADER.size + 8 * 16 * 3
+    seq, out, session = unpack_frame(data)
+    assert (seq, session) == (5, 7)  # seq wraps at 32 bits
+    assert np.array_equal(out, frame)
+
+@pytest.mark.parametrize("mangle", [
+    lambda d: b"XX" + d[2:],                     # magic
+    lambda d: d[:2] + bytes([VERSION + 1]) + d[3:],
+    lambda d: d[:-1],                            # short payload
+    lambda d: d + b"\0",                         # long payload
+    lambda d: d[:HEADER.size - 1],               # truncated header
+])
+def test_unpack_rejects_bad_datagrams(mangle):
+    data = pack_frame(1, _frame(), session=1)
+    assert data[:2] == MAGIC
+    assert unpack_frame(mangle(data)) is None
+
+def test_receiver_counts_invalid(receiver):
+    receiver.send(b"XX" + pack_frame(0, _frame(), 1)[2:])
+    assert (receiver.invalid, receiver.received) == (1, 0)
+
+def test_late_and_duplicate_frames_are_dropped(receiver):
+    receiver.send(pack_frame(5, _frame(5), 1))
+    receiver.send(pack_frame(3, _frame(3), 1))
+    receiver.send(pack_frame(5, _frame(5), 1))
+    assert (receiver.received, receiver.late) == (1, 2)
+    assert receiver.frame[0, 0, 0] == 5
+
+def test_gaps_count_as_lost(receiver):
+    receiver.send(pack_frame(0, _frame(), 1))
+    receiver.send(pack_frame(4, _frame(), 1))
+    assert receiver.lost == 3
+
+def test_sequence_wraps(receiver):
+    receiver.send(pack_frame(0xFFFFFFFF, _frame(), 1))
+    receiver.send(pack_frame(0, _frame(), 1))
+    assert (receiver.received, receiver.late, receiver.lost) == (2, 0, 0)
+
+def test_new_session_restarts_sequence(receiver):
+    receiver.send(pack_frame(100, _frame(), 1))
+    receiver.send(pack_frame(0, _frame(9), 2))
+    assert (receiver.received, receiver.late, receiver.restarts) == (2, 0, 2)
+    assert receiver.frame[0, 0, 0] == 9
+    receiver.send(pack_frame(50, _frame(), 1))  # back to the old session: starts over again
+    assert receiver.restarts == 3
+
+def test_reset_restarts_sequence(receiver):
+    receiver.send(pack_frame(100, _frame(), 1))
+    receiver.reset()
+    receiver.send(pack_frame(0, _frame(), 1))
+    assert (receiver.received, receiver.late, receiver.restarts) == (2, 0, 2)
+
+def test_resync_after_pause(receiver):
+    receiver.send(pack_frame(100, _frame(), 1))
+    receiver.send(pack_frame(0, _frame(), 1))
+    assert receiver.late == 1  # same session, no pause: late
+    time.sleep(receiver.resync + 0.1)
+    receiver.send(pack_frame(0, _frame(), 1))
+    assert (receiver.received, receiver.late, receiver.restarts) == (2, 1, 2)
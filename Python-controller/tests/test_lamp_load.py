@@ -0,0 +1,90 @@
+import math
+import statistics
+import time
+
+import pytest
+
+from lamp_client import LampSender, RateLimiter, MODE_RATE_LIMIT
+from lamp_emulator import LampEmulator
+
+# ==== LAMP COMMAND PATH: RateLimiter -> LampSender -> LampEmulator ====
+# bench_lamp_load.py is the CLI version of the same loop; these runs are
+# short and the emulator is kept below saturation so the bounds are stable.
+
+LATENCY, JITTER = 0.03, 0.01
+SLACK = 0.05  # HTTP round trip + thread scheduling on a loaded machine
+
+@pytest.fixture
+def lamp():
+    emu = LampEmulator(latency=LATENCY, jitter=JITTER, seed=0)
+    emu.start()
+    sender = LampSender(emu.url)
+    sender.start()
+    yield emu, sender
+    sender.stop()
+    emu.stop()
+
+def _drain(emu, sender, applied):
+    end = time.monotonic() + 3.0
+    while (sender._pending or len(emu.log) < applied) and time.monotonic() < end:
+        time.sleep(0.01)
+
+# Rates where 0.2 s is not a whole number of decision periods, so float
+# rounding of the timestamps cannot move a boundary
+@pytest.mark.parametrize("rate", [4, 7, 12, 33])
+def test_rate_limiter_drop_counts(rate):
+    limiter = RateLimiter(MODE_RATE_LIMIT)
+    n = rate * 3
+    passed = [limiter.allow(i / rate) for i in range(n)]
+    every = math.ceil(MODE_RATE_LIMIT * rate)  # decisions per allowed mode
+    assert limiter.passed == sum(passed) == math.ceil(n / every)
+    assert limiter.limited == n - limiter.passed
+    assert [i for i, ok in enumerate(passed) if ok] == list(range(0, n, every))
+
+def test_merged_settings_arrive(lamp):
+    emu, sender = lamp
+    sender.send_settings({"brightness": 1})
+    while sender._pending: time.sleep(0.001)  # first body in flight, the lamp is busy
+    for b in range(2, 51):
+        sender.send_settings({"brightness": b})
+    sender.send_setting("speed", 7)
+    _drain(emu, sender, 2)
+
+    bodies = [c.value for c in emu.commands("settings")]
+    assert bodies == [{"brightness": 1}, {"brightness": 50, "speed": 7}]
+    assert sender.merged == 48
+    assert (emu.brightness, emu.speed) == (50, 7)
+    assert sender.errors == sender.dropped == 0
+
+def test_decision_loop_latency(lamp):
+    emu, sender = lamp
+    limiter = RateLimiter(MODE_RATE_LIMIT)
+    rate, seconds = 10, 2.0
+    decided = {}
+    start = next_t = time.perf_counter()
+    seq = 0
+    while time.perf_counter() - start < seconds:
+        now = decided[seq] = time.perf_counter()
+        if limiter.allow(now): sender.send_mode(f"fire#{seq}")
+        sender.send_settings({"brightness": seq % 200, "seq": seq})
+        seq += 1
+        next_t += 1.0 / rate
+        time.sleep(max(0.0, next_t - time.perf_counter()))
+    _drain(emu, sender, limiter.passed + seq - sender.merged // 2)
+
+    modes, settings = emu.commands("mode"), emu.commands("settings")
+    assert limiter.limited > 0
+    assert len(modes) == limiter.passed
+    # A merged body replaced both keys of an earlier one; the newest always lands
+    seqs = [c.value["seq"] for c in settings]
+    assert len(seqs) + sender.merged // 2 == seq
+    assert seqs == sorted(set(seqs)) and seqs[-1] == seq - 1
+    assert emu.counts.get("lost", 0) == sender.errors == 0
+
+    # Typically one request's worth of lamp time; at worst a settings body
+    # waits behind the mode of the same decision
+    budget = LATENCY + JITTER
+    latency = [c.applied - decided[int(c.value.split("#")[1])] for c in modes]
+    latency += [c.applied - decided[c.value["seq"]] for c in settings]
+    assert statistics.median(latency) <= budget + SLACK
+    assert max(latency) <= 2 * budget + SLACK
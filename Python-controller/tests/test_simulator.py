@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from classifier import EMOTION_LABELS
+from simulator import DEFAULTS, make_grid, reference, simulate
+
+# ==== SWEEP ENGINE == THE REAL Track / LampDirector / RateLimiter ====
+
+def synthetic_trace(seconds=60, fps=30, seed=0):
+    # Moods that hold for a few seconds (long sad stretches reach comfort mode),
+    # noisy probabilities, irregular frame times, and results that arrive on
+    # some frames only, as in a recorded session
+    rng = np.random.default_rng(seed)
+    n = seconds * fps
+    t = 1000.0 + np.cumsum(rng.uniform(0.6, 1.4, n) / fps)
+    moods = rng.choice(["happy", "sad", "surprise", "angry", "neutral", "sad"], size=n // 90 + 1)
+    probs = rng.dirichlet(np.ones(len(EMOTION_LABELS)), size=n) * 0.3
+    for i, mood in enumerate(np.repeat(moods, 90)[:n]):
+        probs[i, EMOTION_LABELS.index(mood)] += 0.7
+    probs = probs.astype(np.float32)
+    fed = rng.random(n) < 0.4
+    fed[0] = True
+    return t, probs, fed
+
+@pytest.fixture(scope="module")
+def trace():
+    return synthetic_trace()
+
+def test_defaults_match_reference(trace):
+    t, probs, fed = trace
+    _, sim = simulate(t, probs, fed, make_grid(), history=True)
+    energy, fx = reference(t, probs, fed)
+    np.testing.assert_allclose(sim["energy"][:, 0], energy, atol=1e-9)
+    np.testing.assert_array_equal(sim["fx"][:, 0], fx)
+
+def test_grid_columns_match_reference(trace):
+    t, probs, fed = trace
+    grid = make_grid(reactivity=[0.1, 0.6], decay=[2.0, 5.0], comfort_ratio=[0.25, 0.4],
+                     window=[150, 600], fx_interval=[3.0, 8.0], mode_limit=[0.2, 1.0])
+    metrics, sim = simulate(t, probs, fed, grid, history=True)
+    for col in range(len(grid["reactivity"])):
+        params = {k: v[col] for k, v in grid.items()}
+        energy, fx = reference(t, probs, fed, params)
+        np.testing.assert_allclose(sim["energy"][:, col], energy, atol=1e-9, err_msg=str(params))
+        np.testing.assert_array_equal(sim["fx"][:, col], fx, err_msg=str(params))
+
+    # The trace is busy enough that the columns actually behave differently
+    assert metrics["comfort_entries"].max() > 0 and metrics["comfort_entries"].min() == 0
+    assert len(np.unique(metrics["fx_changes_per_min"])) > 4
+    assert metrics["rate_limited"].max() > 0
+
+def test_threshold_columns(trace):
+    # Thresholds are fixed in the live code: only the DEFAULTS column has a reference
+    t, probs, fed = trace
+    grid = make_grid(happy=[20.0, DEFAULTS["happy"]], sad=[DEFAULTS["sad"], -60.0])
+    _, sim = simulate(t, probs, fed, grid, history=True)
+    col = int(np.flatnonzero((grid["happy"] == DEFAULTS["happy"]) & (grid["sad"] == DEFAULTS["sad"]))[0])
+    energy, fx = reference(t, probs, fed)
+    np.testing.assert_allclose(sim["energy"][:, col], energy, atol=1e-9)
+    np.testing.assert_array_equal(sim["fx"][:, col], fx)
+    assert not all(np.array_equal(sim["fx"][:, c], fx) for c in range(len(grid["happy"])))
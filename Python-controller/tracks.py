@@ -0,0 +1,190 @@
+import itertools
+
+import cv2
+import numpy as np
+
+from config import COMFORT_SAD_RATIO, COMFORT_WINDOW_S
+from memory import LabelWindow
+
+# ==== MULTI-FACE TRACKING ====
+# One Track per person in view. Full-frame detections are matched to tracks
+# by box overlap (IoU, greedy, best pair first); matched tracks re-lock their
+# tracker, new faces open a track and tracks that miss `max_misses`
+# detections in a row are closed. Between detections every track follows its
+# face with its own OpenCV tracker, so the expensive detector does not run
+# more often with more people, only the cheap per-face tracker update does.
+#
+# Each track carries its own energy engine, label memory and comfort flag,
+# so one sad person does not drag another person's state around. An
+# aggregation policy (AGGREGATORS) turns the tracks into the single emotion
+# the lamp shows.
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+def energy_label(energy):
+    if energy > 40: return "happy"
+    if energy > 10: return "surprise"
+    if energy < -40: return "sad"
+    if energy < -10: return "angry"
+    return "neutral"
+
+def make_tracker():
+    try: return cv2.TrackerCSRT_create()
+    except: return cv2.TrackerKCF_create()
+
+class Track:
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.tracker = None
+        self.tracking = False
+        self.misses = 0    # full detections in a row without a match
+        self.hits = 0
+
+        # Per-person emotion state
+        self.energy = 0.0
+        self.emotions = {}
+        self.label = "neutral"
+        self.memory = LabelWindow(maxlen=600, window_s=COMFORT_WINDOW_S)
+        self.comfort = False
+
+    @property
+    def area(self):
+        return self.box[2] * self.box[3]
+
+    def lock(self, frame, box):
+        # OpenCV rejects empty / off-frame boxes, and a build without the contrib
+        # trackers has neither: the track waits for the next detection instead
+        self.box = box
+        try:
+            self.tracker = make_tracker()
+            self.tracker.init(frame, box)
+            self.tracking = True
+        except (cv2.error, AttributeError): self.tracking = False
+
+    def follow(self, frame):
+        if not self.tracking: return
+        try:
+            success, box = self.tracker.update(frame)
+            if success: self.box = tuple(map(int, box))
+            else: self.tracking = False
+        except: self.tracking = False
+
+    def feed(self, emotions, reactivity, decay_rate):
+        # Energy Engine
+        self.emotions = emotions
+        positive = emotions["happy"] + emotions["surprise"]
+        negative = emotions["sad"] + emotions["angry"] + emotions["fear"] + emotions["disgust"]
+        self.energy = max(-100, min(100, self.energy + (positive - negative) * reactivity))
+
+        # Decay
+        if self.energy > 0: self.energy -= decay_rate
+        elif self.energy < 0: self.energy += decay_rate
+
+    def nudge(self, delta):
+        self.energy = max(-100, min(100, self.energy + delta))
+
+    def remember(self, now, comfort_ratio=COMFORT_SAD_RATIO):
+        # Label from energy, then the comfort-mode memory check
+        label = energy_label(self.energy)
+        self.memory.append(label, now)
+        if self.memory.fraction("sad") > comfort_ratio:
+            if not self.comfort:
+                self.comfort = True
+                label = "happy"
+                self.energy = 50
+        else:
+            self.comfort = False
+        self.label = label
+        return label
+
+class TrackManager:
+    def __init__(self, iou_threshold=0.3, max_misses=2, max_tracks=8):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.max_tracks = max_tracks
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def follow(self, frame):
+        for track in self.tracks: track.follow(frame)
+
+    @property
+    def all_tracking(self):
+        return bool(self.tracks) and all(t.tracking for t in self.tracks)
+
+    def get(self, track_id):
+        return next((t for t in self.tracks if t.id == track_id), None)
+
+    def associate(self, frame, boxes):
+        # Returns the track each detection ended up in (same order as boxes)
+        pairs = sorted(((iou(t.box, b), ti, bi) for ti, t in enumerate(self.tracks) for bi, b in enumerate(boxes)),
+                       reverse=True)
+        owner = [None] * len(boxes)
+        used = set()
+        for score, ti, bi in pairs:
+            if score < self.iou_threshold: break
+            if ti in used or owner[bi] is not None: continue
+            used.add(ti)
+            owner[bi] = self.tracks[ti]
+
+        for ti, track in enumerate(self.tracks):
+            track.misses = 0 if ti in used else track.misses + 1
+        self.tracks = [t for t in self.tracks if t.misses < self.max_misses]
+
+        # Biggest unmatched faces first when the track budget is tight
+        for bi in sorted(range(len(boxes)), key=lambda i: -boxes[i][2] * boxes[i][3]):
+            if owner[bi] is None and len(self.tracks) < self.max_tracks:
+                owner[bi] = Track(next(self._ids), boxes[bi])
+                self.tracks.append(owner[bi])
+
+        for box, track in zip(boxes, owner):
+            if track is not None:
+                track.hits += 1
+                track.lock(frame, box)
+        return owner
+
+    def nudge(self, delta):
+        for track in self.tracks: track.nudge(delta)
+
+    def clear(self):
+        self.tracks = []
+
+# ==== AGGREGATION POLICIES ====
+# f(tracks) -> (label, energy, emotions, comfort, focus track or None).
+# The focus track is the face the UI highlights and the scheduler watches.
+
+def _mean_emotions(tracks):
+    seen = [t.emotions for t in tracks if t.emotions]
+    if not seen: return {}
+    return {k: float(np.mean([e.get(k, 0.0) for e in seen])) for k in seen[0]}
+
+def aggregate_dominant(tracks):
+    # The person with the strongest feeling (largest |energy|) drives the lamp
+    t = max(tracks, key=lambda t: abs(t.energy))
+    return t.label, t.energy, t.emotions, t.comfort, t
+
+def aggregate_average(tracks):
+    # Mean energy of the room; comfort mode if anyone needs it
+    energy = float(np.mean([t.energy for t in tracks]))
+    comfort = any(t.comfort for t in tracks)
+    return energy_label(energy), energy, _mean_emotions(tracks), comfort, max(tracks, key=lambda t: t.area)
+
+def aggregate_largest(tracks):
+    # Closest person (biggest face) drives the lamp
+    t = max(tracks, key=lambda t: t.area)
+    return t.label, t.energy, t.emotions, t.comfort, t
+
+AGGREGATORS = {
+    "dominant": aggregate_dominant,
+    "average": aggregate_average,
+    "largest": aggregate_largest,
+}
@@ -2,6 +2,7 @@
 #include <WebServer.h>
 #include <FastLED.h>
 #include <ArduinoJson.h>
+#include <WiFiUdp.h>
 
 // ================= USER CONFIGURATION =================
 #define LED_PIN       5
@@ -18,9 +19,22 @@ const bool SERPENTINE_LAYOUT = false;
 const char* ssid     = "ESP32_MoodMatrix";
 const char* password = "password123";
 
+// Realtime frame stream (see Python-controller/frame_stream.py)
+#define STREAM_PORT   4210
+#define STREAM_HEADER 10
+#define STREAM_INDEX  37
+#define STREAM_RESYNC_MS 1000  // a pause this long starts a new stream (any seq accepted)
+
 // ================= GLOBALS & STATE =================
 CRGB leds[NUM_LEDS];
 WebServer server(80);
+WiFiUDP udp;
+
+// Frame stream position; streamHasSeq = false accepts the next seq as a new stream
+uint32_t streamSeq = 0;
+uint8_t streamSession = 0;
+uint32_t streamLastMs = 0;
+bool streamHasSeq = false;
 StaticJsonDocument<3000> jsonDoc;
 
 // --- Animation & Palette State ---
@@ -437,6 +451,7 @@ void drawAlien() { drawBitmap(IMG_ALIEN, CRGB::Green); }
 // --- UTILS ---
 void patManual() { /* Wait for API */ }
 void patBlackout() { fadeToBlackBy(leds, NUM_LEDS, 10); }
+void patStream() { /* Frames arrive over UDP */ }
 
 // ================= PATTERN REGISTRY =================
 typedef void (*PatternList[])();
@@ -455,7 +470,9 @@ PatternList patterns = {
   // Nature/Fun [23-28]
   patRain, patSnow, patBounce, patSnake, patBubbles, patAudioSim,
   // Utils
-  patCycle, drawHappy, drawSad, drawHeart, drawSkull, drawAlien, patManual, patBlackout
+  patCycle, drawHappy, drawSad, drawHeart, drawSkull, drawAlien, patManual, patBlackout,
+  // Stream [37]
+  patStream
 };
 
 // Map strings to indices
@@ -513,6 +530,7 @@ void setPatternByName(String name) {
   else if(name == "icon_alien") idx = 34;
   else if(name == "manual") idx = 35;
   else if(name == "off") idx = 36;
+  else if(name == "stream") idx = STREAM_INDEX;
   
   if(idx != currentPatternIndex) {
     nextPatternIndex = idx;
@@ -643,6 +661,7 @@ void handleSettings() {
 void handleMode() {
   if (server.hasArg("name")) {
     setPatternByName(server.arg("name"));
+    streamHasSeq = false; // the host left the stream; its next one restarts at seq 0
     server.send(200, "text/plain", "OK");
   }
 }
@@ -664,6 +683,48 @@ void handlePixel() {
   }
 }
 
+// ================= FRAME STREAM =================
+// One datagram = one frame: "MM", version, session, uint32 seq (LE), w, h,
+// then w*h RGB bytes row-major. Only the newest packet in the socket buffer
+// is shown; late or duplicate sequence numbers are ignored. Every sender
+// starts at seq 0, so a new session id, an /api/mode call or a pause of
+// STREAM_RESYNC_MS starts the sequence over.
+uint8_t streamBuf[STREAM_HEADER + NUM_LEDS * 3];
+
+void handleStream() {
+  bool fresh = false;
+  int size;
+  while ((size = udp.parsePacket()) > 0) {
+    if (size != sizeof(streamBuf)) { udp.flush(); continue; }
+    udp.read(streamBuf, sizeof(streamBuf));
+    if (streamBuf[0] != 'M' || streamBuf[1] != 'M' || streamBuf[2] != 1) continue;
+    if (streamBuf[8] != MATRIX_WIDTH || streamBuf[9] != MATRIX_HEIGHT) continue;
+
+    uint32_t seq = streamBuf[4] | (streamBuf[5] << 8) | ((uint32_t)streamBuf[6] << 16) | ((uint32_t)streamBuf[7] << 24);
+    uint32_t now = millis();
+    bool restart = !streamHasSeq || streamBuf[3] != streamSession || now - streamLastMs > STREAM_RESYNC_MS;
+    if (!restart && (int32_t)(seq - streamSeq) <= 0) continue; // late/duplicate
+    streamSeq = seq;
+    streamSession = streamBuf[3];
+    streamLastMs = now;
+    streamHasSeq = true;
+
+    const uint8_t* px = streamBuf + STREAM_HEADER;
+    for (uint8_t y = 0; y < MATRIX_HEIGHT; y++) {
+      for (uint8_t x = 0; x < MATRIX_WIDTH; x++, px += 3) {
+        leds[XY(x, y)] = CRGB(px[0], px[1], px[2]);
+      }
+    }
+    fresh = true;
+  }
+
+  if (fresh) {
+    currentPatternIndex = STREAM_INDEX;
+    isTransitioning = false;
+    FastLED.show();
+  }
+}
+
 // ================= MAIN LOOP =================
 
 void setup() {
@@ -684,16 +745,19 @@ void setup() {
   server.on("/api/pixel", handlePixel);
   
   server.begin();
+  udp.begin(STREAM_PORT);
 }
 
 void loop() {
   server.handleClient();
+  handleStream();
   EVERY_N_MILLISECONDS(20) { gHue++; }
   
   // 1. Palette Blending (Smooth color transitions)
   nblendPaletteTowardPalette(currentPalette, targetPalette, 48);
 
   static unsigned long lastFrame = 0;
+  if (currentPatternIndex == STREAM_INDEX && !isTransitioning) return; // host drives the LEDs
   if (millis() - lastFrame > gSpeed) {
     lastFrame = millis();
 